@@ -2,19 +2,52 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Dict, List, Optional
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Mapping, MutableMapping, Optional, Tuple, Union
 
+import numpy as np
 import torch
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from app.agents import compare_prefilter_recall, score_fleet_anomalies
+from app.agents.anomaly_agent import _to_anomaly_infos
+from app.agents.diagnosis_agent import METRIC_PART_MAP
 from app.config import WorkflowConfig
+from app.fleet import FleetRunner
 from app.graph import build_graph
+from app.models.backends import unwrap_model
+from app.models.incremental import IncrementalLSTMScorer
 from app.models.lstm_anomaly import LSTMAnomalyDetector
+from app.models.prefilter import get_prefilter_stats
+from app.models.registry import ModelVersion, load_or_init_model
+from app.scheduling import get_scheduling_engine
 from app.state import SystemState
-from app.utils.data_loader import load_vehicle_timeseries
+from app.streaming import StreamingIngestor
+from app.telemetry import MetricPointsView, TelemetryFrame, frame_from_state
+from app.utils.error_store import ReconstructionErrorStore, what_if
+from app.utils.fleet_stats import FleetAggregate
+from app.utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    HTTPMetricsMiddleware,
+    get_metrics_registry,
+)
+from app.utils.result_cache import (
+    STREAM_SCORER,
+    WINDOW_SCORER,
+    CacheKey,
+    WorkflowResultCache,
+    config_fingerprint,
+    model_fingerprint,
+    telemetry_digest,
+)
+from app.utils.telemetry_store import LazyFleet, open_fleet_store
 
 app = FastAPI(title="EY Agentic AI API", version="1.0.0")
 
@@ -26,53 +59,454 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-route request latency, served with node latencies at /metrics
+app.add_middleware(HTTPMetricsMiddleware)
 
 # Global state
 _workflow_cache: Optional[object] = None
 _model_cache: Optional[LSTMAnomalyDetector] = None
 _cfg_cache: Optional[WorkflowConfig] = None
-_vehicles_cache: Optional[Dict[str, SystemState]] = None
+_vehicles_cache: Optional[MutableMapping[str, SystemState]] = None
+_fleet_runner: Optional[FleetRunner] = None
+
+# Content-addressed cache of final workflow states
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "4096"))
+_result_cache = WorkflowResultCache(max_entries=RESULT_CACHE_SIZE)
+# Digests of telemetry replaced at runtime; stored vehicles use write-time digests
+_telemetry_digests: Dict[str, str] = {}
+_cfg_fingerprint: str = ""
+_model_version: str = ""
+
+# Running fleet statistics; vehicles in _stats_dirty still need a (re)run
+_fleet_stats = FleetAggregate()
+_stats_dirty: set = set()
+
+# Latest per-metric reconstruction errors, for threshold what-ifs without inference
+_error_store = ReconstructionErrorStore()
+_error_store_path: str = ""
+
+# Blocking work runs off the event loop: torch inference for single-vehicle runs on
+# a dedicated pool, whole-fleet runs on a single worker so they queue behind each
+# other (a queued run then mostly hits the result cache).
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "2"))
+_inference_executor = ThreadPoolExecutor(
+    max_workers=INFERENCE_WORKERS, thread_name_prefix="inference"
+)
+_fleet_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fleet-run")
+_init_lock = asyncio.Lock()
+
+# Streaming ingest: ring buffers, the micro-batch worker and recent alerts
+ALERT_HISTORY = int(os.environ.get("ALERT_HISTORY", "1000"))
+_ingestor: Optional[StreamingIngestor] = None
+# Per-vehicle LSTM state for streamed vehicles; rebuilt (and re-warmed) on model swaps
+_stream_scorer: Optional[IncrementalLSTMScorer] = None
+_stream_worker: Optional[asyncio.Task] = None
+_stream_wakeup = asyncio.Event()
+_alerts: deque = deque(maxlen=ALERT_HISTORY)
+_stream_stats: Dict[str, float] = {
+    "batches": 0,
+    "vehiclesScored": 0,
+    "lastLatencyMs": 0.0,
+    "maxLatencyMs": 0.0,
+}
+
+
+def _build_fleet_runner(
+    model: LSTMAnomalyDetector,
+    cfg: WorkflowConfig,
+    workflow: object,
+    entry: Optional[ModelVersion],
+) -> FleetRunner:
+    """Fleet runner sharing the graph, or building its own pipeline for `FLEET_RUNTIME`."""
+    return FleetRunner(
+        model,
+        cfg,
+        workflow=workflow if cfg.fleet.runtime == "graph" else None,
+        model_version=entry,
+        error_store=_error_store,
+    )
 
 
 def _get_workflow():
     """Lazy initialization of workflow and model."""
-    global _workflow_cache, _model_cache, _cfg_cache, _vehicles_cache
+    global _workflow_cache, _model_cache, _cfg_cache, _vehicles_cache, _fleet_runner
+    global _cfg_fingerprint, _model_version, _error_store, _error_store_path
 
     if _workflow_cache is None:
         cfg = WorkflowConfig()
-        dataset_path = "AgenticAI_Final_Format_Dataset.xlsx"
-
-        # Load vehicles
+        cfg.anomaly.backend = os.environ.get("INFERENCE_BACKEND", cfg.anomaly.backend)
+        cfg.prefilter.enabled = os.environ.get("PREFILTER", "0") == "1"
+        cfg.fast_path = os.environ.get("FAST_PATH", "1") == "1"
+        cfg.fleet.runtime = os.environ.get("FLEET_RUNTIME", cfg.fleet.runtime)
+        cfg.logging.sink = os.environ.get("WORKFLOW_LOG_SINK", cfg.logging.sink)
+        cfg.scheduling.workshops_path = os.environ.get("WORKSHOPS_PATH", "")
+        cfg.scheduling.batch_optimize = os.environ.get("BATCH_SCHEDULING", "0") == "1"
+        dataset_path = os.environ.get("DATASET_PATH", "AgenticAI_Final_Format_Dataset.xlsx")
+
+        # Load vehicles lazily from the memory-mapped telemetry store
         if not os.path.exists(dataset_path):
             raise FileNotFoundError(f"Dataset not found: {dataset_path}")
 
-        vehicles = load_vehicle_timeseries(dataset_path)
+        store = open_fleet_store(dataset_path, os.environ.get("FLEET_STORE_DIR") or None)
+        vehicles = LazyFleet(store)
         if not vehicles:
             raise ValueError("No vehicles loaded from dataset")
 
-        # Determine feature dimension from first vehicle
+        # Determine the feature schema from first vehicle
         first_vehicle = next(iter(vehicles.values()))
-        feature_dim = len(first_vehicle["raw_metrics"][0]["metrics"])
+        metric_names = frame_from_state(first_vehicle).metric_names
 
-        # Initialize model
-        model = LSTMAnomalyDetector(
-            input_dim=feature_dim,
+        # Warm-start from the model registry; random weights if nothing is registered
+        model, model_entry = load_or_init_model(
+            metric_names,
             hidden_dim=cfg.anomaly.hidden_dim,
             num_layers=cfg.anomaly.num_layers,
         )
 
+        model_version = model_entry.tag if model_entry else model_fingerprint(model)
+        # Errors saved by an earlier run are reused only if they came from this model
+        _error_store_path = os.environ.get("ERROR_STORE_PATH", f"{dataset_path}.errors.npz")
+        _error_store = ReconstructionErrorStore.load(_error_store_path, model_version)
+
         # Build workflow
-        workflow = build_graph(model, cfg)
+        workflow = build_graph(
+            model, cfg, inference_executor=_inference_executor, error_store=_error_store
+        )
 
         # Cache
         _workflow_cache = workflow
+        _fleet_runner = _build_fleet_runner(model, cfg, workflow, model_entry)
         _model_cache = model
         _cfg_cache = cfg
         _vehicles_cache = vehicles
+        _cfg_fingerprint = config_fingerprint(cfg)
+        _model_version = model_version
+        _telemetry_digests.clear()
+        _result_cache.clear()
+        _fleet_stats.clear()
+        _stats_dirty.clear()
+        _stats_dirty.update(vehicles)
 
     return _workflow_cache, _model_cache, _cfg_cache, _vehicles_cache
 
 
+def update_vehicle_telemetry(vehicle_id: str, state: SystemState) -> None:
+    """Replace a vehicle's initial state and invalidate its cached result."""
+    _, _, _, vehicles = _get_workflow()
+    vehicles[vehicle_id] = state
+    _telemetry_digests[vehicle_id] = telemetry_digest(frame_from_state(state))
+    _result_cache.invalidate(vehicle_id)
+    _error_store.discard(vehicle_id)
+    _stats_dirty.add(vehicle_id)
+
+
+def set_model(model: LSTMAnomalyDetector, entry: Optional[ModelVersion] = None) -> None:
+    """Swap in new model weights, rebuild the graph and drop every cached result.
+
+    Pass the registry `entry` for registered models so cache keys use its version tag.
+    """
+    global _workflow_cache, _model_cache, _model_version, _fleet_runner, _stream_scorer
+    _, _, cfg, _ = _get_workflow()
+    _model_version = entry.tag if entry else model_fingerprint(model)
+    _error_store.clear(_model_version)
+    _workflow_cache = build_graph(
+        model, cfg, inference_executor=_inference_executor, error_store=_error_store
+    )
+    _fleet_runner.close()
+    _fleet_runner = _build_fleet_runner(model, cfg, _workflow_cache, entry)
+    _model_cache = model
+    _stream_scorer = None
+    _result_cache.clear()
+    _stats_dirty.update(_vehicles_cache or {})
+
+
+async def _aget_workflow():
+    """Async variant of `_get_workflow` that loads the dataset off the event loop."""
+    if _workflow_cache is None:
+        async with _init_lock:
+            if _workflow_cache is None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(_inference_executor, _get_workflow)
+    return _get_workflow()
+
+
+def _vehicle_digest(vehicle_id: str) -> str:
+    digest = _telemetry_digests.get(vehicle_id)
+    if digest is None and isinstance(_vehicles_cache, LazyFleet):
+        digest = _vehicles_cache.stored_digest(vehicle_id)
+    if digest is None:
+        digest = telemetry_digest(frame_from_state(_vehicles_cache[vehicle_id]))
+        _telemetry_digests[vehicle_id] = digest
+    return digest
+
+
+def _cache_key(vehicle_id: str, scorer: str = WINDOW_SCORER) -> CacheKey:
+    return WorkflowResultCache.make_key(
+        vehicle_id, _vehicle_digest(vehicle_id), _cfg_fingerprint, _model_version, scorer
+    )
+
+
+def _booking_current(state: SystemState) -> bool:
+    """Whether a cached state's schedule is still the engine's booking for the vehicle.
+
+    Fleet runs expire started slots and cancel or rebook others, so a cached
+    schedule can go stale while telemetry, config and model stay the same.
+    """
+    booking = get_scheduling_engine().get(state.get("vehicle_id", "V-NA"))
+    expected = booking.to_schedule_info() if booking is not None else None
+    return (state.get("schedule") or None) == expected
+
+
+def _cached_result(vehicle_id: str, scorer: str = WINDOW_SCORER) -> Optional[SystemState]:
+    return _result_cache.get(_cache_key(vehicle_id, scorer), valid=_booking_current)
+
+
+def _record_result(
+    vehicle_id: str, final_state: SystemState, scorer: str = WINDOW_SCORER
+) -> None:
+    _result_cache.put(_cache_key(vehicle_id, scorer), final_state)
+    _fleet_stats.update(vehicle_id, final_state)
+    _stats_dirty.discard(vehicle_id)
+
+
+def _run_vehicle(vehicle_id: str, force: bool = False) -> SystemState:
+    """Run (or fetch the cached result of) the workflow for one vehicle."""
+    workflow, _, _, vehicles = _get_workflow()
+    if not force:
+        cached = _cached_result(vehicle_id)
+        if cached is not None:
+            return cached
+
+    initial_state = vehicles[vehicle_id]
+    final_state = workflow.invoke({**initial_state, "logs": list(initial_state.get("logs") or [])})
+    _record_result(vehicle_id, final_state)
+    return final_state
+
+
+async def _arun_vehicle(vehicle_id: str, force: bool = False) -> SystemState:
+    """Non-blocking `_run_vehicle`: cache hits return immediately, misses use `ainvoke`."""
+    workflow, _, _, vehicles = await _aget_workflow()
+    if not force:
+        cached = _cached_result(vehicle_id)
+        if cached is not None:
+            return cached
+
+    initial_state = vehicles[vehicle_id]
+    final_state = await workflow.ainvoke(
+        {**initial_state, "logs": list(initial_state.get("logs") or [])}
+    )
+    _record_result(vehicle_id, final_state)
+    return final_state
+
+
+def _run_fleet(
+    vehicles: Mapping[str, SystemState],
+    scorer: str = WINDOW_SCORER,
+) -> Iterator[Tuple[str, SystemState, SystemState]]:
+    """Run the workflow for every vehicle, scoring anomalies in fleet-wide batches.
+
+    Vehicles whose telemetry, config and model are unchanged, and whose cached
+    schedule is still their booking, come straight from the result cache; only the misses are batch-scored and run on the shared FleetRunner.
+
+    Results are cached under `scorer`; pass `STREAM_SCORER` for states carrying
+    incremental streaming scores.
+
+    Yields (vehicle_id, initial_state, final_state); vehicles that fail are logged and skipped.
+    """
+    finals: Dict[str, SystemState] = {}
+    misses: List[str] = []
+    for vehicle_id in vehicles:
+        cached = _cached_result(vehicle_id, scorer)
+        if cached is None:
+            misses.append(vehicle_id)
+        else:
+            finals[vehicle_id] = cached
+            if vehicle_id in _stats_dirty:
+                _fleet_stats.update(vehicle_id, cached)
+                _stats_dirty.discard(vehicle_id)
+
+    if misses:
+        for result in _fleet_runner.run({v: vehicles[v] for v in misses}):
+            if not result.ok:
+                print(f"Error processing vehicle {result.vehicle_id}: {result.error}")
+                # its old contribution is gone; it stays dirty so the next stats call retries
+                _fleet_stats.remove(result.vehicle_id)
+                continue
+            _record_result(result.vehicle_id, result.state, scorer)
+            finals[result.vehicle_id] = result.state
+
+    for vehicle_id, initial_state in vehicles.items():
+        if vehicle_id in finals:
+            yield vehicle_id, initial_state, finals[vehicle_id]
+
+
+def _fill_error_store() -> None:
+    """Score vehicles the error store lacks (e.g. cached results from a past run) and save it.
+
+    Only the anomaly stage runs; errors depend on telemetry and model alone.
+    """
+    _, model, cfg, vehicles = _get_workflow()
+    missing = [v for v in vehicles if v not in _error_store]
+    if missing:
+        score_fleet_anomalies(model, [vehicles[v] for v in missing], cfg, _error_store)
+    if missing or not os.path.exists(_error_store_path):
+        _error_store.save(_error_store_path)
+
+
+async def _arefresh_stats(vehicles: Mapping[str, SystemState]) -> None:
+    """Re-run the vehicles in `_stats_dirty` so `_fleet_stats` covers them.
+
+    Ids leave the dirty set only once their result is recorded (or they no longer
+    exist), so a failed vehicle or an aborted run is retried on the next call.
+    """
+    _stats_dirty.difference_update([v for v in list(_stats_dirty) if v not in vehicles])
+    if _stats_dirty:
+        # _run_fleet feeds every fresh result into _fleet_stats as it goes
+        await _arun_fleet({v: vehicles[v] for v in list(_stats_dirty)})
+
+
+async def _arun_fleet(
+    vehicles: Mapping[str, SystemState],
+) -> List[Tuple[str, SystemState, SystemState]]:
+    """Run `_run_fleet` on the fleet executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_fleet_executor, lambda: list(_run_fleet(vehicles)))
+
+
+def _get_ingestor() -> StreamingIngestor:
+    """Ring buffers sized to the LSTM window, seeded from stored telemetry."""
+    global _ingestor
+    if _ingestor is None:
+        _, _, cfg, vehicles = _get_workflow()
+
+        def seed(vehicle_id: str) -> Optional[TelemetryFrame]:
+            if vehicle_id not in vehicles:
+                return None
+            return frame_from_state(vehicles[vehicle_id])
+
+        _ingestor = StreamingIngestor(
+            cfg.anomaly.window_size, seed, metric_names=vehicles.store.metric_names
+        )
+    return _ingestor
+
+
+def _get_stream_scorer() -> IncrementalLSTMScorer:
+    """Incremental scorer over the ingestor's schema, for the current model."""
+    global _stream_scorer
+    if _stream_scorer is None:
+        _, model, cfg, vehicles = _get_workflow()
+        _stream_scorer = IncrementalLSTMScorer(
+            unwrap_model(model),
+            sorted(vehicles.store.metric_names),
+            cfg.anomaly.anomaly_threshold,
+        )
+    return _stream_scorer
+
+
+def _score_stream_batch(drained: List[Tuple[str, TelemetryFrame, float, np.ndarray]]) -> None:
+    """Publish fresh buffer snapshots and re-run the workflow for just those vehicles.
+
+    Anomalies come from the incremental scorer, advanced by only the points that
+    arrived since each vehicle's last batch, in arrival order; a vehicle it has
+    not seen yet warms up over its whole buffer. The remaining nodes run as in a fleet run.
+    """
+    _, _, cfg, vehicles = _get_workflow()
+    scorer = _get_stream_scorer()
+    since_by_vehicle: Dict[str, float] = {}
+    updates: Dict[str, torch.Tensor] = {}
+    for vehicle_id, frame, since, new_rows in drained:
+        fresh = new_rows if vehicle_id in scorer else frame.values
+        updates[vehicle_id] = torch.from_numpy(fresh)
+        base = vehicles[vehicle_id] if vehicle_id in vehicles else {
+            "vehicle_id": vehicle_id,
+            "model": "unknown",
+            "variant": "unknown",
+            "user_segment": cfg.default_user_segment,
+        }
+        update_vehicle_telemetry(
+            vehicle_id,
+            {**base, "telemetry": frame, "raw_metrics": MetricPointsView(frame), "logs": []},
+        )
+        since_by_vehicle[vehicle_id] = since
+    scorer.update_many(updates)
+
+    scored = {
+        v: {
+            **vehicles[v],
+            "anomalies": _to_anomaly_infos(scorer.anomalies(v)),
+            "anomalies_precomputed": True,
+        }
+        for v in since_by_vehicle
+    }
+    for vehicle_id, initial_state, final_state in _run_fleet(scored, STREAM_SCORER):
+        latency_ms = (time.monotonic() - since_by_vehicle[vehicle_id]) * 1000
+        _stream_stats["lastLatencyMs"] = round(latency_ms, 2)
+        _stream_stats["maxLatencyMs"] = max(_stream_stats["maxLatencyMs"], round(latency_ms, 2))
+        diagnosis = final_state.get("diagnosis")
+        if diagnosis and diagnosis.get("severity_level") in {"medium", "high"}:
+            _alerts.append({
+                "vehicleId": vehicle_id,
+                "customerId": initial_state.get("customer_id", f"CUST_{vehicle_id}"),
+                "severityLevel": diagnosis.get("severity_level"),
+                "partName": diagnosis.get("part_name", ""),
+                "latencyMs": round(latency_ms, 2),
+            })
+    _stream_stats["batches"] += 1
+    _stream_stats["vehiclesScored"] += len(drained)
+
+
+async def _stream_worker_loop() -> None:
+    """Score changed vehicles in micro-batches.
+
+    A batch starts as soon as `max_batch` vehicles are pending, or once the oldest
+    pending point has waited `max_delay_s`, which bounds ingest-to-alert latency by
+    that delay plus one batch run.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        ingestor = _get_ingestor()
+        streaming = _cfg_cache.streaming
+        if not ingestor.pending:
+            _stream_wakeup.clear()
+            await _stream_wakeup.wait()
+            continue
+
+        wait = streaming.max_delay_s - ingestor.oldest_pending_age()
+        if ingestor.pending < streaming.max_batch and wait > 0:
+            _stream_wakeup.clear()
+            try:
+                await asyncio.wait_for(_stream_wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        drained = ingestor.drain(streaming.max_batch)
+        try:
+            await loop.run_in_executor(_fleet_executor, _score_stream_batch, drained)
+        except Exception as e:
+            print(f"Error scoring streamed telemetry: {e}")
+
+
+def _ensure_stream_worker() -> None:
+    global _stream_worker
+    if _stream_worker is None or _stream_worker.done():
+        _stream_worker = asyncio.create_task(_stream_worker_loop())
+
+
+class TelemetryPoint(BaseModel):
+    """One streamed telemetry reading."""
+
+    vehicleId: str
+    timestamp: float
+    metrics: Dict[str, Union[float, str, None]]
+
+
+class TelemetryBatch(BaseModel):
+    """Bulk telemetry upload."""
+
+    points: List[TelemetryPoint]
+
+
 class VehicleResponse(BaseModel):
     """Response model for vehicle data."""
 
@@ -152,34 +586,26 @@ def _system_state_to_response(state: SystemState, customer_id: str) -> VehicleRe
 
 
 @app.get("/")
-def root():
+async def root():
     """Health check endpoint."""
     return {"status": "ok", "service": "EY Agentic AI API"}
 
 
 @app.get("/api/vehicles")
-def get_vehicles():
+async def get_vehicles():
     """Get all vehicles with their workflow execution results."""
     try:
-        workflow, model, cfg, vehicles = _get_workflow()
+        workflow, model, cfg, vehicles = await _aget_workflow()
         results: List[VehicleResponse] = []
 
         # Run workflow for each vehicle
-        for vehicle_id, initial_state in vehicles.items():
-            try:
-                # Extract customer_id from state if available, otherwise use placeholder
-                customer_id = initial_state.get("customer_id", f"CUST_{vehicle_id}")
-
-                # Run workflow
-                final_state = workflow.invoke(initial_state)
-
-                # Convert to response format
-                vehicle_response = _system_state_to_response(final_state, customer_id)
-                results.append(vehicle_response)
-            except Exception as e:
-                # Skip vehicles that fail, but log the error
-                print(f"Error processing vehicle {vehicle_id}: {e}")
-                continue
+        for vehicle_id, initial_state, final_state in await _arun_fleet(vehicles):
+            # Extract customer_id from state if available, otherwise use placeholder
+            customer_id = initial_state.get("customer_id", f"CUST_{vehicle_id}")
+
+            # Convert to response format
+            vehicle_response = _system_state_to_response(final_state, customer_id)
+            results.append(vehicle_response)
 
         return {"vehicles": results, "total": len(results)}
     except Exception as e:
@@ -187,10 +613,10 @@ def get_vehicles():
 
 
 @app.get("/api/vehicles/{vehicle_id}")
-def get_vehicle(vehicle_id: str):
+async def get_vehicle(vehicle_id: str):
     """Get a specific vehicle's workflow execution result."""
     try:
-        workflow, model, cfg, vehicles = _get_workflow()
+        workflow, model, cfg, vehicles = await _aget_workflow()
 
         if vehicle_id not in vehicles:
             raise HTTPException(status_code=404, detail=f"Vehicle {vehicle_id} not found")
@@ -198,8 +624,8 @@ def get_vehicle(vehicle_id: str):
         initial_state = vehicles[vehicle_id]
         customer_id = initial_state.get("customer_id", f"CUST_{vehicle_id}")
 
-        # Run workflow
-        final_state = workflow.invoke(initial_state)
+        # Run workflow (served from the result cache when inputs are unchanged)
+        final_state = await _arun_vehicle(vehicle_id)
 
         # Convert to response format
         return _system_state_to_response(final_state, customer_id)
@@ -210,10 +636,10 @@ def get_vehicle(vehicle_id: str):
 
 
 @app.post("/api/workflow/run/{vehicle_id}")
-def run_workflow(vehicle_id: str):
+async def run_workflow(vehicle_id: str):
     """Manually trigger workflow execution for a vehicle."""
     try:
-        workflow, model, cfg, vehicles = _get_workflow()
+        workflow, model, cfg, vehicles = await _aget_workflow()
 
         if vehicle_id not in vehicles:
             raise HTTPException(status_code=404, detail=f"Vehicle {vehicle_id} not found")
@@ -221,8 +647,8 @@ def run_workflow(vehicle_id: str):
         initial_state = vehicles[vehicle_id]
         customer_id = initial_state.get("customer_id", f"CUST_{vehicle_id}")
 
-        # Run workflow
-        final_state = workflow.invoke(initial_state)
+        # Run workflow, bypassing and refreshing the cached result
+        final_state = await _arun_vehicle(vehicle_id, force=True)
 
         # Convert to response format
         return _system_state_to_response(final_state, customer_id)
@@ -233,87 +659,191 @@ def run_workflow(vehicle_id: str):
 
 
 @app.get("/api/stats")
-def get_stats():
-    """Get aggregated statistics from all vehicles."""
-    try:
-        workflow, model, cfg, vehicles = _get_workflow()
-        results: List[VehicleResponse] = []
-
-        # Run workflow for all vehicles
-        for vehicle_id, initial_state in vehicles.items():
-            try:
-                customer_id = initial_state.get("customer_id", f"CUST_{vehicle_id}")
-                final_state = workflow.invoke(initial_state)
-                vehicle_response = _system_state_to_response(final_state, customer_id)
-                results.append(vehicle_response)
-            except Exception:
-                continue
+async def get_stats():
+    """Get aggregated statistics from all vehicles.
 
-        # Calculate statistics
-        total_vehicles = len(results)
-        anomalies_detected = sum(1 for v in results if v.anomalies)
-        scheduled = sum(1 for v in results if v.schedule)
-        serviced = sum(1 for v in results if v.feedback)
-
-        # Diagnosis accuracy
-        correct_diagnoses = sum(1 for v in results if v.feedback and v.feedback.get("diagnosisCorrect"))
-        total_feedback = sum(1 for v in results if v.feedback)
-        diagnosis_accuracy = (correct_diagnoses / total_feedback * 100) if total_feedback > 0 else 0
-
-        # Average rating
-        ratings = [v.feedback["customerRating"] for v in results if v.feedback]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
-
-        # Part failure distribution
-        part_failures: Dict[str, int] = {}
-        for v in results:
-            if v.diagnosis:
-                part_name = v.diagnosis.get("partName", "Unknown")
-                part_failures[part_name] = part_failures.get(part_name, 0) + 1
-
-        # Severity distribution
-        severity_counts = {"high": 0, "medium": 0, "low": 0}
-        for v in results:
-            if v.diagnosis:
-                severity = v.diagnosis.get("severityLevel", "low")
-                severity_counts[severity] = severity_counts.get(severity, 0) + 1
+    Totals are maintained incrementally as vehicle results change; only vehicles
+    whose telemetry or model changed since their last run are executed here.
+    """
+    try:
+        workflow, model, cfg, vehicles = await _aget_workflow()
 
-        return {
-            "totalVehicles": total_vehicles,
-            "anomaliesDetected": anomalies_detected,
-            "scheduled": scheduled,
-            "serviced": serviced,
-            "diagnosisAccuracy": round(diagnosis_accuracy, 2),
-            "avgRating": round(avg_rating, 2),
-            "partFailures": part_failures,
-            "severityDistribution": severity_counts,
-        }
+        await _arefresh_stats(vehicles)
+        return _fleet_stats.snapshot()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/manufacturing")
-def get_manufacturing_insights():
+async def get_manufacturing_insights():
     """Get manufacturing insights payloads."""
     try:
-        workflow, model, cfg, vehicles = _get_workflow()
+        workflow, model, cfg, vehicles = await _aget_workflow()
         insights = []
 
         # Run workflow for all vehicles and collect manufacturing payloads
-        for vehicle_id, initial_state in vehicles.items():
-            try:
-                final_state = workflow.invoke(initial_state)
-                payload = final_state.get("manufacturing_payload")
-                if payload:
-                    insights.append(payload)
-            except Exception:
-                continue
+        for _, _, final_state in await _arun_fleet(vehicles):
+            payload = final_state.get("manufacturing_payload")
+            if payload:
+                insights.append(payload)
 
         return {"insights": insights, "total": len(insights)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/telemetry")
+async def ingest_telemetry(body: Union[TelemetryBatch, TelemetryPoint]):
+    """Append streamed telemetry (single point or bulk) and queue changed vehicles for scoring."""
+    try:
+        await _aget_workflow()
+        points = body.points if isinstance(body, TelemetryBatch) else [body]
+        ingestor = _get_ingestor()
+        accepted = ingestor.ingest((p.vehicleId, p.timestamp, p.metrics) for p in points)
+        _ensure_stream_worker()
+        _stream_wakeup.set()
+        return {
+            "accepted": accepted,
+            "vehicles": len({p.vehicleId for p in points}),
+            "pending": ingestor.pending,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/telemetry/alerts")
+async def get_stream_alerts(limit: int = 50):
+    """Most recent medium/high severity alerts raised by streamed telemetry."""
+    ingestor = _ingestor
+    return {
+        "alerts": list(_alerts)[-limit:][::-1],
+        "pending": ingestor.pending if ingestor else 0,
+        "pointsIngested": ingestor.points_ingested if ingestor else 0,
+        **_stream_stats,
+    }
+
+
+@app.get("/api/prefilter")
+async def prefilter_stats(compare: bool = False):
+    """Pre-filter stage counters; `compare=true` also measures recall on the fleet."""
+    try:
+        _, model, cfg, vehicles = await _aget_workflow()
+        response = {"enabled": cfg.prefilter.enabled, **get_prefilter_stats().snapshot()}
+        if compare:
+            loop = asyncio.get_running_loop()
+            response["comparison"] = await loop.run_in_executor(
+                _fleet_executor,
+                lambda: compare_prefilter_recall(model, list(vehicles.values()), cfg),
+            )
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/schedule")
+async def schedule_stats():
+    """Workshop bookings and the next free slot per workshop."""
+    return get_scheduling_engine().snapshot()
+
+
+@app.get("/api/workshops/nearest")
+async def nearest_workshops(
+    lat: float, lon: float, k: int = 5, within_hours: Optional[float] = None
+):
+    """Nearest workshops with a free bay within `within_hours` (default: lead + max wait)."""
+    engine = get_scheduling_engine()
+    before = None
+    if within_hours is not None:
+        before = datetime.utcnow() + timedelta(hours=within_hours)
+    return [
+        {
+            "workshopId": workshop.workshop_id,
+            "name": workshop.name,
+            "distanceKm": round(distance, 3),
+            "nextFreeSlot": slot.isoformat(),
+        }
+        for workshop, distance, slot in engine.nearest_available(lat, lon, k, before)
+    ]
+
+
+@app.get("/api/whatif")
+async def threshold_what_if(
+    anomaly_threshold: Optional[float] = None,
+    medium_severity_threshold: Optional[float] = None,
+    high_severity_threshold: Optional[float] = None,
+    include_vehicles: bool = False,
+):
+    """Fleet stats re-derived for other thresholds from stored reconstruction errors.
+
+    Omitted thresholds keep their configured values. No model inference runs unless
+    some vehicles have never been scored by the current model.
+    """
+    try:
+        _, _, cfg, vehicles = await _aget_workflow()
+        if anomaly_threshold is None:
+            anomaly_threshold = cfg.anomaly.anomaly_threshold
+        medium = cfg.medium_severity_threshold
+        if medium_severity_threshold is not None:
+            medium = medium_severity_threshold
+        high = cfg.high_severity_threshold
+        if high_severity_threshold is not None:
+            high = high_severity_threshold
+        if anomaly_threshold <= 0:
+            raise HTTPException(status_code=400, detail="anomaly_threshold must be positive")
+
+        # Feedback outcomes come from the workflow; bring stale vehicles up to date first
+        await _arefresh_stats(vehicles)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_fleet_executor, _fill_error_store)
+
+        vehicle_ids, metric_names, errors = _error_store.matrix()
+        result = what_if(
+            vehicle_ids,
+            metric_names,
+            errors,
+            anomaly_threshold=anomaly_threshold,
+            medium_severity_threshold=medium,
+            high_severity_threshold=high,
+            metric_parts={m: part["part_name"] for m, part in METRIC_PART_MAP.items()},
+            feedback=_fleet_stats.contributions(),
+            include_vehicles=include_vehicles,
+        )
+        result["thresholds"] = {
+            "anomalyThreshold": anomaly_threshold,
+            "mediumSeverityThreshold": medium,
+            "highSeverityThreshold": high,
+        }
+        result["modelVersion"] = _error_store.model_version
+        if not include_vehicles:
+            del result["vehicles"]
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of workflow node and HTTP request latencies."""
+    return Response(get_metrics_registry().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.delete("/api/cache")
+async def invalidate_cache(vehicle_id: Optional[str] = None):
+    """Drop cached workflow results for one vehicle, or for the whole fleet."""
+    if vehicle_id is None:
+        _result_cache.clear()
+        return {"invalidated": "all"}
+    return {"invalidated": vehicle_id if _result_cache.invalidate(vehicle_id) else None}
+
+
+@app.get("/api/cache")
+async def cache_stats():
+    """Report result cache occupancy and hit rate."""
+    return _result_cache.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,8 +1,14 @@
 """Agent node factories and utilities."""
 
-from app.agents.anomaly_agent import build_anomaly_agent
+from app.agents.anomaly_agent import (
+    build_anomaly_agent,
+    compare_prefilter_recall,
+    score_fleet_anomalies,
+    with_fleet_anomalies,
+)
 from app.agents.diagnosis_agent import diagnosis_agent
 from app.agents.engagement_agent import engagement_agent
+from app.agents.fast_path_agent import healthy_vehicle_agent
 from app.agents.feedback_agent import feedback_agent
 from app.agents.ingest_agent import ingest_agent
 from app.agents.manufacturing_agent import manufacturing_insights_agent
@@ -11,11 +17,15 @@ from app.agents.scheduling_agent import scheduling_agent
 __all__ = [
     "ingest_agent",
     "build_anomaly_agent",
+    "score_fleet_anomalies",
+    "with_fleet_anomalies",
+    "compare_prefilter_recall",
     "diagnosis_agent",
     "engagement_agent",
     "scheduling_agent",
     "feedback_agent",
     "manufacturing_insights_agent",
+    "healthy_vehicle_agent",
 ]
 
 
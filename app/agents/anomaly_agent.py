@@ -75,94 +75,276 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Sequence
+import dataclasses
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import torch
 
 from app.config import WorkflowConfig
-from app.models import infer_anomalies
-from app.models.lstm_anomaly import LSTMAnomalyDetector
-from app.state import AnomalyInfo, SystemState, VehicleMetricPoint
-from app.utils.logging_utils import append_log
-
-
-def _extract_series(
-    raw_points: List[VehicleMetricPoint],
-) -> tuple[torch.Tensor, Sequence[str]]:
-    """Convert telemetry points into a tensor suitable for the model.
-    
-    Dataset tweak:
-    - Ignore non-numeric parameters (e.g., DTC / error codes)
+from app.models import as_inference_backend
+from app.models.lstm_anomaly import (
+    LSTMAnomalyDetector,
+    infer_errors,
+    infer_errors_batch,
+    threshold_errors,
+)
+from app.models.prefilter import get_prefilter_stats, screen_frames, timed_screen
+from app.state import AnomalyInfo, SystemState
+from app.telemetry import TelemetryFrame, frame_from_state
+from app.utils.error_store import ReconstructionErrorStore
+from app.utils.logging_utils import WARNING, append_log
+
+
+def _extract_series(frame: TelemetryFrame) -> tuple[torch.Tensor, Sequence[str]]:
+    """Convert telemetry into a tensor suitable for the model.
+
+    The frame already holds only numeric metrics (categorical DTCs are dropped or
+    encoded upstream) in sorted column order, so this is a zero-copy view.
     """
 
-    if not raw_points:
+    if len(frame) == 0 or frame.n_metrics == 0:
         raise ValueError("No telemetry points provided.")
 
-    # keep only numeric metrics (dataset has categorical DTCs)
-    metric_names = sorted(
-        name
-        for name, value in raw_points[0]["metrics"].items()
-        if isinstance(value, (int, float))
-    )
+    tensor = frame.as_tensor().unsqueeze(0)
+    # shape: (1, seq_len, num_features)
 
-    series = []
-    for point in raw_points:
-        values = [
-            float(point["metrics"].get(name, 0.0))
-            for name in metric_names
-        ]
-        series.append(values)
+    return tensor, frame.metric_names
+
+
+def _to_anomaly_infos(
+    anomalies_raw: List[Tuple[str, float, float]],
+) -> List[AnomalyInfo]:
+    anomalies: List[AnomalyInfo] = []
+    for metric_name, severity, error in anomalies_raw:
+        anomalies.append(
+            {
+                "metric_name": metric_name,
+                "severity": severity,
+                "error": error,
+                "explanation": (
+                    f"{metric_name} reconstruction error {error:.4f} "
+                    f"exceeds threshold"
+                ),
+            }
+        )
+    return anomalies
 
-    tensor = torch.tensor(series, dtype=torch.float32).unsqueeze(0)
-    # shape: (1, seq_len, num_features)
 
-    return tensor, metric_names
+def score_fleet_anomalies(
+    model: LSTMAnomalyDetector,
+    states: Sequence[SystemState],
+    config: WorkflowConfig,
+    error_store: Optional[ReconstructionErrorStore] = None,
+) -> List[List[AnomalyInfo]]:
+    """Score a whole fleet with batched LSTM inference.
+
+    Vehicles are grouped by metric schema and each group is scored with
+    `infer_errors_batch`. Vehicles without usable telemetry get an empty list,
+    mirroring the per-vehicle node, as do vehicles cleared by the statistical
+    pre-filter when `config.prefilter` is enabled. With an `error_store`, every
+    scored vehicle's raw errors are recorded for later threshold what-ifs.
+
+    Returns:
+        One anomaly list per input state, in input order.
+    """
+
+    model = as_inference_backend(model, config.anomaly.backend)
+    results: List[List[AnomalyInfo]] = [[] for _ in states]
+    groups: Dict[Tuple[str, ...], List[Tuple[int, torch.Tensor]]] = {}
+    stats = get_prefilter_stats()
+    frames: List[Tuple[int, TelemetryFrame, torch.Tensor]] = []
+
+    for idx, state in enumerate(states):
+        frame = frame_from_state(state).sorted_by_time()
+        try:
+            series, _ = _extract_series(frame)
+        except ValueError:
+            continue
+        frames.append((idx, frame, series.squeeze(0)))
+
+    if config.prefilter.enabled and frames:
+        screen_started = time.perf_counter()
+        screens = screen_frames([frame for _, frame, _ in frames], config.prefilter)
+        screened = len(frames)
+        if error_store is not None:
+            for (idx, _, _), screen in zip(frames, screens):
+                if not screen.suspicious:
+                    error_store.record_unscored(states[idx]["vehicle_id"])
+        frames = [member for member, screen in zip(frames, screens) if screen.suspicious]
+        stats.record_screen(screened, len(frames), time.perf_counter() - screen_started)
+
+    for idx, frame, series in frames:
+        groups.setdefault(frame.metric_names, []).append((idx, series))
+
+    for metric_names, members in groups.items():
+        lstm_started = time.perf_counter()
+        errors, timesteps = infer_errors_batch(
+            model=model,
+            series_list=[series for _, series in members],
+            batch_size=config.anomaly.inference_batch_size,
+            per_timestep=error_store is not None and error_store.keep_timesteps,
+        )
+        stats.record_lstm(len(members), time.perf_counter() - lstm_started)
+        for row, ((idx, _), per_metric) in enumerate(zip(members, errors)):
+            if error_store is not None:
+                error_store.record(
+                    states[idx]["vehicle_id"],
+                    metric_names,
+                    per_metric,
+                    None if timesteps is None else timesteps[row].numpy(),
+                )
+            results[idx] = _to_anomaly_infos(
+                threshold_errors(per_metric, metric_names, config.anomaly.anomaly_threshold)
+            )
+
+    return results
+
+
+def compare_prefilter_recall(
+    model: LSTMAnomalyDetector,
+    states: Sequence[SystemState],
+    config: WorkflowConfig,
+) -> Dict[str, float]:
+    """Score `states` with and without the pre-filter and report what the cascade kept.
+
+    Recall is the share of vehicles with LSTM anomalies under full scoring that the
+    cascade still reports.
+    """
+
+    full_cfg = dataclasses.replace(
+        config, prefilter=dataclasses.replace(config.prefilter, enabled=False)
+    )
+    cascade_cfg = dataclasses.replace(
+        config, prefilter=dataclasses.replace(config.prefilter, enabled=True)
+    )
+    started = time.perf_counter()
+    full = score_fleet_anomalies(model, states, full_cfg)
+    full_s = time.perf_counter() - started
+    started = time.perf_counter()
+    cascade = score_fleet_anomalies(model, states, cascade_cfg)
+    cascade_s = time.perf_counter() - started
+
+    flagged = [i for i, anomalies in enumerate(full) if anomalies]
+    kept = sum(1 for i in flagged if cascade[i])
+    return {
+        "vehicles": len(states),
+        "lstmFlagged": len(flagged),
+        "cascadeFlagged": sum(1 for anomalies in cascade if anomalies),
+        "recall": round(kept / len(flagged), 4) if flagged else 1.0,
+        "fullScoringMs": round(full_s * 1000, 2),
+        "cascadeScoringMs": round(cascade_s * 1000, 2),
+    }
+
+
+def with_fleet_anomalies(
+    model: LSTMAnomalyDetector,
+    states: Sequence[SystemState],
+    config: WorkflowConfig,
+    error_store: Optional[ReconstructionErrorStore] = None,
+) -> List[SystemState]:
+    """Return copies of `states` carrying batch-scored anomalies for graph invocation.
+
+    The copies get their own `logs` list so repeated fleet runs never grow the
+    caller's initial states. States already carrying precomputed anomalies (e.g.
+    incremental scores from streamed telemetry) keep them and are not re-scored.
+    """
+
+    pending = [i for i, state in enumerate(states) if not state.get("anomalies_precomputed")]
+    scored = score_fleet_anomalies(model, [states[i] for i in pending], config, error_store)
+    anomalies_by_index = dict(zip(pending, scored))
+    prepared: List[SystemState] = []
+    for i, state in enumerate(states):
+        prepared.append(
+            {
+                **state,
+                "logs": list(state.get("logs") or []),
+                "anomalies": anomalies_by_index.get(i, state.get("anomalies") or []),
+                "anomalies_precomputed": True,
+            }
+        )
+    return prepared
 
 
 def build_anomaly_agent(
-    model: LSTMAnomalyDetector, config: WorkflowConfig
+    model: LSTMAnomalyDetector,
+    config: WorkflowConfig,
+    error_store: Optional[ReconstructionErrorStore] = None,
 ):  # type: ignore[override]
-    """Factory to build the anomaly detection node with injected model and config."""
+    """Factory to build the anomaly detection node with injected model and config.
+
+    `model` may be an eager detector or any inference backend built from one; it runs
+    on the backend selected by `config.anomaly.backend`. Raw errors are recorded in
+    `error_store` when one is given.
+    """
+
+    model = as_inference_backend(model, config.anomaly.backend)
 
     def node(state: SystemState) -> SystemState:
-        append_log(state, "Anomaly agent: running LSTM-based detection.")
+        if state.get("anomalies_precomputed"):
+            anomalies = state.get("anomalies", []) or []
+            append_log(
+                state,
+                "Anomaly agent: using fleet batch scores, %d anomalies above threshold %s.",
+                len(anomalies),
+                config.anomaly.anomaly_threshold,
+                code="anomaly.precomputed",
+            )
+            return state
+
+        append_log(state, "Anomaly agent: running LSTM-based detection.", code="anomaly.start")
 
-        raw_points = state.get("raw_metrics", []) or []
+        frame = frame_from_state(state)
 
         try:
-            series, metric_names = _extract_series(raw_points)
+            series, metric_names = _extract_series(frame)
         except ValueError as exc:
-            append_log(state, f"Anomaly agent: failed to extract series: {exc}")
+            append_log(
+                state,
+                "Anomaly agent: failed to extract series: %s",
+                exc,
+                code="anomaly.no_series",
+                level=WARNING,
+            )
             state["anomalies"] = []
             return state
 
-        anomalies_raw = infer_anomalies(
-            model=model,
-            series=series,
-            metric_names=metric_names,
-            threshold=config.anomaly.anomaly_threshold,
-        )
-
-        anomalies: List[AnomalyInfo] = []
-        for metric_name, severity, error in anomalies_raw:
-            anomalies.append(
-                {
-                    "metric_name": metric_name,
-                    "severity": severity,
-                    "error": error,
-                    "explanation": (
-                        f"{metric_name} reconstruction error {error:.4f} "
-                        f"exceeds threshold"
-                    ),
-                }
+        if config.prefilter.enabled:
+            screen = timed_screen(frame, config.prefilter)
+            if not screen.suspicious:
+                append_log(
+                    state,
+                    "Anomaly agent: statistical pre-filter cleared vehicle, LSTM skipped.",
+                    code="anomaly.prefilter_cleared",
+                )
+                if error_store is not None:
+                    error_store.record_unscored(state["vehicle_id"])
+                state["anomalies"] = []
+                return state
+            append_log(
+                state,
+                "Anomaly agent: pre-filter flagged %s.",
+                ", ".join(sorted(screen.reasons)),
+                code="anomaly.prefilter_flagged",
             )
 
+        lstm_started = time.perf_counter()
+        errors = infer_errors(model=model, series=series)
+        get_prefilter_stats().record_lstm(1, time.perf_counter() - lstm_started)
+        if error_store is not None:
+            error_store.record(state["vehicle_id"], metric_names, errors)
+        anomalies_raw = threshold_errors(errors, metric_names, config.anomaly.anomaly_threshold)
+
+        anomalies = _to_anomaly_infos(anomalies_raw)
+
         state["anomalies"] = anomalies
 
         append_log(
             state,
-            f"Anomaly agent: detected {len(anomalies)} anomalies above threshold "
-            f"{config.anomaly.anomaly_threshold}.",
+            "Anomaly agent: detected %d anomalies above threshold %s.",
+            len(anomalies),
+            config.anomaly.anomaly_threshold,
+            code="anomaly.detected",
         )
 
         return state
@@ -98,11 +98,15 @@ def diagnosis_agent(state: SystemState, cfg: WorkflowConfig | None = None) -> Sy
     """Create a diagnosis record from detected anomalies."""
 
     cfg = cfg or WorkflowConfig()
-    append_log(state, "Diagnosis agent: evaluating anomalies.")
+    append_log(state, "Diagnosis agent: evaluating anomalies.", code="diagnosis.start")
 
     anomalies: List[AnomalyInfo] = state.get("anomalies", []) or []
     if not anomalies:
-        append_log(state, "Diagnosis agent: no anomalies present; skipping diagnosis.")
+        append_log(
+            state,
+            "Diagnosis agent: no anomalies present; skipping diagnosis.",
+            code="diagnosis.skipped",
+        )
         state["diagnosis"] = None
         return state
 
@@ -132,8 +136,11 @@ def diagnosis_agent(state: SystemState, cfg: WorkflowConfig | None = None) -> Sy
 
     append_log(
         state,
-        f"Diagnosis agent: mapped metric {metric_name} to "
-        f"{mapping['part_name']} with severity {severity_level}.",
+        "Diagnosis agent: mapped metric %s to %s with severity %s.",
+        metric_name,
+        mapping["part_name"],
+        severity_level,
+        code="diagnosis.mapped",
     )
 
     return state
@@ -46,11 +46,15 @@ from app.utils.logging_utils import append_log
 def engagement_agent(state: SystemState) -> SystemState:
     """Decide whether to notify customer and craft the message."""
 
-    append_log(state, "Engagement agent: evaluating notification need.")
+    append_log(state, "Engagement agent: evaluating notification need.", code="engagement.start")
 
     diagnosis: DiagnosisInfo | None = state.get("diagnosis")
     if not diagnosis:
-        append_log(state, "Engagement agent: no diagnosis available; skipping notification.")
+        append_log(
+            state,
+            "Engagement agent: no diagnosis available; skipping notification.",
+            code="engagement.skipped",
+        )
         state["customer_notified"] = False
         state["notification_message"] = ""
         return state
@@ -70,9 +74,18 @@ def engagement_agent(state: SystemState) -> SystemState:
             f"(severity: {severity}). Recommended action: schedule service within "
             f"{max(1, int(diagnosis.get('estimated_time_to_failure_days', 30)))} days."
         )
-        append_log(state, f"Engagement agent: customer will be notified. Message='{message}'")
+        append_log(
+            state,
+            "Engagement agent: customer will be notified. Message='%s'",
+            message,
+            code="engagement.notify",
+        )
     else:
-        append_log(state, "Engagement agent: severity low; monitoring without notification.")
+        append_log(
+            state,
+            "Engagement agent: severity low; monitoring without notification.",
+            code="engagement.monitor",
+        )
 
     state["customer_notified"] = notify
     state["notification_message"] = message
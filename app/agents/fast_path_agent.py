@@ -0,0 +1,31 @@
+"""Terminal node for vehicles the anomaly stage found healthy."""
+
+from __future__ import annotations
+
+from app.agents.feedback_agent import simulated_feedback
+from app.agents.manufacturing_agent import manufacturing_payload
+from app.state import SystemState
+from app.utils.logging_utils import append_log
+
+
+def healthy_vehicle_agent(state: SystemState) -> SystemState:
+    """Fill in what the full path produces for a vehicle without anomalies.
+
+    Diagnosis, engagement, feedback and manufacturing would each run only to
+    record their "nothing to do" defaults; this node writes the same fields in
+    one step and logs a single event instead of one per stage.
+    """
+
+    state["diagnosis"] = None
+    state["customer_notified"] = False
+    state["notification_message"] = ""
+    state["feedback"] = simulated_feedback(state)
+    state["manufacturing_payload"] = manufacturing_payload(state)
+
+    append_log(
+        state,
+        "Fast path: no anomalies for %s; skipped diagnosis and engagement.",
+        state.get("vehicle_id", "vehicle"),
+        code="fast_path.healthy",
+    )
+    return state
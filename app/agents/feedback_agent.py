@@ -39,29 +39,24 @@ from __future__ import annotations
 import random
 from typing import Any
 
-from app.state import FeedbackInfo, ScheduleInfo, SystemState
+from app.state import FeedbackInfo, SystemState
 from app.utils.logging_utils import append_log
 
 
-def feedback_agent(state: SystemState) -> SystemState:
-    """Simulate feedback collection for visualization and meta-learning."""
-
-    append_log(state, "Feedback agent: collecting simulated feedback.")
-
-    schedule: ScheduleInfo | None = state.get("schedule")
+def simulated_feedback(state: SystemState) -> FeedbackInfo:
+    """Feedback for `state`; deterministic per vehicle and diagnosed part."""
 
-    # Dataset-aligned identifiers
     vehicle_id = state.get("vehicle_id", "vehicle")
-    customer_id = state.get("customer_id", "customer")
-    diagnosis = state.get("diagnosis", {})
+    diagnosis = state.get("diagnosis") or {}
 
-    # Stable randomness per vehicle (important for reproducibility)
-    random.seed(vehicle_id)
+    # Stable randomness per vehicle (important for reproducibility); a private
+    # generator keeps concurrent fleet runs from interleaving draws
+    rng = random.Random(vehicle_id)
 
     part_name = diagnosis.get("part_name", "component")
 
-    feedback: FeedbackInfo = {
-        "customer_rating": round(random.uniform(3.5, 5.0), 2),
+    return {
+        "customer_rating": round(rng.uniform(3.5, 5.0), 2),
         "customer_comments": (
             f"Service completed for {vehicle_id}. "
             f"Performance improved after {part_name} servicing."
@@ -70,16 +65,31 @@ def feedback_agent(state: SystemState) -> SystemState:
             f"Inspected and addressed {part_name}. "
             f"Post-repair diagnostics within normal range."
         ),
-        "repair_time_hours": round(random.uniform(2.0, 5.0), 1),
-        "diagnosis_correct": random.choice([True, True, False]),
+        "repair_time_hours": round(rng.uniform(2.0, 5.0), 1),
+        "diagnosis_correct": rng.choice([True, True, False]),
     }
 
+
+def feedback_agent(state: SystemState) -> SystemState:
+    """Simulate feedback collection for visualization and meta-learning."""
+
+    append_log(state, "Feedback agent: collecting simulated feedback.", code="feedback.start")
+
+    # Dataset-aligned identifiers
+    vehicle_id = state.get("vehicle_id", "vehicle")
+    customer_id = state.get("customer_id", "customer")
+
+    feedback = simulated_feedback(state)
     state["feedback"] = feedback
 
     append_log(
         state,
-        f"Feedback agent: captured rating {feedback['customer_rating']} "
-        f"for {customer_id}/{vehicle_id} with correctness={feedback['diagnosis_correct']}.",
+        "Feedback agent: captured rating %s for %s/%s with correctness=%s.",
+        feedback["customer_rating"],
+        customer_id,
+        vehicle_id,
+        feedback["diagnosis_correct"],
+        code="feedback.captured",
     )
 
     return state
@@ -28,28 +28,46 @@ from __future__ import annotations
 from typing import List
 
 from app.state import SystemState, VehicleMetricPoint
+from app.telemetry import MetricPointsView, TelemetryFrame
 from app.utils.logging_utils import append_log
 
 
+def order_points(raw_points: List[VehicleMetricPoint]) -> List[VehicleMetricPoint]:
+    """Return telemetry in time order, as every downstream node expects it."""
+
+    # Dataset-aligned safeguard:
+    # CSV-derived telemetry may not contain explicit timestamps
+    if raw_points and "timestamp" in raw_points[0]:
+        return sorted(raw_points, key=lambda p: p.get("timestamp", 0))
+    return raw_points  # preserve column-order time sequence
+
+
 def ingest_agent(state: SystemState) -> SystemState:
     """Ensure telemetry is sorted and ready for downstream processing."""
 
-    append_log(state, "Ingest agent: starting preprocessing of telemetry.")
+    append_log(state, "Ingest agent: starting preprocessing of telemetry.", code="ingest.start")
 
     raw_points: List[VehicleMetricPoint] = state.get("raw_metrics", []) or []
+    frame = state.get("telemetry")
 
-    # Dataset-aligned safeguard:
-    # CSV-derived telemetry may not contain explicit timestamps
-    if raw_points and "timestamp" in raw_points[0]:
-        sorted_points = sorted(raw_points, key=lambda p: p.get("timestamp", 0))
+    if frame is None and not isinstance(raw_points, MetricPointsView):
+        # Dict-only telemetry: sort once and build the shared columnar frame
+        sorted_points = order_points(raw_points)
+        frame = TelemetryFrame.from_points(sorted_points)
+        state["raw_metrics"] = sorted_points
     else:
-        sorted_points = raw_points  # preserve column-order time sequence
+        if frame is None:
+            frame = raw_points.frame
+        frame = frame.sorted_by_time()
+        state["raw_metrics"] = MetricPointsView(frame)
 
-    state["raw_metrics"] = sorted_points
+    state["telemetry"] = frame
 
     append_log(
         state,
-        f"Ingest agent: normalized telemetry ordering, points={len(sorted_points)}.",
+        "Ingest agent: normalized telemetry ordering, points=%d.",
+        len(frame),
+        code="ingest.done",
     )
 
     return state
@@ -47,22 +47,17 @@ from datetime import datetime, timezone
 
 from app.config import WorkflowConfig
 from app.state import ManufacturingPayload, SystemState
-from app.utils.logging_utils import append_log
+from app.utils.logging_utils import DEBUG, append_log
 
 
-def manufacturing_insights_agent(
-    state: SystemState, cfg: WorkflowConfig | None = None
-) -> SystemState:
-    """Build payload for downstream OEM/Neo4j/PostgreSQL sinks."""
-
-    cfg = cfg or WorkflowConfig()
-    append_log(state, "Manufacturing agent: assembling payload.")
+def manufacturing_payload(state: SystemState) -> ManufacturingPayload:
+    """OEM payload for `state`, with defaults for stages that did not run."""
 
     diagnosis = state.get("diagnosis") or {}
     feedback = state.get("feedback") or {}
     schedule = state.get("schedule") or {}
 
-    payload: ManufacturingPayload = {
+    return {
         # Dataset-aligned identifiers
         "vehicle_id": state.get("vehicle_id", "unknown"),
         "model": state.get("model", "unknown"),
@@ -83,11 +78,29 @@ def manufacturing_insights_agent(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
+
+def manufacturing_insights_agent(
+    state: SystemState, cfg: WorkflowConfig | None = None
+) -> SystemState:
+    """Build payload for downstream OEM/Neo4j/PostgreSQL sinks."""
+
+    cfg = cfg or WorkflowConfig()
+    append_log(state, "Manufacturing agent: assembling payload.", code="manufacturing.start")
+
+    payload = manufacturing_payload(state)
     state["manufacturing_payload"] = payload
 
     append_log(
         state,
-        f"Manufacturing agent: payload ready for OEM analytics: {payload}.",
+        "Manufacturing agent: payload ready for OEM analytics.",
+        code="manufacturing.ready",
+    )
+    append_log(
+        state,
+        "Manufacturing agent: payload %r.",
+        payload,
+        code="manufacturing.payload",
+        level=DEBUG,
     )
 
     return state
@@ -60,18 +60,12 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import List
+import math
+from typing import Optional
 
-from app.state import DiagnosisInfo, ScheduleInfo, SystemState
-from app.utils.logging_utils import append_log
-
-
-WORKSHOPS = [
-    {"workshop_id": "W001", "name": "City Central Auto", "location": "central", "capacity": 5},
-    {"workshop_id": "W002", "name": "Northside Motors", "location": "north", "capacity": 3},
-    {"workshop_id": "W003", "name": "Express Auto South", "location": "south", "capacity": 4},
-]
+from app.scheduling import SchedulingEngine, ServiceRequest, get_scheduling_engine
+from app.state import DiagnosisInfo, SystemState
+from app.utils.logging_utils import WARNING, append_log
 
 
 def _priority(severity: str) -> str:
@@ -82,43 +76,72 @@ def _priority(severity: str) -> str:
     return "low"
 
 
-def scheduling_agent(state: SystemState) -> SystemState:
-    """Allocate a workshop slot using a simple FCFS + priority heuristic."""
-
-    append_log(state, "Scheduling agent: determining workshop slot.")
+def scheduling_agent(state: SystemState, engine: Optional[SchedulingEngine] = None) -> SystemState:
+    """Book a workshop bay: the nearest one free in time, or the earliest anywhere.
 
-    diagnosis: DiagnosisInfo | None = state.get("diagnosis")
-    if not diagnosis:
-        append_log(state, "Scheduling agent: no diagnosis available; skipping scheduling.")
-        state["schedule"] = None
-        return state
+    Vehicles that no longer need service (no diagnosis, or low severity) give
+    back any bay booked for them on an earlier run.
+    """
 
-    severity = diagnosis.get("severity_level", "low")
-    priority_tag = _priority(severity)
+    append_log(state, "Scheduling agent: determining workshop slot.", code="scheduling.start")
 
     # Dataset-aligned identifiers (for traceability only)
     customer_id = state.get("customer_id", "C-NA")
     vehicle_id = state.get("vehicle_id", "V-NA")
 
-    # FCFS mock allocation (dataset has no live capacity feed)
-    chosen = WORKSHOPS[0]
-    slot_time = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    if engine is None:
+        engine = get_scheduling_engine()
 
-    schedule: ScheduleInfo = {
-        "workshop_id": chosen["workshop_id"],
-        "workshop_name": chosen["name"],
-        "slot_time": slot_time,
-        "mechanic_id": "M-1001",
-        "priority_tag": priority_tag,
-    }
+    diagnosis: DiagnosisInfo | None = state.get("diagnosis")
+    severity = diagnosis.get("severity_level", "low") if diagnosis else None
+    if severity not in {"medium", "high"}:
+        append_log(
+            state,
+            "Scheduling agent: %s; skipping scheduling.",
+            "no diagnosis available" if not diagnosis else f"severity {severity}",
+            code="scheduling.skipped",
+        )
+        released = engine.cancel(vehicle_id)
+        if released is not None:
+            append_log(
+                state,
+                "Scheduling agent: released %s slot at %s for %s.",
+                released.workshop_name,
+                released.slot_time,
+                vehicle_id,
+                code="scheduling.released",
+            )
+        state["schedule"] = None
+        return state
 
-    state["schedule"] = schedule
+    priority_tag = _priority(severity)
+    booking = engine.book(
+        ServiceRequest(
+            vehicle_id=vehicle_id,
+            priority_tag=priority_tag,
+            time_to_failure_days=diagnosis.get("estimated_time_to_failure_days", math.inf),
+            location=state.get("location"),
+        )
+    )
+    state["schedule"] = booking.to_schedule_info()
 
     append_log(
         state,
-        f"Scheduling agent: assigned workshop {chosen['name']} "
-        f"to {customer_id}/{vehicle_id} at {slot_time} "
-        f"with priority {priority_tag}.",
+        "Scheduling agent: assigned workshop %s to %s/%s at %s with priority %s.",
+        booking.workshop_name,
+        customer_id,
+        vehicle_id,
+        booking.slot_time,
+        priority_tag,
+        code="scheduling.assigned",
     )
+    if not booking.meets_deadline:
+        append_log(
+            state,
+            "Scheduling agent: earliest slot for %s is after its estimated failure time.",
+            vehicle_id,
+            code="scheduling.deadline_missed",
+            level=WARNING,
+        )
 
     return state
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Dict, Tuple
 
 
 @dataclass
@@ -15,6 +16,102 @@ class LSTMAnomalyConfig:
     learning_rate: float = 1e-3
     epochs: int = 10
     anomaly_threshold: float = 0.05
+    inference_batch_size: int = 128
+    backend: str = "eager"  # "eager", "torchscript", "quantized" or "onnx"
+    window_size: int = 336  # timesteps scored per vehicle; 7 days at 30-minute intervals
+
+
+@dataclass
+class TrainingConfig:
+    """Windowing, data loading and early stopping for `app.models.training`."""
+
+    window_size: int = 0  # 0 -> LSTMAnomalyConfig.window_size
+    stride: int = 24  # steps between consecutive window starts
+    batch_size: int = 64
+    num_workers: int = 2  # DataLoader worker processes
+    windows_per_epoch: int = 0  # 0 -> every training window each epoch
+    val_fraction: float = 0.1  # share of vehicles held out for validation
+    patience: int = 3  # epochs without improvement before stopping
+    min_delta: float = 0.0
+    grad_clip: float = 1.0  # 0 disables clipping
+    checkpoint_dir: str = "checkpoints"
+    seed: int = 0
+
+
+def _default_metric_ranges() -> Dict[str, Tuple[float, float]]:
+    return {
+        "Battery_SoC": (15.0, 100.0),
+        "Engine_Temperature": (-40.0, 110.0),
+        "Fuel_Status": (0.0, 100.0),
+        "Speed": (0.0, 180.0),
+    }
+
+
+@dataclass
+class PrefilterConfig:
+    """Cheap statistical screen that decides which vehicles reach the LSTM.
+
+    Disabled by default. On the shipped dataset with the server's fallback
+    (untrained) model, `compare_prefilter_recall` measures recall 0.29 with these
+    defaults: the LSTM flags all 100 vehicles and the screen passes 29, so about
+    70% of LSTM-flagged vehicles would be skipped. Enable it (``PREFILTER=1``) only
+    after measuring recall against the registered model.
+    """
+
+    enabled: bool = False
+    window: int = 48  # trailing points for the rolling z-score
+    z_threshold: float = 4.0
+    ewma_alpha: float = 0.1
+    ewma_threshold: float = 4.0  # deviations from the EWMA, in EWMA standard deviations
+    min_std: float = 1e-3  # floor on spread so flat metrics do not flag on noise
+    # categorical metrics (0/1 codes) skip the z-score and EWMA checks
+    categorical_metrics: Tuple[str, ...] = ("DTC_Code",)
+    # plausible (low, high) per metric; values outside flag the vehicle
+    metric_ranges: Dict[str, Tuple[float, float]] = field(default_factory=_default_metric_ranges)
+
+
+@dataclass
+class FleetExecutionConfig:
+    """How fleet-wide runs are executed; these knobs never change a vehicle's result."""
+
+    executor: str = "thread"  # "serial", "thread" or "process"
+    max_concurrency: int = 0  # 0 -> os.cpu_count()
+    runtime: str = "graph"  # "graph" (LangGraph) or "pipeline" (app.pipeline, no graph overhead)
+
+
+@dataclass
+class StreamingConfig:
+    """Micro-batching of streamed telemetry; affects latency, not results."""
+
+    max_batch: int = 256  # vehicles scored per micro-batch
+    max_delay_s: float = 0.5  # upper bound from ingest to scoring start
+
+
+@dataclass
+class LoggingConfig:
+    """Workflow log events (see `app.utils.logging_utils`)."""
+
+    level: str = "INFO"  # "DEBUG", "INFO" or "WARNING"
+    max_events: int = 64  # per run; later events are counted in `logs_dropped`
+    sink: str = "state"  # "state", "buffer" (bounded side buffer) or "off"
+    buffer_size: int = 10_000
+
+
+@dataclass
+class SchedulingConfig:
+    """Workshop slot calendars (see `app.scheduling`)."""
+
+    slot_minutes: int = 60
+    lead_hours: float = 24.0  # earliest booking offset from the request time
+    workshops_path: str = ""  # workshops.csv; empty -> built-in workshops
+    # fleet runs re-assign all scheduled vehicles together (app.scheduling.optimizer)
+    batch_optimize: bool = False
+    inventory_weight_hours: float = 24.0  # cost of a workshop with inventory_score 0
+    deadline_penalty_hours: float = 720.0  # cost of a slot after the time to failure
+    # vehicles with a `location` book the nearest workshop free within these limits
+    max_distance_km: float = 0.0  # 0 -> unlimited
+    max_wait_hours: float = 72.0  # after the lead time, when there is no failure estimate
+    distance_weight_hours_per_km: float = 0.1  # batch cost of travel
 
 
 @dataclass
@@ -22,8 +119,16 @@ class WorkflowConfig:
     """Workflow-wide configuration knobs."""
 
     anomaly: LSTMAnomalyConfig = field(default_factory=LSTMAnomalyConfig)
+    fleet: FleetExecutionConfig = field(default_factory=FleetExecutionConfig)
+    streaming: StreamingConfig = field(default_factory=StreamingConfig)
+    prefilter: PrefilterConfig = field(default_factory=PrefilterConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    scheduling: SchedulingConfig = field(default_factory=SchedulingConfig)
     medium_severity_threshold: float = 0.4
     high_severity_threshold: float = 0.7
     default_user_segment: str = "retail"
+    # Vehicles without anomalies go straight from the anomaly node to a single
+    # terminal node; False runs them through every stage as before.
+    fast_path: bool = True
 
 
@@ -0,0 +1,231 @@
+"""Fleet-wide execution engine running the workflow for many vehicles at once."""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import torch
+
+from app.agents import with_fleet_anomalies
+from app.config import WorkflowConfig
+from app.graph import build_graph
+from app.models.backends import unwrap_model
+from app.models.lstm_anomaly import LSTMAnomalyDetector
+from app.models.registry import ModelRegistry, ModelVersion
+from app.pipeline import build_pipeline
+from app.scheduling import SchedulingEngine, configure_scheduling, get_scheduling_engine
+from app.scheduling.optimizer import dispatch_schedules, rebalance_schedules
+from app.state import SystemState
+from app.utils.error_store import ReconstructionErrorStore
+
+
+FLEET_EXECUTORS = ("serial", "thread", "process")
+FLEET_RUNTIMES = ("graph", "pipeline")
+
+
+def build_fleet_workflow(
+    model: LSTMAnomalyDetector,
+    cfg: WorkflowConfig,
+    error_store: Optional[ReconstructionErrorStore] = None,
+    scheduler: Optional[SchedulingEngine] = None,
+):
+    """The compiled graph, or the equivalent pipeline for `cfg.fleet.runtime == "pipeline"`."""
+
+    if cfg.fleet.runtime not in FLEET_RUNTIMES:
+        raise ValueError(
+            f"Unknown fleet runtime {cfg.fleet.runtime!r}; expected one of {FLEET_RUNTIMES}"
+        )
+    build = build_pipeline if cfg.fleet.runtime == "pipeline" else build_graph
+    return build(model, cfg, error_store=error_store, scheduler=scheduler)
+
+
+@dataclass
+class FleetResult:
+    """Outcome of one vehicle's workflow run."""
+
+    vehicle_id: str
+    state: Optional[SystemState]
+    error: Optional[str]
+    elapsed_s: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _timed_invoke(workflow, vehicle_id: str, state: SystemState) -> FleetResult:
+    started = time.perf_counter()
+    try:
+        final_state = workflow.invoke(state)
+    except Exception as exc:  # noqa: BLE001 - isolate per-vehicle failures
+        error = f"{type(exc).__name__}: {exc}"
+        return FleetResult(vehicle_id, None, error, time.perf_counter() - started)
+    return FleetResult(vehicle_id, final_state, None, time.perf_counter() - started)
+
+
+# Per-process workflow for the process pool, rebuilt once from pickled weights.
+_worker_workflow = None
+
+
+def _init_process_worker(
+    cfg: WorkflowConfig,
+    model_spec: Optional[Tuple[int, int, int]] = None,
+    weights: Optional[Dict[str, torch.Tensor]] = None,
+    registry_entry: Optional[ModelVersion] = None,
+) -> None:
+    global _worker_workflow
+    torch.set_num_threads(1)  # one pool worker per core; avoid oversubscription
+    if registry_entry is not None:
+        # memory-mapped load: every worker shares the registry file's pages
+        registry = ModelRegistry(os.path.dirname(os.path.dirname(registry_entry.path)))
+        model, _ = registry.load(registry_entry.name, registry_entry.version)
+    else:
+        input_dim, hidden_dim, num_layers = model_spec
+        model = LSTMAnomalyDetector(input_dim, hidden_dim, num_layers)
+        model.load_state_dict(weights)
+    _worker_workflow = build_fleet_workflow(model, cfg)
+
+
+def _process_invoke(vehicle_id: str, state: SystemState) -> FleetResult:
+    result = _timed_invoke(_worker_workflow, vehicle_id, state)
+    # The worker's engine is private; the parent books the shared one from the
+    # returned states, so nothing is kept here.
+    get_scheduling_engine().cancel(vehicle_id)
+    return result
+
+
+class FleetRunner:
+    """Run the workflow for a fleet with bounded concurrency.
+
+    Anomalies are scored up front with batched LSTM inference, then the remaining
+    graph nodes run per vehicle on a thread or process pool capped at
+    `max_concurrency`. A failing vehicle yields a `FleetResult` carrying the error
+    instead of aborting the run, and results always come back in input order.
+    Batch-scored reconstruction errors go to `error_store` when one is given.
+    The vehicles the graph scheduled are then booked together on the runner's
+    engine, most urgent first (`dispatch_schedules`), or re-assigned by cost with
+    `SchedulingConfig.batch_optimize`. Process-pool workers only decide which
+    vehicles need a slot; every bay is allocated in this process.
+    Without an explicit `workflow`, `FleetExecutionConfig.runtime` picks the
+    LangGraph workflow or the equivalent, lighter `app.pipeline` executor.
+    """
+
+    def __init__(
+        self,
+        model: LSTMAnomalyDetector,
+        cfg: WorkflowConfig | None = None,
+        workflow: Any = None,
+        executor: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        model_version: Optional[ModelVersion] = None,
+        error_store: Optional[ReconstructionErrorStore] = None,
+        scheduler: Optional[SchedulingEngine] = None,
+    ) -> None:
+        self.model = model
+        self.model_version = model_version
+        self.error_store = error_store
+        self.cfg = cfg or WorkflowConfig()
+        if scheduler is None:
+            scheduler = configure_scheduling(self.cfg.scheduling)
+        self.scheduler = scheduler
+        self.workflow = (
+            workflow
+            if workflow is not None
+            else build_fleet_workflow(model, self.cfg, scheduler=self.scheduler)
+        )
+        self.executor = executor or self.cfg.fleet.executor
+        if self.executor not in FLEET_EXECUTORS:
+            raise ValueError(
+                f"Unknown fleet executor {self.executor!r}; expected one of {FLEET_EXECUTORS}"
+            )
+        self.max_concurrency = (
+            max_concurrency or self.cfg.fleet.max_concurrency or os.cpu_count() or 1
+        )
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.executor == "process":
+                # Registered models are mapped from disk by each worker; others ship
+                # eager weights. Either way each worker rebuilds the configured backend.
+                if self.model_version is not None:
+                    initargs = (self.cfg, None, None, self.model_version)
+                else:
+                    source = unwrap_model(self.model)
+                    model_spec = (
+                        source.encoder.input_size,
+                        source.encoder.hidden_size,
+                        source.encoder.num_layers,
+                    )
+                    weights = {k: v.detach().cpu() for k, v in source.state_dict().items()}
+                    initargs = (self.cfg, model_spec, weights, None)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    initializer=_init_process_worker,
+                    initargs=initargs,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix="fleet"
+                )
+        return self._pool
+
+    def run(self, vehicles: Mapping[str, SystemState]) -> List[FleetResult]:
+        """Run every vehicle and return one `FleetResult` per vehicle, in input order."""
+
+        vehicle_ids = list(vehicles)
+        if not vehicle_ids:
+            return []
+        # slots that have started are served; drop them before booking new ones
+        self.scheduler.expire(datetime.utcnow())
+        prepared = with_fleet_anomalies(
+            self.model, [vehicles[v] for v in vehicle_ids], self.cfg, self.error_store
+        )
+
+        if self.executor == "serial" or len(vehicle_ids) == 1:
+            results = [
+                _timed_invoke(self.workflow, vehicle_id, state)
+                for vehicle_id, state in zip(vehicle_ids, prepared)
+            ]
+            return self._scheduled(results)
+
+        pool = self._get_pool()
+        if self.executor == "process":
+            futures = [
+                pool.submit(_process_invoke, vehicle_id, state)
+                for vehicle_id, state in zip(vehicle_ids, prepared)
+            ]
+        else:
+            futures = [
+                pool.submit(_timed_invoke, self.workflow, vehicle_id, state)
+                for vehicle_id, state in zip(vehicle_ids, prepared)
+            ]
+        return self._scheduled([future.result() for future in futures])
+
+    def _scheduled(self, results: List[FleetResult]) -> List[FleetResult]:
+        ok = [i for i, result in enumerate(results) if result.state is not None]
+        states = [results[i].state for i in ok]
+        for state in states:
+            if not state.get("schedule"):
+                # recovered vehicles free their bay (process workers cannot see it)
+                self.scheduler.cancel(state.get("vehicle_id", "V-NA"))
+        if self.cfg.scheduling.batch_optimize:
+            states = rebalance_schedules(states, self.scheduler, self.cfg.scheduling)
+        else:
+            states = dispatch_schedules(states, self.scheduler)
+        for i, state in zip(ok, states):
+            results[i] = dataclasses.replace(results[i], state=state)
+        return results
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Callable
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Optional, Tuple
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 
 from app.agents import (
@@ -11,14 +14,24 @@ from app.agents import (
     diagnosis_agent,
     engagement_agent,
     feedback_agent,
+    healthy_vehicle_agent,
     ingest_agent,
     manufacturing_insights_agent,
     scheduling_agent,
 )
 from app.config import WorkflowConfig
 from app.models.lstm_anomaly import LSTMAnomalyDetector
+from app.scheduling import SchedulingEngine, configure_scheduling
 from app.state import SystemState
-from app.utils.logging_utils import append_log
+from app.utils.error_store import ReconstructionErrorStore
+from app.utils.logging_utils import configure_logging
+from app.utils.metrics import timed_node
+
+
+def _anomaly_branch(state: SystemState) -> str:
+    """Branching logic after anomaly detection: healthy vehicles take the fast path."""
+
+    return "diagnose" if state.get("anomalies") else "healthy"
 
 
 def _engagement_branch(state: SystemState) -> str:
@@ -33,32 +46,121 @@ def _engagement_branch(state: SystemState) -> str:
     return "feedback"
 
 
-def build_graph(model: LSTMAnomalyDetector, cfg: WorkflowConfig | None = None):
-    """Construct and compile the LangGraph StateGraph."""
+def _booking_routes(
+    scheduler: SchedulingEngine,
+) -> Tuple[Callable[[SystemState], str], Callable[[SystemState], str]]:
+    """Anomaly and engagement branches that send booked vehicles to scheduling.
+
+    A vehicle holding a bay from an earlier run always reaches the scheduling
+    node, which keeps, moves or releases it, so a vehicle that recovered gives
+    its bay back.
+    """
+
+    def booked(state: SystemState) -> bool:
+        return scheduler.get(state.get("vehicle_id", "V-NA")) is not None
+
+    def after_anomaly(state: SystemState) -> str:
+        return "diagnose" if booked(state) else _anomaly_branch(state)
+
+    def after_engagement(state: SystemState) -> str:
+        return "schedule" if booked(state) else _engagement_branch(state)
+
+    return after_anomaly, after_engagement
+
+
+def _offloaded(node: Callable[[SystemState], SystemState], executor: Executor, name: str):
+    """Wrap a CPU-heavy node so `ainvoke` runs it on a dedicated executor."""
+
+    async def anode(state: SystemState) -> SystemState:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, node, state)
+
+    return RunnableLambda(node, afunc=anode, name=name)
+
+
+def build_graph(
+    model: LSTMAnomalyDetector,
+    cfg: WorkflowConfig | None = None,
+    inference_executor: Executor | None = None,
+    error_store: Optional[ReconstructionErrorStore] = None,
+    scheduler: Optional[SchedulingEngine] = None,
+):
+    """Construct and compile the LangGraph StateGraph.
+
+    Args:
+        model: Anomaly model injected into the anomaly node.
+        cfg: Workflow configuration.
+        inference_executor: Optional executor for torch inference under `ainvoke`, so
+            model work never competes with the default executor used by light nodes.
+        error_store: Optional store receiving each scored vehicle's raw errors.
+        scheduler: Workshop slot allocation; defaults to the process-wide engine
+            for `cfg.scheduling`, shared by every graph built with that config.
+
+    With `cfg.fast_path`, vehicles without anomalies skip from the anomaly node to
+    `healthy_vehicle_agent`, which writes the same diagnosis, engagement, feedback
+    and manufacturing defaults the full path would. Vehicles still holding a bay
+    from an earlier run go through scheduling either way, to keep or release it.
+
+    Every node is wrapped with `timed_node`, so its latency, call count and errors
+    show up in the process-wide metrics registry.
+    """
 
     cfg = cfg or WorkflowConfig()
+    configure_logging(cfg.logging)
+    if scheduler is None:
+        scheduler = configure_scheduling(cfg.scheduling)
 
     graph = StateGraph(SystemState)
 
-    graph.add_node("ingest_data", ingest_agent)
-    graph.add_node("anomaly_agent", build_anomaly_agent(model, cfg))
-    graph.add_node("diagnosis_agent", lambda state: diagnosis_agent(state, cfg))
-    graph.add_node("engagement_agent", engagement_agent)
-    graph.add_node("scheduling_agent", scheduling_agent)
-    graph.add_node("feedback_agent", feedback_agent)
+    anomaly_node = timed_node("anomaly_agent", build_anomaly_agent(model, cfg, error_store))
+    if inference_executor is not None:
+        anomaly_node = _offloaded(anomaly_node, inference_executor, "anomaly_agent")
+
+    graph.add_node("ingest_data", timed_node("ingest_data", ingest_agent))
+    graph.add_node("anomaly_agent", anomaly_node)
+    graph.add_node(
+        "diagnosis_agent",
+        timed_node("diagnosis_agent", lambda state: diagnosis_agent(state, cfg)),
+    )
+    graph.add_node("engagement_agent", timed_node("engagement_agent", engagement_agent))
+    graph.add_node(
+        "scheduling_agent",
+        timed_node("scheduling_agent", lambda state: scheduling_agent(state, scheduler)),
+    )
+    graph.add_node("feedback_agent", timed_node("feedback_agent", feedback_agent))
     graph.add_node(
         "manufacturing_insights_agent",
-        lambda state: manufacturing_insights_agent(state, cfg),
+        timed_node(
+            "manufacturing_insights_agent",
+            lambda state: manufacturing_insights_agent(state, cfg),
+        ),
     )
 
+    after_anomaly, after_engagement = _booking_routes(scheduler)
+
     graph.set_entry_point("ingest_data")
     graph.add_edge("ingest_data", "anomaly_agent")
-    graph.add_edge("anomaly_agent", "diagnosis_agent")
+    if cfg.fast_path:
+        graph.add_node(
+            "healthy_vehicle_agent",
+            timed_node("healthy_vehicle_agent", healthy_vehicle_agent),
+        )
+        graph.add_conditional_edges(
+            "anomaly_agent",
+            after_anomaly,
+            {
+                "diagnose": "diagnosis_agent",
+                "healthy": "healthy_vehicle_agent",
+            },
+        )
+        graph.add_edge("healthy_vehicle_agent", END)
+    else:
+        graph.add_edge("anomaly_agent", "diagnosis_agent")
     graph.add_edge("diagnosis_agent", "engagement_agent")
 
     graph.add_conditional_edges(
         "engagement_agent",
-        _engagement_branch,
+        after_engagement,
         {
             "schedule": "scheduling_agent",
             "feedback": "feedback_agent",
@@ -1,8 +1,12 @@
 """Model package for predictive components."""
 
+from app.models.backends import INFERENCE_BACKENDS, as_inference_backend
+from app.models.incremental import IncrementalLSTMScorer
+from app.models.registry import ModelRegistry, ModelVersion, load_or_init_model
 from app.models.lstm_anomaly import (
     LSTMAnomalyDetector,
     infer_anomalies,
+    infer_anomalies_batch,
     train_lstm_anomaly_model,
 )
 
@@ -10,6 +14,13 @@ __all__ = [
     "LSTMAnomalyDetector",
     "train_lstm_anomaly_model",
     "infer_anomalies",
+    "infer_anomalies_batch",
+    "IncrementalLSTMScorer",
+    "INFERENCE_BACKENDS",
+    "as_inference_backend",
+    "ModelRegistry",
+    "ModelVersion",
+    "load_or_init_model",
 ]
 
 
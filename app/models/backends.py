@@ -0,0 +1,315 @@
+"""CPU inference backends for the LSTM anomaly model.
+
+Every backend is a drop-in replacement for `LSTMAnomalyDetector` at inference
+time: an `nn.Module` whose `forward(x, lengths=None)` returns the reconstruction,
+so `infer_anomalies`, `infer_anomalies_batch` and the anomaly node accept any of
+them unchanged. Select one with `LSTMAnomalyConfig.backend`.
+
+Run ``python -m app.models.backends`` for an equivalence and latency report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import torch
+from torch import nn
+
+from app.models.lstm_anomaly import LSTMAnomalyDetector, compute_sequence_errors
+
+
+INFERENCE_BACKENDS = ("eager", "torchscript", "quantized", "onnx")
+
+# Relative reconstruction tolerance against eager; int8 weights trade accuracy for speed.
+BACKEND_TOLERANCES: Dict[str, float] = {
+    "eager": 0.0,
+    "torchscript": 1e-4,
+    "quantized": 5e-2,
+    "onnx": 1e-4,
+}
+
+
+class InferenceBackend(nn.Module):
+    """Base class for optimized variants of an eager `LSTMAnomalyDetector`."""
+
+    name = "eager"
+
+    def __init__(self, source: LSTMAnomalyDetector) -> None:
+        super().__init__()
+        self.source = source
+
+    def forward(
+        self, x: torch.Tensor, lengths: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        raise NotImplementedError
+
+
+class _FixedLengthBackend(InferenceBackend):
+    """Backend whose compiled graph has no packed-sequence path.
+
+    Right-padded batches are split into runs of equal length, each scored unpadded;
+    padded steps of the output are zero and masked out by the error computation.
+    Batches from `infer_anomalies_batch` are length-sorted, so this rarely splits.
+    """
+
+    def _run(self, x: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def forward(
+        self, x: torch.Tensor, lengths: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        if lengths is None or bool((lengths == x.shape[1]).all()):
+            return self._run(x)
+        out = x.new_zeros(x.shape)
+        for length in torch.unique(lengths).tolist():
+            rows = torch.nonzero(lengths == length).squeeze(1).to(x.device)
+            out[rows, :length] = self._run(x[rows, :length].contiguous())
+        return out
+
+
+class TorchScriptBackend(_FixedLengthBackend):
+    """Traced and frozen TorchScript graph of the fixed-length forward pass."""
+
+    name = "torchscript"
+
+    def __init__(self, source: LSTMAnomalyDetector) -> None:
+        super().__init__(source)
+        source.eval()
+        example = torch.zeros(2, 8, source.encoder.input_size)
+        with torch.no_grad():
+            traced = torch.jit.trace(source, example, check_trace=False)
+        self.graph = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+    def _run(self, x: torch.Tensor) -> torch.Tensor:
+        return self.graph(x)
+
+
+class QuantizedBackend(InferenceBackend):
+    """Dynamic int8 quantization of the LSTM and Linear weights (`torch.ao`)."""
+
+    name = "quantized"
+
+    def __init__(self, source: LSTMAnomalyDetector) -> None:
+        super().__init__(source)
+        # Quantize a fresh copy so the eager source keeps its fp32 weights.
+        copy = LSTMAnomalyDetector(
+            source.encoder.input_size,
+            source.encoder.hidden_size,
+            source.encoder.num_layers,
+        )
+        copy.load_state_dict(source.state_dict())
+        self.quantized = torch.ao.quantization.quantize_dynamic(
+            copy.eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8
+        )
+
+    def forward(
+        self, x: torch.Tensor, lengths: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        return self.quantized(x, lengths)
+
+
+class OnnxBackend(_FixedLengthBackend):
+    """ONNX Runtime session on the CPU execution provider (optional dependency)."""
+
+    name = "onnx"
+
+    def __init__(self, source: LSTMAnomalyDetector) -> None:
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise ImportError(
+                "The onnx backend requires the optional 'onnx' and 'onnxruntime' packages"
+            ) from exc
+
+        super().__init__(source)
+        source.eval()
+        buffer = io.BytesIO()
+        example = torch.zeros(2, 8, source.encoder.input_size)
+        torch.onnx.export(
+            source,
+            (example,),
+            buffer,
+            input_names=["x"],
+            output_names=["recon"],
+            dynamic_axes={"x": {0: "batch", 1: "seq"}, "recon": {0: "batch", 1: "seq"}},
+            dynamo=False,
+        )
+        self.session = onnxruntime.InferenceSession(
+            buffer.getvalue(), providers=["CPUExecutionProvider"]
+        )
+
+    def _run(self, x: torch.Tensor) -> torch.Tensor:
+        (recon,) = self.session.run(None, {"x": x.detach().cpu().numpy()})
+        return torch.from_numpy(recon).to(x.device)
+
+
+_BACKEND_CLASSES = {
+    "torchscript": TorchScriptBackend,
+    "quantized": QuantizedBackend,
+    "onnx": OnnxBackend,
+}
+_build_lock = threading.Lock()
+
+
+def unwrap_model(model: nn.Module) -> nn.Module:
+    """The eager model behind a backend (or the model itself)."""
+
+    return model.source if isinstance(model, InferenceBackend) else model
+
+
+def as_inference_backend(model: nn.Module, backend: str = "eager") -> nn.Module:
+    """Return `model` running on `backend`, building and caching it on first use.
+
+    Accepts an eager model or any backend built from one. Backends are compiled
+    from the weights at first use and cached on the eager model, so callers can
+    call this per request; load new weights into a new model to refresh them.
+    """
+
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend {backend!r}; expected one of {INFERENCE_BACKENDS}"
+        )
+    source = unwrap_model(model)
+    if backend == "eager":
+        return source
+    if getattr(model, "name", None) == backend:
+        return model
+
+    with _build_lock:
+        built = source.__dict__.setdefault("_inference_backends", {})
+        if backend not in built:
+            built[backend] = _BACKEND_CLASSES[backend](source)
+        return built[backend]
+
+
+@dataclass
+class BackendReport:
+    """Equivalence and speed of one backend relative to eager."""
+
+    backend: str
+    available: bool
+    max_abs_diff: float = float("nan")
+    max_rel_diff: float = float("nan")
+    equivalent: bool = False
+    latency_ms: float = float("nan")  # median time per forward pass
+    throughput: float = float("nan")  # sequences per second
+    note: str = ""
+
+
+def check_equivalence(
+    model: LSTMAnomalyDetector,
+    backend: nn.Module,
+    sample: torch.Tensor,
+    lengths: Optional[torch.Tensor] = None,
+    rtol: Optional[float] = None,
+) -> BackendReport:
+    """Compare a backend's per-sequence reconstruction errors with eager's.
+
+    Errors are what anomaly thresholds see, so the comparison is made on them,
+    relative to the largest eager error.
+    """
+
+    name = getattr(backend, "name", "eager")
+    rtol = BACKEND_TOLERANCES.get(name, 1e-4) if rtol is None else rtol
+    if lengths is None:
+        lengths = torch.full((sample.shape[0],), sample.shape[1], dtype=torch.long)
+    model.eval()
+    with torch.no_grad():
+        expected = compute_sequence_errors(model(sample, lengths), sample, lengths)
+        actual = compute_sequence_errors(backend(sample, lengths), sample, lengths)
+    abs_diff = float((expected - actual).abs().max())
+    scale = float(expected.abs().max()) or 1.0
+    rel_diff = abs_diff / scale
+    return BackendReport(
+        backend=name,
+        available=True,
+        max_abs_diff=abs_diff,
+        max_rel_diff=rel_diff,
+        equivalent=rel_diff <= rtol,
+    )
+
+
+def benchmark_backends(
+    model: LSTMAnomalyDetector,
+    sample: torch.Tensor,
+    lengths: Optional[torch.Tensor] = None,
+    backends: Sequence[str] = INFERENCE_BACKENDS,
+    repeats: int = 20,
+    warmup: int = 3,
+) -> List[BackendReport]:
+    """Check every backend against eager and time it on `sample`.
+
+    Backends that cannot be built here (e.g. ONNX without onnxruntime) are
+    reported as unavailable instead of failing the run.
+    """
+
+    reports: List[BackendReport] = []
+    for name in backends:
+        try:
+            backend = as_inference_backend(model, name)
+        except Exception as exc:  # noqa: BLE001 - report, don't abort
+            reports.append(BackendReport(backend=name, available=False, note=str(exc)))
+            continue
+
+        report = check_equivalence(model, backend, sample, lengths)
+        timings: List[float] = []
+        with torch.no_grad():
+            for i in range(warmup + repeats):
+                started = time.perf_counter()
+                backend(sample, lengths)
+                if i >= warmup:
+                    timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        report.latency_ms = median * 1000
+        report.throughput = sample.shape[0] / median
+        reports.append(report)
+    return reports
+
+
+def format_report(reports: Sequence[BackendReport]) -> str:
+    lines = [
+        f"{'backend':<12} {'equiv':<6} {'max rel diff':>12} {'latency ms':>11} {'seq/s':>10}"
+    ]
+    for r in reports:
+        if not r.available:
+            lines.append(f"{r.backend:<12} {'n/a':<6} unavailable: {r.note}")
+            continue
+        lines.append(
+            f"{r.backend:<12} {str(r.equivalent):<6} {r.max_rel_diff:>12.2e} "
+            f"{r.latency_ms:>11.2f} {r.throughput:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=128)
+    parser.add_argument("--seq-len", type=int, default=336)
+    parser.add_argument("--features", type=int, default=7)
+    parser.add_argument("--hidden", type=int, default=32)
+    parser.add_argument("--layers", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--ragged", action="store_true", help="use unequal sequence lengths")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    # Random weights, as in main.py, until trained weights are available.
+    model = LSTMAnomalyDetector(args.features, args.hidden, args.layers).eval()
+    sample = torch.randn(args.batch, args.seq_len, args.features)
+    lengths = None
+    if args.ragged:
+        lengths = torch.randint(args.seq_len // 2, args.seq_len + 1, (args.batch,))
+        lengths, _ = lengths.sort()
+        lengths[-1] = args.seq_len
+    print(format_report(benchmark_backends(model, sample, lengths, repeats=args.repeats)))
+
+
+if __name__ == "__main__":
+    main()
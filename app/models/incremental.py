@@ -0,0 +1,194 @@
+"""Stateful, incremental LSTM scoring for continuously reporting vehicles."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import torch
+
+from app.models.lstm_anomaly import (
+    LSTMAnomalyDetector,
+    _prepare_for_inference,
+    _resolve_device,
+    threshold_errors,
+)
+
+
+LSTMState = Tuple[torch.Tensor, torch.Tensor]
+
+
+@dataclass
+class VehicleScoringState:
+    """What the scorer remembers about one vehicle between updates."""
+
+    encoder: LSTMState  # (hidden, cell), each (num_layers, hidden_dim)
+    decoder: LSTMState
+    error: torch.Tensor  # EWMA of squared reconstruction error per metric
+    steps: int
+
+
+def _stack_states(states: Sequence[LSTMState]) -> LSTMState:
+    return (
+        torch.stack([h for h, _ in states], dim=1),
+        torch.stack([c for _, c in states], dim=1),
+    )
+
+
+def _ewma_fold(
+    previous: Optional[torch.Tensor], squared: torch.Tensor, alpha: float
+) -> torch.Tensor:
+    """Fold `n` new per-step errors into an EWMA in one shot.
+
+    Args:
+        previous: Current EWMA shaped (batch, features), or None to start fresh
+            from the first new step.
+        squared: Per-step squared errors shaped (batch, n, features).
+    """
+
+    n = squared.shape[1]
+    decay = 1.0 - alpha
+    # weight of step k after folding all n steps: alpha * decay^(n-1-k)
+    powers = torch.arange(n - 1, -1, -1, dtype=squared.dtype, device=squared.device)
+    weights = alpha * decay**powers
+    if previous is None:
+        weights[0] = decay ** (n - 1)  # the first step seeds the average
+        return (squared * weights.view(1, n, 1)).sum(dim=1)
+    return decay**n * previous + (squared * weights.view(1, n, 1)).sum(dim=1)
+
+
+class IncrementalLSTMScorer:
+    """Score new telemetry without re-encoding each vehicle's history.
+
+    The encoder and decoder `(hidden, cell)` states of every vehicle are kept
+    between calls, so an update advances the LSTMs over the new timesteps only:
+    cost per reading is O(1) in history length. Reconstruction error is tracked
+    as an exponentially weighted moving average per metric.
+
+    This is a causal approximation of `LSTMAnomalyDetector.forward`, whose decoder
+    starts from the encoder's state after the *whole* sequence. Here the decoder
+    starts from the encoder state after the first update and then runs alongside
+    it, so the first update (e.g. a warm-up over the stored window) matches
+    `forward` exactly and later updates do not revisit earlier steps.
+    """
+
+    def __init__(
+        self,
+        model: LSTMAnomalyDetector,
+        metric_names: Sequence[str],
+        threshold: float,
+        alpha: float = 0.05,
+        device: torch.device | None = None,
+    ) -> None:
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.device = _resolve_device(device)
+        self.model = _prepare_for_inference(model, self.device)
+        self.metric_names = tuple(metric_names)
+        self.threshold = threshold
+        self.alpha = alpha
+        self._states: Dict[str, VehicleScoringState] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, vehicle_id: object) -> bool:
+        return vehicle_id in self._states
+
+    def reset(self, vehicle_id: str) -> None:
+        """Forget a vehicle; its next update starts from a fresh state."""
+
+        with self._lock:
+            self._states.pop(vehicle_id, None)
+
+    def update(self, vehicle_id: str, values: torch.Tensor) -> torch.Tensor:
+        """Advance one vehicle by new timesteps shaped (n, features).
+
+        Returns:
+            The vehicle's updated per-metric EWMA reconstruction error.
+        """
+
+        return self.update_many({vehicle_id: values})[vehicle_id]
+
+    def update_many(
+        self, updates: Mapping[str, torch.Tensor]
+    ) -> Dict[str, torch.Tensor]:
+        """Advance many vehicles at once, batching those with equal step counts.
+
+        Args:
+            updates: vehicle_id -> new timesteps shaped (n, features).
+
+        Returns:
+            vehicle_id -> updated per-metric EWMA reconstruction error.
+        """
+
+        with self._lock:
+            groups: Dict[Tuple[int, bool], List[str]] = {}
+            for vehicle_id, values in updates.items():
+                if values.ndim != 2 or values.shape[1] != len(self.metric_names):
+                    raise ValueError(
+                        f"{vehicle_id}: expected (n, {len(self.metric_names)}) "
+                        f"timesteps, got {tuple(values.shape)}"
+                    )
+                if values.shape[0] == 0:
+                    continue
+                key = (values.shape[0], vehicle_id in self._states)
+                groups.setdefault(key, []).append(vehicle_id)
+
+            with torch.no_grad():
+                for (_, known), vehicle_ids in groups.items():
+                    self._advance(vehicle_ids, updates, known)
+
+            return {
+                vehicle_id: self._states[vehicle_id].error
+                for vehicle_id in updates
+                if vehicle_id in self._states
+            }
+
+    def _advance(
+        self,
+        vehicle_ids: List[str],
+        updates: Mapping[str, torch.Tensor],
+        known: bool,
+    ) -> None:
+        batch = torch.stack([updates[v] for v in vehicle_ids]).to(
+            self.device, torch.float32
+        )
+        if known:
+            previous = [self._states[v] for v in vehicle_ids]
+            enc_out, encoder = self.model.encoder(
+                batch, _stack_states([s.encoder for s in previous])
+            )
+            dec_out, decoder = self.model.decoder(
+                enc_out, _stack_states([s.decoder for s in previous])
+            )
+            prior_error = torch.stack([s.error for s in previous])
+        else:
+            enc_out, encoder = self.model.encoder(batch)
+            dec_out, decoder = self.model.decoder(enc_out, encoder)
+            prior_error = None
+
+        squared = (self.model.output_layer(dec_out) - batch) ** 2
+        errors = _ewma_fold(prior_error, squared, self.alpha)
+        for i, vehicle_id in enumerate(vehicle_ids):
+            steps = self._states[vehicle_id].steps if known else 0
+            self._states[vehicle_id] = VehicleScoringState(
+                encoder=(encoder[0][:, i].clone(), encoder[1][:, i].clone()),
+                decoder=(decoder[0][:, i].clone(), decoder[1][:, i].clone()),
+                error=errors[i].clone(),
+                steps=steps + batch.shape[1],
+            )
+
+    def error(self, vehicle_id: str) -> Optional[torch.Tensor]:
+        state = self._states.get(vehicle_id)
+        return None if state is None else state.error
+
+    def anomalies(self, vehicle_id: str) -> List[Tuple[str, float, float]]:
+        """Current anomalies of a vehicle, in the format of `infer_anomalies`."""
+
+        error = self.error(vehicle_id)
+        if error is None:
+            return []
+        return threshold_errors(error.tolist(), self.metric_names, self.threshold)
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 import torch
 from torch import nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence, pad_sequence
 
 from app.config import LSTMAnomalyConfig
 
@@ -24,13 +25,31 @@ class LSTMAnomalyDetector(nn.Module):
         )
         self.output_layer = nn.Linear(hidden_dim, input_dim)
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
-        """Encode the sequence and reconstruct it."""
+    def forward(
+        self, x: torch.Tensor, lengths: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """Encode the sequence and reconstruct it.
 
-        enc_out, (hidden, cell) = self.encoder(x)
+        Args:
+            x: Tensor shaped (batch, seq_len, features).
+            lengths: Optional valid length per sequence for right-padded batches. Padded
+                steps are packed away so they never reach the encoder's final state.
+        """
+
+        if lengths is None:
+            enc_out, (hidden, cell) = self.encoder(x)
+            dec_out, _ = self.decoder(enc_out, (hidden, cell))
+            return self.output_layer(dec_out)
+
+        packed = pack_padded_sequence(
+            x, lengths.cpu(), batch_first=True, enforce_sorted=False
+        )
+        enc_out, (hidden, cell) = self.encoder(packed)
         dec_out, _ = self.decoder(enc_out, (hidden, cell))
-        recon = self.output_layer(dec_out)
-        return recon
+        dec_out, _ = pad_packed_sequence(
+            dec_out, batch_first=True, total_length=x.shape[1]
+        )
+        return self.output_layer(dec_out)
 
 
 @dataclass
@@ -57,8 +76,9 @@ def train_lstm_anomaly_model(
         TrainingArtifacts containing the trained model and loss history.
 
     Note:
-        This is a placeholder training loop. Replace the data_loader with a real
-        dataset and extend with validation, checkpoints, and early stopping when real data arrives.
+        This is a minimal loop over an arbitrary iterable. For fleet-scale training
+        with windowing, validation, checkpoints and early stopping, use
+        `app.models.training.train_on_store`.
     """
 
     device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -105,6 +125,111 @@ def compute_reconstruction_error(
     return torch.mean((recon - original) ** 2, dim=(0, 1))
 
 
+def compute_sequence_errors(
+    recon: torch.Tensor, original: torch.Tensor, lengths: torch.Tensor
+) -> torch.Tensor:
+    """Compute mean squared error per sequence and feature, ignoring padded steps.
+
+    Returns:
+        Tensor shaped (batch, features).
+    """
+
+    steps = torch.arange(original.shape[1], device=original.device)
+    mask = (steps.unsqueeze(0) < lengths.to(original.device).unsqueeze(1)).unsqueeze(-1)
+    squared = ((recon - original) ** 2) * mask
+    return squared.sum(dim=1) / lengths.to(original.device).unsqueeze(1).clamp(min=1)
+
+
+def _resolve_device(device: torch.device | None) -> torch.device:
+    return device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def _prepare_for_inference(
+    model: LSTMAnomalyDetector, device: torch.device
+) -> LSTMAnomalyDetector:
+    """Move the model and switch it to eval mode only when actually needed."""
+
+    param = next(model.parameters(), None)
+    if param is not None and param.device != device:
+        model = model.to(device)
+    if model.training:
+        model.eval()
+    return model
+
+
+def threshold_errors(
+    errors: Sequence[float], metric_names: Sequence[str], threshold: float
+) -> List[Tuple[str, float, float]]:
+    """Turn per-metric reconstruction errors into (metric_name, severity, error) tuples."""
+
+    anomalies: List[Tuple[str, float, float]] = []
+    for name, error_val in zip(metric_names, errors):
+        if error_val > threshold:
+            severity = min(error_val / (threshold * 2.0), 1.0)
+            anomalies.append((name, severity, error_val))
+    return anomalies
+
+
+def infer_errors(
+    model: LSTMAnomalyDetector,
+    series: torch.Tensor,
+    device: torch.device | None = None,
+) -> List[float]:
+    """Per-metric reconstruction error of one (1, seq_len, features) series."""
+
+    device = _resolve_device(device)
+    model = _prepare_for_inference(model, device)
+    with torch.no_grad():
+        series = series.to(device)
+        recon = model(series)
+        return compute_reconstruction_error(recon, series).tolist()
+
+
+def infer_errors_batch(
+    model: LSTMAnomalyDetector,
+    series_list: Sequence[torch.Tensor],
+    batch_size: int = 128,
+    device: torch.device | None = None,
+    per_timestep: bool = False,
+) -> Tuple[List[List[float]], Optional[List[torch.Tensor]]]:
+    """Per-metric reconstruction errors of many sequences, batched like `infer_anomalies_batch`.
+
+    Args:
+        model: Trained LSTMAnomalyDetector.
+        series_list: Tensors shaped (seq_len, features) sharing the same feature order.
+        batch_size: Maximum number of sequences per forward pass.
+        device: Optional device override.
+        per_timestep: Also return each sequence's (seq_len, features) squared errors.
+
+    Returns:
+        (per-metric errors per sequence, per-timestep errors or None), in input order.
+    """
+
+    device = _resolve_device(device)
+    model = _prepare_for_inference(model, device)
+    errors: List[List[float]] = [[] for _ in series_list]
+    steps: Optional[List[torch.Tensor]] = [None] * len(series_list) if per_timestep else None
+    order = sorted(range(len(series_list)), key=lambda i: series_list[i].shape[0])
+
+    with torch.no_grad():
+        for start in range(0, len(order), max(1, batch_size)):
+            chunk = order[start : start + batch_size]
+            seqs = [series_list[i] for i in chunk]
+            lengths = torch.tensor([seq.shape[0] for seq in seqs], dtype=torch.long)
+            batch = pad_sequence(seqs, batch_first=True).to(device)
+            if bool((lengths == lengths[0]).all()):
+                recon = model(batch)
+            else:
+                recon = model(batch, lengths)
+            per_sequence = compute_sequence_errors(recon, batch, lengths).cpu().tolist()
+            for row, (idx, per_feature) in enumerate(zip(chunk, per_sequence)):
+                errors[idx] = per_feature
+                if steps is not None:
+                    length = int(lengths[row])
+                    steps[idx] = ((recon[row, :length] - batch[row, :length]) ** 2).cpu()
+    return errors, steps
+
+
 def infer_anomalies(
     model: LSTMAnomalyDetector,
     series: torch.Tensor,
@@ -125,19 +250,35 @@ def infer_anomalies(
         List of tuples (metric_name, severity, error) for metrics exceeding threshold.
     """
 
-    device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = model.to(device)
-    model.eval()
-    with torch.no_grad():
-        series = series.to(device)
-        recon = model(series)
-        errors = compute_reconstruction_error(recon, series)  # shape (features,)
-        anomalies: List[Tuple[str, float, float]] = []
-        for name, err in zip(metric_names, errors):
-            error_val = err.item()
-            if error_val > threshold:
-                severity = min(error_val / (threshold * 2.0), 1.0)
-                anomalies.append((name, severity, error_val))
-    return anomalies
+    errors = infer_errors(model, series, device)  # one value per feature
+    return threshold_errors(errors, metric_names, threshold)
+
+
+def infer_anomalies_batch(
+    model: LSTMAnomalyDetector,
+    series_list: Sequence[torch.Tensor],
+    metric_names: Sequence[str],
+    threshold: float,
+    batch_size: int = 128,
+    device: torch.device | None = None,
+) -> List[List[Tuple[str, float, float]]]:
+    """Score many sequences with one forward pass per batch.
+
+    Sequences are ordered by length before batching so each batch carries as little
+    padding as possible; unequal lengths are right-padded and masked out of both the
+    encoder state and the reconstruction error.
 
+    Args:
+        model: Trained LSTMAnomalyDetector.
+        series_list: Tensors shaped (seq_len, features) sharing the same feature order.
+        metric_names: Ordered names corresponding to feature dimension.
+        threshold: Reconstruction error threshold.
+        batch_size: Maximum number of sequences per forward pass.
+        device: Optional device override.
+
+    Returns:
+        One anomaly list per input sequence, in input order, matching `infer_anomalies`.
+    """
 
+    errors, _ = infer_errors_batch(model, series_list, batch_size, device)
+    return [threshold_errors(per_feature, metric_names, threshold) for per_feature in errors]
@@ -0,0 +1,200 @@
+"""Statistical pre-filter that screens vehicles before LSTM scoring.
+
+The cascade runs range, rolling z-score and EWMA checks over each vehicle's
+telemetry, vectorized across metrics and, for fleet batches, across vehicles.
+Only vehicles with a suspicious metric go on to the autoencoder; cleared vehicles
+get no anomalies. Switch it on with `WorkflowConfig.prefilter.enabled`, watch the
+stages with `get_prefilter_stats`, and measure recall against full LSTM scoring
+with `app.agents.anomaly_agent.compare_prefilter_recall`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.config import PrefilterConfig
+from app.telemetry import TelemetryFrame
+
+
+@dataclass
+class ScreenResult:
+    """Verdict of the pre-filter for one vehicle."""
+
+    suspicious: bool
+    # metric name -> checks it failed ("range", "zscore", "ewma")
+    reasons: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def _range_flags(
+    values: np.ndarray, metric_names: Sequence[str], config: PrefilterConfig
+) -> np.ndarray:
+    low = np.full(len(metric_names), -np.inf)
+    high = np.full(len(metric_names), np.inf)
+    for j, name in enumerate(metric_names):
+        if name in config.metric_ranges:
+            low[j], high[j] = config.metric_ranges[name]
+    return ((values < low) | (values > high)).any(axis=1)
+
+
+def _zscore_flags(values: np.ndarray, config: PrefilterConfig) -> np.ndarray:
+    """Each point against the mean/std of the `window` points before it (O(T))."""
+
+    v, t, m = values.shape
+    w = config.window
+    if t <= w:
+        return np.zeros((v, m), dtype=bool)
+    zero = np.zeros((v, 1, m))
+    c1 = np.concatenate([zero, np.cumsum(values, axis=1)], axis=1)
+    c2 = np.concatenate([zero, np.cumsum(values**2, axis=1)], axis=1)
+    mean = (c1[:, w:-1] - c1[:, : -w - 1]) / w
+    var = (c2[:, w:-1] - c2[:, : -w - 1]) / w - mean**2
+    std = np.sqrt(np.maximum(var, config.min_std**2))
+    z = np.abs(values[:, w:] - mean) / std
+    return (z > config.z_threshold).any(axis=1)
+
+
+def _ewma_flags(values: np.ndarray, config: PrefilterConfig) -> np.ndarray:
+    """Each point against the EWMA and EW spread of the points before it.
+
+    One pass over time, vectorized across vehicles and metrics; the first
+    `window` points only warm the averages up.
+    """
+
+    v, t, m = values.shape
+    flags = np.zeros((v, m), dtype=bool)
+    if t <= config.window:
+        return flags
+    alpha = config.ewma_alpha
+    floor = config.min_std**2
+    mean = values[:, 0].copy()
+    var = np.zeros((v, m))
+    for step in range(1, t):
+        resid = values[:, step] - mean
+        if step >= config.window:
+            flags |= resid**2 > config.ewma_threshold**2 * np.maximum(var, floor)
+        mean += alpha * resid
+        var = (1.0 - alpha) * (var + alpha * resid**2)
+    return flags
+
+
+def screen_batch(
+    values: np.ndarray, metric_names: Sequence[str], config: PrefilterConfig
+) -> Dict[str, np.ndarray]:
+    """Run every check over equally long series shaped (vehicles, steps, metrics).
+
+    Returns:
+        check name -> (vehicles, metrics) boolean flags.
+    """
+
+    values = values.astype(np.float64)
+    flags = {"range": _range_flags(values, metric_names, config)}
+    statistical = np.array(
+        [name not in config.categorical_metrics for name in metric_names], dtype=bool
+    )
+    flags["zscore"] = _zscore_flags(values, config) & statistical
+    flags["ewma"] = _ewma_flags(values, config) & statistical
+    return flags
+
+
+def _to_result(
+    flags: Dict[str, np.ndarray], row: int, metric_names: Sequence[str]
+) -> ScreenResult:
+    reasons: Dict[str, List[str]] = {}
+    for check, check_flags in flags.items():
+        for j in np.flatnonzero(check_flags[row]):
+            reasons.setdefault(metric_names[j], []).append(check)
+    return ScreenResult(suspicious=bool(reasons), reasons=reasons)
+
+
+def screen_telemetry(frame: TelemetryFrame, config: PrefilterConfig) -> ScreenResult:
+    """Screen one vehicle."""
+
+    if len(frame) == 0 or frame.n_metrics == 0:
+        return ScreenResult(suspicious=False)
+    flags = screen_batch(frame.values[None], frame.metric_names, config)
+    return _to_result(flags, 0, frame.metric_names)
+
+
+def screen_frames(
+    frames: Sequence[TelemetryFrame], config: PrefilterConfig
+) -> List[ScreenResult]:
+    """Screen many vehicles, batching those with the same length and metrics."""
+
+    results: List[ScreenResult] = [ScreenResult(suspicious=False) for _ in frames]
+    groups: Dict[Tuple[int, Tuple[str, ...]], List[int]] = {}
+    for i, frame in enumerate(frames):
+        if len(frame) and frame.n_metrics:
+            groups.setdefault((len(frame), frame.metric_names), []).append(i)
+    for (_, metric_names), members in groups.items():
+        flags = screen_batch(np.stack([frames[i].values for i in members]), metric_names, config)
+        for row, i in enumerate(members):
+            results[i] = _to_result(flags, row, metric_names)
+    return results
+
+
+class PrefilterStats:
+    """Thread-safe counters for the cascade's two stages."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.screened = 0
+            self.passed = 0
+            self.screen_time_s = 0.0
+            self.lstm_vehicles = 0
+            self.lstm_time_s = 0.0
+
+    def record_screen(self, screened: int, passed: int, elapsed_s: float) -> None:
+        with self._lock:
+            self.screened += screened
+            self.passed += passed
+            self.screen_time_s += elapsed_s
+
+    def record_lstm(self, vehicles: int, elapsed_s: float) -> None:
+        with self._lock:
+            self.lstm_vehicles += vehicles
+            self.lstm_time_s += elapsed_s
+
+    def snapshot(self) -> Dict[str, float]:
+        """Pass-through rate and time saved, estimated from the mean LSTM cost."""
+
+        with self._lock:
+            per_vehicle = self.lstm_time_s / self.lstm_vehicles if self.lstm_vehicles else 0.0
+            skipped = self.screened - self.passed
+            return {
+                "screened": self.screened,
+                "passedToLstm": self.passed,
+                "skipped": skipped,
+                "passThroughRate": round(self.passed / self.screened, 4) if self.screened else 0.0,
+                "screenTimeMs": round(self.screen_time_s * 1000, 2),
+                "lstmTimeMs": round(self.lstm_time_s * 1000, 2),
+                "estimatedTimeSavedMs": round(
+                    (skipped * per_vehicle - self.screen_time_s) * 1000, 2
+                ),
+            }
+
+
+_stats = PrefilterStats()
+
+
+def get_prefilter_stats() -> PrefilterStats:
+    """Process-wide stage counters, shared by the anomaly node and fleet scoring."""
+
+    return _stats
+
+
+def timed_screen(frame: TelemetryFrame, config: PrefilterConfig) -> ScreenResult:
+    """`screen_telemetry` that also feeds the process-wide stats."""
+
+    started = time.perf_counter()
+    result = screen_telemetry(frame, config)
+    _stats.record_screen(1, int(result.suspicious), time.perf_counter() - started)
+    return result
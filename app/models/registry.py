@@ -0,0 +1,249 @@
+"""Versioned on-disk registry of trained anomaly models.
+
+Layout under the registry root::
+
+    <name>/v0001/weights.pt   # state_dict, torch zipfile format
+    <name>/v0001/meta.json    # schema, training metadata, weights digest
+
+Weights load with ``torch.load(mmap=True)`` and are assigned into the module
+without copying, so every process serving the same version shares its pages.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from app.models.backends import unwrap_model
+from app.models.lstm_anomaly import LSTMAnomalyDetector
+
+
+DEFAULT_MODEL_NAME = "lstm_anomaly"
+_WEIGHTS_FILE = "weights.pt"
+_META_FILE = "meta.json"
+_VERSION_DIR = re.compile(r"^v(\d+)$")
+
+
+@dataclass(frozen=True)
+class ModelSchema:
+    """What a model expects as input: its dimensions and feature order."""
+
+    input_dim: int
+    hidden_dim: int
+    num_layers: int
+    metric_names: Tuple[str, ...]
+
+    def check(self, metric_names: Sequence[str]) -> None:
+        """Raise ValueError if telemetry columns do not match the trained features."""
+
+        if tuple(metric_names) != self.metric_names:
+            raise ValueError(
+                f"Model expects metrics {list(self.metric_names)}, got {list(metric_names)}"
+            )
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """One registered model version."""
+
+    name: str
+    version: int
+    schema: ModelSchema
+    weights_digest: str
+    created_at: float
+    path: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def tag(self) -> str:
+        """Stable identifier, e.g. ``lstm_anomaly@v3``; used in result cache keys."""
+
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def weights_path(self) -> str:
+        return os.path.join(self.path, _WEIGHTS_FILE)
+
+
+def default_registry_dir() -> str:
+    return os.environ.get("MODEL_REGISTRY_DIR", "model_registry")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Save, list and load model versions under a local directory."""
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or default_registry_dir()
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _version_numbers(self, name: str) -> List[int]:
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        numbers = []
+        for entry in os.listdir(model_dir):
+            match = _VERSION_DIR.match(entry)
+            if match and os.path.exists(os.path.join(model_dir, entry, _META_FILE)):
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def save(
+        self,
+        model: LSTMAnomalyDetector,
+        metric_names: Sequence[str],
+        name: str = DEFAULT_MODEL_NAME,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ModelVersion:
+        """Register `model` as the next version of `name`.
+
+        The version directory is written under a temporary name and renamed into
+        place, so readers never observe a half-written version.
+        """
+
+        model = unwrap_model(model)
+        schema = ModelSchema(
+            input_dim=model.encoder.input_size,
+            hidden_dim=model.encoder.hidden_size,
+            num_layers=model.encoder.num_layers,
+            metric_names=tuple(metric_names),
+        )
+        if len(schema.metric_names) != schema.input_dim:
+            raise ValueError(
+                f"{len(schema.metric_names)} metric names for a model with "
+                f"input_dim={schema.input_dim}"
+            )
+
+        os.makedirs(self._model_dir(name), exist_ok=True)
+        existing = self._version_numbers(name)
+        version = (existing[-1] if existing else 0) + 1
+        final_dir = os.path.join(self._model_dir(name), f"v{version:04d}")
+        tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir)
+        try:
+            weights = {k: v.detach().cpu().contiguous() for k, v in model.state_dict().items()}
+            torch.save(weights, os.path.join(tmp_dir, _WEIGHTS_FILE))
+            meta = {
+                "name": name,
+                "version": version,
+                "schema": asdict(schema),
+                "weights_digest": _file_digest(os.path.join(tmp_dir, _WEIGHTS_FILE)),
+                "created_at": time.time(),
+                "metadata": metadata or {},
+            }
+            with open(os.path.join(tmp_dir, _META_FILE), "w") as fh:
+                json.dump(meta, fh, indent=2)
+            os.rename(tmp_dir, final_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return self.get(name, version)
+
+    def get(self, name: str = DEFAULT_MODEL_NAME, version: Optional[int] = None) -> ModelVersion:
+        """Metadata of one version (the latest when `version` is None)."""
+
+        if version is None:
+            numbers = self._version_numbers(name)
+            if not numbers:
+                raise FileNotFoundError(f"No versions of model {name!r} in {self.root}")
+            version = numbers[-1]
+        path = os.path.join(self._model_dir(name), f"v{version:04d}")
+        with open(os.path.join(path, _META_FILE)) as fh:
+            meta = json.load(fh)
+        schema = meta["schema"]
+        return ModelVersion(
+            name=meta["name"],
+            version=int(meta["version"]),
+            schema=ModelSchema(
+                input_dim=int(schema["input_dim"]),
+                hidden_dim=int(schema["hidden_dim"]),
+                num_layers=int(schema["num_layers"]),
+                metric_names=tuple(schema["metric_names"]),
+            ),
+            weights_digest=meta["weights_digest"],
+            created_at=float(meta["created_at"]),
+            path=path,
+            metadata=meta.get("metadata", {}),
+        )
+
+    def latest(self, name: str = DEFAULT_MODEL_NAME) -> Optional[ModelVersion]:
+        try:
+            return self.get(name)
+        except FileNotFoundError:
+            return None
+
+    def versions(self, name: str = DEFAULT_MODEL_NAME) -> List[ModelVersion]:
+        return [self.get(name, v) for v in self._version_numbers(name)]
+
+    def load(
+        self,
+        name: str = DEFAULT_MODEL_NAME,
+        version: Optional[int] = None,
+        metric_names: Optional[Sequence[str]] = None,
+    ) -> Tuple[LSTMAnomalyDetector, ModelVersion]:
+        """Load a version with memory-mapped weights.
+
+        Args:
+            name: Registered model name.
+            version: Version number; the latest when None.
+            metric_names: If given, checked against the trained feature schema.
+
+        Returns:
+            (model in eval mode, its ModelVersion).
+        """
+
+        entry = self.get(name, version)
+        if metric_names is not None:
+            entry.schema.check(metric_names)
+        state_dict = torch.load(
+            entry.weights_path, map_location="cpu", mmap=True, weights_only=True
+        )
+        model = LSTMAnomalyDetector(
+            entry.schema.input_dim, entry.schema.hidden_dim, entry.schema.num_layers
+        )
+        # assign=True adopts the mapped tensors instead of copying them into fresh ones
+        model.load_state_dict(state_dict, assign=True)
+        model.eval()
+        return model, entry
+
+
+def load_or_init_model(
+    metric_names: Sequence[str],
+    hidden_dim: int,
+    num_layers: int,
+    registry: Optional[ModelRegistry] = None,
+    name: str = DEFAULT_MODEL_NAME,
+) -> Tuple[LSTMAnomalyDetector, Optional[ModelVersion]]:
+    """Warm-start from the latest compatible registered version, else random weights.
+
+    Returns the model and its `ModelVersion`, or None for freshly initialized weights.
+    """
+
+    registry = registry or ModelRegistry()
+    entry = registry.latest(name)
+    if entry is not None:
+        try:
+            return registry.load(name, entry.version, metric_names=metric_names)
+        except ValueError as exc:
+            print(f"Ignoring {entry.tag}: {exc}")
+    model = LSTMAnomalyDetector(
+        input_dim=len(metric_names), hidden_dim=hidden_dim, num_layers=num_layers
+    )
+    return model, None
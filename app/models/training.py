@@ -0,0 +1,358 @@
+"""Windowed training pipeline for the LSTM anomaly model.
+
+Training windows are strided views (`Tensor.unfold`) over the memory-mapped
+telemetry store, so the fleet is never materialized in RAM: each batch gathers
+only its own windows from the mapped pages. A multi-worker `DataLoader` feeds the
+model. Vehicles are split into train and validation sets, the best validation
+checkpoint is kept on disk, training stops early once validation loss stops
+improving, and the result can be registered in the `ModelRegistry`. Every run
+checkpoints into its own subdirectory of `TrainingConfig.checkpoint_dir`.
+
+Example, for the telemetry written by ``backend/generate_vehicle_dataset.py``::
+
+    python -m app.models.training --telemetry-csv telemetry.csv \\
+        --metadata-csv vehicle_metadata.csv --store telemetry.store --register
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+from torch.utils.data import DataLoader, Dataset, RandomSampler, SequentialSampler
+
+from app.config import LSTMAnomalyConfig, TrainingConfig
+from app.models.lstm_anomaly import LSTMAnomalyDetector, _resolve_device
+from app.models.registry import ModelRegistry, ModelVersion
+from app.utils.telemetry_store import FleetTelemetryStore, write_long_telemetry_csv
+
+
+class TelemetryWindowDataset(Dataset):
+    """Sliding windows over a telemetry store, addressed by a flat window index.
+
+    Windows are `window_size` steps long and start every `stride` steps. Each
+    vehicle's windows are an `unfold` view of its mapped rows; `__getitems__`
+    gathers a whole batch at once. The store is reopened lazily in every
+    DataLoader worker instead of pickling the mapped arrays.
+    """
+
+    def __init__(
+        self,
+        store_root: str,
+        vehicle_ids: Sequence[str],
+        window_size: int,
+        stride: int,
+    ) -> None:
+        self.store_root = store_root
+        self.window_size = window_size
+        self.stride = stride
+        self._store: Optional[FleetTelemetryStore] = None
+
+        store = self.store
+        self.metric_names = store.metric_names
+        self.vehicle_ids: List[str] = []
+        counts: List[int] = []
+        for vehicle_id in vehicle_ids:
+            frame = store.frame(vehicle_id)
+            if frame.metric_names != self.metric_names:
+                raise ValueError(f"{vehicle_id} does not report every metric in the store")
+            n = (len(frame) - window_size) // stride + 1 if len(frame) >= window_size else 0
+            if n > 0:
+                self.vehicle_ids.append(vehicle_id)
+                counts.append(n)
+        # first flat index of each vehicle's windows
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    @property
+    def store(self) -> FleetTelemetryStore:
+        if self._store is None:
+            self._store = FleetTelemetryStore(self.store_root)
+        return self._store
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state["_store"] = None  # each worker maps the files itself
+        return state
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def _windows(self, v: int) -> torch.Tensor:
+        """All windows of vehicle `v` as a `(n, window_size, n_metrics)` view."""
+
+        values = torch.from_numpy(self.store.frame(self.vehicle_ids[v]).values)
+        return values.unfold(0, self.window_size, self.stride).transpose(1, 2)
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        return self.__getitems__([index])[0]
+
+    def __getitems__(self, indices: Sequence[int]) -> torch.Tensor:
+        flat = np.asarray(indices, dtype=np.int64)
+        vehicles = np.searchsorted(self._offsets, flat, side="right") - 1
+        batch = torch.empty(len(flat), self.window_size, len(self.metric_names))
+        for v in np.unique(vehicles):
+            rows = np.flatnonzero(vehicles == v)
+            local = torch.from_numpy(flat[rows] - self._offsets[v])
+            batch[torch.from_numpy(rows)] = self._windows(int(v))[local]
+        return batch
+
+
+def _collate_windows(batch: torch.Tensor) -> torch.Tensor:
+    return batch  # __getitems__ already returns a stacked batch
+
+
+def split_vehicles(
+    vehicle_ids: Sequence[str], val_fraction: float, seed: int = 0
+) -> Tuple[List[str], List[str]]:
+    """Hold out whole vehicles for validation so windows never leak across splits."""
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(vehicle_ids))
+    n_val = int(round(len(vehicle_ids) * val_fraction)) if len(vehicle_ids) > 1 else 0
+    val = [vehicle_ids[i] for i in sorted(order[:n_val])]
+    train = [vehicle_ids[i] for i in sorted(order[n_val:])]
+    return train, val
+
+
+@dataclass
+class TrainingResult:
+    """Outcome of `train_on_store`."""
+
+    model: LSTMAnomalyDetector
+    train_losses: List[float]
+    val_losses: List[float]
+    best_epoch: int
+    best_val_loss: float
+    checkpoint_path: str
+    stopped_early: bool
+    elapsed_s: float
+    model_version: Optional[ModelVersion] = None
+    metadata: Dict = field(default_factory=dict)
+
+
+def _loader(
+    dataset: TelemetryWindowDataset,
+    config: TrainingConfig,
+    shuffle: bool,
+    num_samples: Optional[int] = None,
+) -> DataLoader:
+    if shuffle:
+        sampler = RandomSampler(dataset, num_samples=num_samples or None)
+    else:
+        sampler = SequentialSampler(dataset)
+    return DataLoader(
+        dataset,
+        batch_size=config.batch_size,
+        sampler=sampler,
+        num_workers=config.num_workers,
+        collate_fn=_collate_windows,
+        persistent_workers=config.num_workers > 0,
+        prefetch_factor=2 if config.num_workers > 0 else None,
+    )
+
+
+def _evaluate(
+    model: LSTMAnomalyDetector, loader: DataLoader, device: torch.device
+) -> float:
+    model.eval()
+    total, count = 0.0, 0
+    with torch.no_grad():
+        for batch in loader:
+            batch = batch.to(device, non_blocking=True)
+            total += nn.functional.mse_loss(model(batch), batch, reduction="sum").item()
+            count += batch.numel()
+    return total / max(count, 1)
+
+
+def train_on_store(
+    store_root: str,
+    model_config: LSTMAnomalyConfig,
+    config: TrainingConfig,
+    vehicle_ids: Optional[Sequence[str]] = None,
+    registry: Optional[ModelRegistry] = None,
+    device: torch.device | None = None,
+) -> TrainingResult:
+    """Train on windows of a telemetry store with validation and early stopping.
+
+    Windows are used as raw values, unnormalized, because every inference path
+    scores raw telemetry.
+
+    Args:
+        store_root: Directory of a telemetry store (see `app.utils.telemetry_store`).
+        model_config: Model dimensions, learning rate and maximum epochs.
+        config: Windowing, loader, validation and checkpoint settings.
+        vehicle_ids: Vehicles to use; every vehicle in the store by default.
+        registry: If given, the best model is registered there.
+        device: Optional device override.
+
+    Returns:
+        TrainingResult whose `model` holds the best validation weights.
+
+    Raises:
+        RuntimeError: If no epoch produced a finite validation loss (e.g. zero
+            epochs or a diverged, NaN loss), so there is no checkpoint to keep.
+    """
+
+    started = time.perf_counter()
+    torch.manual_seed(config.seed)
+    device = _resolve_device(device)
+    store = FleetTelemetryStore(store_root)
+    train_ids, val_ids = split_vehicles(
+        list(vehicle_ids or store.vehicle_ids), config.val_fraction, config.seed
+    )
+    window_size = config.window_size or model_config.window_size
+    train_set = TelemetryWindowDataset(store_root, train_ids, window_size, config.stride)
+    val_set = TelemetryWindowDataset(store_root, val_ids, window_size, config.stride)
+    if len(train_set) == 0:
+        raise ValueError(f"No vehicle in {store_root} has {window_size} telemetry steps")
+
+    train_loader = _loader(train_set, config, shuffle=True, num_samples=config.windows_per_epoch)
+    val_loader = _loader(val_set, config, shuffle=False) if len(val_set) else None
+
+    model = LSTMAnomalyDetector(
+        input_dim=len(train_set.metric_names),
+        hidden_dim=model_config.hidden_dim,
+        num_layers=model_config.num_layers,
+    ).to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=model_config.learning_rate)
+
+    os.makedirs(config.checkpoint_dir, exist_ok=True)
+    # a fresh directory per run, so concurrent or earlier runs never share a checkpoint
+    run_dir = tempfile.mkdtemp(prefix="run-", dir=config.checkpoint_dir)
+    checkpoint_path = os.path.join(run_dir, "best.pt")
+    train_losses: List[float] = []
+    val_losses: List[float] = []
+    best_loss, best_epoch, stale = math.inf, -1, 0
+
+    for epoch in range(model_config.epochs):
+        model.train()
+        epoch_loss, batches = 0.0, 0
+        for batch in train_loader:
+            batch = batch.to(device, non_blocking=True)
+            optimizer.zero_grad()
+            loss = nn.functional.mse_loss(model(batch), batch)
+            loss.backward()
+            if config.grad_clip:
+                nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip)
+            optimizer.step()
+            epoch_loss += loss.item()
+            batches += 1
+        train_losses.append(epoch_loss / max(batches, 1))
+
+        # without held-out vehicles, early stopping falls back to training loss
+        val_loss = _evaluate(model, val_loader, device) if val_loader else train_losses[-1]
+        val_losses.append(val_loss)
+        print(
+            f"epoch {epoch + 1}/{model_config.epochs}: "
+            f"train {train_losses[-1]:.6g} val {val_loss:.6g}"
+        )
+
+        if val_loss < best_loss - config.min_delta:
+            best_loss, best_epoch, stale = val_loss, epoch, 0
+            torch.save(
+                {
+                    "epoch": epoch,
+                    "val_loss": val_loss,
+                    "model_state": model.state_dict(),
+                    "optimizer_state": optimizer.state_dict(),
+                },
+                checkpoint_path,
+            )
+        else:
+            stale += 1
+            if stale >= config.patience:
+                break
+
+    stopped_early = len(train_losses) < model_config.epochs
+    if best_epoch < 0:
+        os.rmdir(run_dir)
+        raise RuntimeError(
+            f"No epoch improved the validation loss ({len(train_losses)} run, "
+            f"losses {val_losses}); not keeping a checkpoint"
+        )
+    checkpoint = torch.load(checkpoint_path, map_location=device, weights_only=True)
+    model.load_state_dict(checkpoint["model_state"])
+    model.eval()
+
+    metadata = {
+        "store": os.path.abspath(store_root),
+        "train_vehicles": len(train_set.vehicle_ids),
+        "val_vehicles": len(val_set.vehicle_ids),
+        "train_windows": len(train_set),
+        "val_windows": len(val_set),
+        "best_epoch": best_epoch,
+        "best_val_loss": best_loss,
+        "train_losses": train_losses,
+        "val_losses": val_losses,
+        "training_config": asdict(config),
+        "learning_rate": model_config.learning_rate,
+    }
+    model_version = None
+    if registry is not None:
+        model_version = registry.save(model, train_set.metric_names, metadata=metadata)
+
+    return TrainingResult(
+        model=model,
+        train_losses=train_losses,
+        val_losses=val_losses,
+        best_epoch=best_epoch,
+        best_val_loss=best_loss,
+        checkpoint_path=checkpoint_path,
+        stopped_early=stopped_early,
+        elapsed_s=time.perf_counter() - started,
+        model_version=model_version,
+        metadata=metadata,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the LSTM anomaly model on fleet telemetry.")
+    parser.add_argument("--store", required=True, help="telemetry store directory")
+    parser.add_argument(
+        "--telemetry-csv", help="long-format telemetry CSV to convert into --store first"
+    )
+    parser.add_argument("--metadata-csv", help="vehicle metadata CSV for --telemetry-csv")
+    parser.add_argument("--epochs", type=int)
+    parser.add_argument("--window-size", type=int)
+    parser.add_argument("--stride", type=int)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--num-workers", type=int)
+    parser.add_argument("--windows-per-epoch", type=int)
+    parser.add_argument("--register", action="store_true", help="save the best model to the registry")
+    args = parser.parse_args()
+
+    model_config = LSTMAnomalyConfig()
+    config = TrainingConfig()
+    if args.epochs is not None:
+        model_config.epochs = args.epochs
+    for name in ("window_size", "stride", "batch_size", "num_workers", "windows_per_epoch"):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(config, name, value)
+
+    if args.telemetry_csv:
+        write_long_telemetry_csv(args.telemetry_csv, args.store, args.metadata_csv)
+
+    result = train_on_store(
+        args.store,
+        model_config,
+        config,
+        registry=ModelRegistry() if args.register else None,
+    )
+    print(
+        f"best epoch {result.best_epoch + 1}, val loss {result.best_val_loss:.6g}, "
+        f"{result.elapsed_s:.1f}s"
+        + (f", registered {result.model_version.tag}" if result.model_version else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
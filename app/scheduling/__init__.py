@@ -0,0 +1,33 @@
+"""Workshop scheduling: slot calendars, booking, batch assignment and simulation."""
+
+from app.scheduling.engine import (
+    DEFAULT_WORKSHOPS,
+    PRIORITY_RANK,
+    Booking,
+    SchedulingEngine,
+    ServiceRequest,
+    Workshop,
+    configure_scheduling,
+    get_scheduling_engine,
+    load_workshops,
+)
+from app.scheduling.optimizer import (
+    dispatch_schedules,
+    optimize_assignments,
+    rebalance_schedules,
+)
+
+__all__ = [
+    "DEFAULT_WORKSHOPS",
+    "PRIORITY_RANK",
+    "Booking",
+    "SchedulingEngine",
+    "ServiceRequest",
+    "Workshop",
+    "configure_scheduling",
+    "get_scheduling_engine",
+    "load_workshops",
+    "dispatch_schedules",
+    "optimize_assignments",
+    "rebalance_schedules",
+]
@@ -0,0 +1,509 @@
+"""Capacity-aware workshop calendars with a priority queue of service requests.
+
+Time is cut into fixed slots counted from the engine's epoch. Each workshop has
+`capacity` bays per slot (one mechanic per bay), and a heap of
+`(next free slot, workshop)` pairs gives the earliest open bay anywhere in
+O(log workshops). Pending requests wait in a second heap keyed on priority and
+time to failure, so `dispatch` always serves the most urgent one next in
+O(log pending). Every operation takes one lock, so concurrent workflow runs
+share a consistent allocation. When workshops and the vehicle have coordinates,
+`book` takes the nearest workshop that is free in time, found through a
+`WorkshopIndex`.
+
+The calendar only moves forward: no request is placed before the latest
+"not before" slot seen so far, which holds as long as requests arrive in time
+order with the same lead time.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import SchedulingConfig
+from app.scheduling.spatial import WorkshopIndex
+from app.state import ScheduleInfo
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+@dataclass(frozen=True)
+class Workshop:
+    """A service location with `capacity` bays, each worked by one mechanic."""
+
+    workshop_id: str
+    name: str
+    location: str
+    capacity: int
+    mechanics: Tuple[str, ...] = ()
+    inventory_score: float = 1.0  # 0..1 chance the needed part is in stock
+    lat: float = math.nan
+    lon: float = math.nan
+
+    def mechanic(self, bay: int) -> str:
+        if bay < len(self.mechanics):
+            return self.mechanics[bay]
+        return f"{self.workshop_id}-M{bay + 1:02d}"
+
+
+def _mechanics(number: int, capacity: int) -> Tuple[str, ...]:
+    return tuple(f"M-{number}{bay + 1:03d}" for bay in range(capacity))
+
+
+DEFAULT_WORKSHOPS: Tuple[Workshop, ...] = (
+    Workshop("W001", "City Central Auto", "central", 5, _mechanics(1, 5), lat=19.076, lon=72.878),
+    Workshop("W002", "Northside Motors", "north", 3, _mechanics(2, 3), lat=19.230, lon=72.857),
+    Workshop("W003", "Express Auto South", "south", 4, _mechanics(3, 4), lat=18.930, lon=72.833),
+)
+
+
+def load_workshops(path: str) -> Tuple[Workshop, ...]:
+    """Workshops from a `workshops.csv` as written by `generate_vehicle_dataset.py`.
+
+    Bays per slot are the technicians available times the share of capacity open
+    for bookings (`capacity_percent`), at least one. Optional `lat`/`lon` columns
+    place workshops for nearest-workshop booking.
+    """
+
+    table = pd.read_csv(path)
+    workshops = []
+    for row in table.itertuples(index=False):
+        bays = max(1, int(round(row.tech_available * row.capacity_percent / 100.0)))
+        workshops.append(
+            Workshop(
+                workshop_id=str(row.workshop_id),
+                name=str(getattr(row, "name", row.workshop_id)),
+                location=str(getattr(row, "location", "")),
+                capacity=bays,
+                inventory_score=float(row.inventory_score),
+                lat=float(getattr(row, "lat", math.nan)),
+                lon=float(getattr(row, "lon", math.nan)),
+            )
+        )
+    return tuple(workshops)
+
+
+@dataclass(frozen=True)
+class ServiceRequest:
+    """A vehicle asking for a slot; lower `sort_key` is served first."""
+
+    vehicle_id: str
+    priority_tag: str = "low"
+    time_to_failure_days: float = math.inf
+    requested_at: Optional[datetime] = None  # None -> now
+    location: Optional[Tuple[float, float]] = None  # (lat, lon) of the vehicle
+
+    def sort_key(self) -> Tuple[int, float]:
+        return PRIORITY_RANK.get(self.priority_tag, len(PRIORITY_RANK)), self.time_to_failure_days
+
+
+@dataclass(frozen=True)
+class Booking:
+    """A confirmed bay in one workshop slot."""
+
+    vehicle_id: str
+    workshop_id: str
+    workshop_name: str
+    slot_index: int
+    slot_time: datetime
+    mechanic_id: str
+    priority_tag: str
+    deadline: Optional[datetime] = None  # requested_at + time to failure
+    bay: int = 0
+
+    @property
+    def meets_deadline(self) -> bool:
+        return self.deadline is None or self.slot_time <= self.deadline
+
+    def to_schedule_info(self) -> ScheduleInfo:
+        return {
+            "workshop_id": self.workshop_id,
+            "workshop_name": self.workshop_name,
+            "slot_time": self.slot_time.isoformat(),
+            "mechanic_id": self.mechanic_id,
+            "priority_tag": self.priority_tag,
+            "meets_deadline": self.meets_deadline,
+        }
+
+
+class SchedulingEngine:
+    """Shared slot allocation across workshops; thread-safe.
+
+    `book` places one request immediately (idempotent per vehicle: re-running a
+    vehicle keeps its booking unless its priority rose). `submit` + `dispatch`
+    queue requests and serve them most-urgent first; fleet runs book that way
+    (see `app.scheduling.optimizer.dispatch_schedules`).
+    """
+
+    def __init__(
+        self,
+        workshops: Sequence[Workshop] = DEFAULT_WORKSHOPS,
+        slot_minutes: int = 60,
+        lead_hours: float = 24.0,
+        epoch: Optional[datetime] = None,
+        max_distance_km: float = math.inf,
+        max_wait_hours: float = 72.0,
+    ) -> None:
+        if not workshops:
+            raise ValueError("at least one workshop is required")
+        if any(w.capacity <= 0 for w in workshops):
+            raise ValueError("workshop capacity must be positive")
+        self.workshops = tuple(workshops)
+        self.slot = timedelta(minutes=slot_minutes)
+        self.lead = timedelta(hours=lead_hours)
+        if epoch is None:
+            epoch = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        self.epoch = epoch
+        self.max_distance_km = max_distance_km
+        self.max_wait = timedelta(hours=max_wait_hours)
+        self.index: Optional[WorkshopIndex] = None
+        if any(math.isfinite(w.lat) and math.isfinite(w.lon) for w in self.workshops):
+            self.index = WorkshopIndex(
+                [w.lat for w in self.workshops], [w.lon for w in self.workshops]
+            )
+        self._index = {w.workshop_id: i for i, w in enumerate(self.workshops)}
+        self._full = [(1 << w.capacity) - 1 for w in self.workshops]
+        self._lock = threading.Lock()
+        self._clear()
+
+    @classmethod
+    def from_config(
+        cls, config: SchedulingConfig, workshops: Sequence[Workshop] = DEFAULT_WORKSHOPS
+    ) -> "SchedulingEngine":
+        if config.workshops_path:
+            workshops = load_workshops(config.workshops_path)
+        return cls(
+            workshops,
+            config.slot_minutes,
+            config.lead_hours,
+            max_distance_km=config.max_distance_km or math.inf,
+            max_wait_hours=config.max_wait_hours,
+        )
+
+    def _clear(self) -> None:
+        # per workshop: slot -> bitmask of occupied bays
+        self._calendars: List[Dict[int, int]] = [{} for _ in self.workshops]
+        self._next = [0] * len(self.workshops)  # earliest slot with a free bay
+        self._free: List[Tuple[int, int]] = [(0, i) for i in range(len(self.workshops))]
+        self._floor = 0
+        self._pending: List[Tuple[int, float, int, ServiceRequest]] = []
+        self._seq = itertools.count()
+        self._bookings: Dict[str, Booking] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def __len__(self) -> int:
+        return len(self._bookings)
+
+    def slot_of(self, when: datetime) -> int:
+        return max(0, -(-(when - self.epoch) // self.slot))  # first slot starting at or after
+
+    def slot_time(self, slot: int) -> datetime:
+        return self.epoch + slot * self.slot
+
+    def get(self, vehicle_id: str) -> Optional[Booking]:
+        with self._lock:
+            return self._bookings.get(vehicle_id)
+
+    # -- calendar ---------------------------------------------------------
+
+    def _first_free(self, w: int, slot: int) -> int:
+        calendar, full = self._calendars[w], self._full[w]
+        while calendar.get(slot, 0) == full:
+            slot += 1
+        return slot
+
+    def _move(self, w: int, slot: int) -> None:
+        self._next[w] = slot
+        heapq.heappush(self._free, (slot, w))
+
+    def _earliest(self) -> Tuple[int, int]:
+        """(slot, workshop) of the earliest free bay at or after the floor."""
+
+        while True:
+            slot, w = self._free[0]
+            if slot != self._next[w]:
+                heapq.heappop(self._free)  # superseded entry
+            elif slot < self._floor:
+                heapq.heappop(self._free)
+                self._move(w, self._first_free(w, self._floor))
+            else:
+                return slot, w
+
+    def _next_free(self, w: int) -> int:
+        """Workshop `w`'s earliest free slot at or after the floor."""
+
+        if self._next[w] < self._floor:
+            self._move(w, self._first_free(w, self._floor))
+        return self._next[w]
+
+    def _raise_floor(self, request: ServiceRequest, now: datetime) -> datetime:
+        requested_at = request.requested_at or now
+        self._floor = max(self._floor, self.slot_of(requested_at + self.lead))
+        return requested_at
+
+    def _last_slot(self, before: datetime) -> int:
+        """Index of the last slot starting at or before `before`."""
+
+        return (before - self.epoch) // self.slot
+
+    def _nearest_open(
+        self, location: Tuple[float, float], last_slot: int, k: int = 1
+    ) -> List[Tuple[float, int]]:
+        """Up to `k` (distance, workshop) pairs with a free bay by `last_slot`."""
+
+        return self.index.nearest(
+            location[0],
+            location[1],
+            k,
+            accept=lambda w: self._next_free(w) <= last_slot,
+            max_km=self.max_distance_km,
+        )
+
+    def _nearest_for(self, request: ServiceRequest, now: datetime) -> Optional[int]:
+        if request.location is None or self.index is None:
+            return None
+        requested_at = self._raise_floor(request, now)
+        last_slot = self._last_slot(requested_at + self.lead + self.max_wait)
+        if math.isfinite(request.time_to_failure_days):
+            deadline = self._last_slot(requested_at + timedelta(days=request.time_to_failure_days))
+            if deadline >= self._floor:  # an unreachable deadline falls back to the wait limit
+                last_slot = deadline
+        found = self._nearest_open(request.location, last_slot)
+        return found[0][1] if found else None
+
+    def _allocate(
+        self, request: ServiceRequest, now: datetime, w: Optional[int] = None
+    ) -> Booking:
+        requested_at = self._raise_floor(request, now)
+        if w is None:
+            slot, w = self._earliest()
+        else:
+            slot = self._next_free(w)
+        workshop = self.workshops[w]
+        mask = self._calendars[w].get(slot, 0)
+        bay = (~mask & (mask + 1)).bit_length() - 1  # lowest free bay
+        mask |= 1 << bay
+        self._calendars[w][slot] = mask
+        if mask == self._full[w]:
+            self._move(w, self._first_free(w, slot + 1))  # leaves the old heap entry stale
+        deadline = None
+        if math.isfinite(request.time_to_failure_days):
+            deadline = requested_at + timedelta(days=request.time_to_failure_days)
+        booking = Booking(
+            vehicle_id=request.vehicle_id,
+            workshop_id=workshop.workshop_id,
+            workshop_name=workshop.name,
+            slot_index=slot,
+            slot_time=self.slot_time(slot),
+            mechanic_id=workshop.mechanic(bay),
+            priority_tag=request.priority_tag,
+            deadline=deadline,
+            bay=bay,
+        )
+        self._bookings[request.vehicle_id] = booking
+        return booking
+
+    def _release(self, booking: Booking) -> None:
+        w = self._index[booking.workshop_id]
+        calendar = self._calendars[w]
+        mask = calendar.get(booking.slot_index, 0) & ~(1 << booking.bay)
+        if mask:
+            calendar[booking.slot_index] = mask
+        else:
+            calendar.pop(booking.slot_index, None)
+        if self._floor <= booking.slot_index < self._next[w]:
+            self._move(w, booking.slot_index)
+
+    # -- public API -------------------------------------------------------
+
+    def book(self, request: ServiceRequest, now: Optional[datetime] = None) -> Booking:
+        """Book the earliest free bay for `request` right away.
+
+        An existing booking is kept unless the priority rose or the floor has
+        passed its slot; either way the vehicle is rebooked from the floor.
+        """
+
+        now = now or datetime.utcnow()
+        with self._lock:
+            existing = self._bookings.get(request.vehicle_id)
+            if existing is not None:
+                self._raise_floor(request, now)
+                stale = existing.slot_index < self._floor
+                rank = request.sort_key()[0]
+                if not stale and rank >= PRIORITY_RANK.get(existing.priority_tag, 0):
+                    return existing
+                self._release(existing)
+            # nearest workshop free in time, else the earliest free bay anywhere
+            return self._allocate(request, now, self._nearest_for(request, now))
+
+    def nearest_available(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        before: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> List[Tuple[Workshop, float, datetime]]:
+        """The `k` nearest workshops with a free bay starting by `before`.
+
+        Returns `(workshop, distance_km, next_free_slot)` triples, nearest first.
+        `before` defaults to the lead time plus `max_wait_hours` from now.
+        """
+
+        if self.index is None:
+            return []
+        now = now or datetime.utcnow()
+        with self._lock:
+            self._floor = max(self._floor, self.slot_of(now + self.lead))
+            last_slot = self._last_slot(before or now + self.lead + self.max_wait)
+            return [
+                (self.workshops[w], distance, self.slot_time(self._next[w]))
+                for distance, w in self._nearest_open((lat, lon), last_slot, k)
+            ]
+
+    def cancel(self, vehicle_id: str) -> Optional[Booking]:
+        """Free a vehicle's bay; returns the cancelled booking, if any."""
+
+        with self._lock:
+            booking = self._bookings.pop(vehicle_id, None)
+            if booking is not None:
+                self._release(booking)
+            return booking
+
+    def submit(self, request: ServiceRequest) -> None:
+        """Queue a request for the next `dispatch`."""
+
+        rank, ttf = request.sort_key()
+        with self._lock:
+            heapq.heappush(self._pending, (rank, ttf, next(self._seq), request))
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def dispatch(
+        self, limit: Optional[int] = None, now: Optional[datetime] = None
+    ) -> List[Booking]:
+        """Book queued requests most-urgent first; at most `limit` of them.
+
+        Dispatched vehicles' current bookings are released up front, so an urgent
+        request can take a bay a less urgent one held. A vehicle queued twice is
+        served once, at its most urgent request. Placement follows `book`.
+        """
+
+        now = now or datetime.utcnow()
+        with self._lock:
+            batch: Dict[str, ServiceRequest] = {}
+            while self._pending and (limit is None or len(batch) < limit):
+                request = heapq.heappop(self._pending)[3]
+                batch.setdefault(request.vehicle_id, request)
+            for vehicle_id in batch:
+                existing = self._bookings.pop(vehicle_id, None)
+                if existing is not None:
+                    self._release(existing)
+            return [
+                self._allocate(request, now, self._nearest_for(request, now))
+                for request in batch.values()
+            ]
+
+    def book_batch(
+        self,
+        requests: Sequence[ServiceRequest],
+        choose: Callable[[ServiceRequest, np.ndarray], int],
+        now: Optional[datetime] = None,
+    ) -> List[Booking]:
+        """Re-book `requests` together, most urgent first.
+
+        The requests' current bookings are released up front, then for each request
+        `choose(request, slots)` picks a workshop index, where `slots[w]` is workshop
+        `w`'s earliest free slot index.
+        """
+
+        now = now or datetime.utcnow()
+        ordered = sorted(requests, key=ServiceRequest.sort_key)
+        with self._lock:
+            for request in ordered:
+                existing = self._bookings.pop(request.vehicle_id, None)
+                if existing is not None:
+                    self._release(existing)
+            bookings = []
+            for request in ordered:
+                self._raise_floor(request, now)
+                slots = np.fromiter(
+                    (self._next_free(w) for w in range(len(self.workshops))),
+                    dtype=np.int64,
+                    count=len(self.workshops),
+                )
+                bookings.append(self._allocate(request, now, choose(request, slots)))
+        return bookings
+
+    def expire(self, before: datetime) -> int:
+        """Drop bookings in slots that start before `before`; returns how many."""
+
+        cutoff = self.slot_of(before)
+        with self._lock:
+            done = [v for v, b in self._bookings.items() if b.slot_index < cutoff]
+            for vehicle_id in done:
+                del self._bookings[vehicle_id]
+            for calendar in self._calendars:
+                for slot in [s for s in calendar if s < cutoff]:
+                    del calendar[slot]
+            self._floor = max(self._floor, cutoff)
+            return len(done)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Bookings and next free slot per workshop."""
+
+        with self._lock:
+            per_workshop = {w.workshop_id: 0 for w in self.workshops}
+            for booking in self._bookings.values():
+                per_workshop[booking.workshop_id] += 1
+            return {
+                "bookings": len(self._bookings),
+                "pending": len(self._pending),
+                "workshops": [
+                    {
+                        "workshopId": w.workshop_id,
+                        "name": w.name,
+                        "capacity": w.capacity,
+                        "bookings": per_workshop[w.workshop_id],
+                        "nextFreeSlot": self.slot_time(max(self._next[i], self._floor)).isoformat(),
+                    }
+                    for i, w in enumerate(self.workshops)
+                ],
+            }
+
+
+_engine: Optional[SchedulingEngine] = None
+_engine_config: Optional[SchedulingConfig] = None
+_engine_lock = threading.Lock()
+
+
+def configure_scheduling(config: SchedulingConfig) -> SchedulingEngine:
+    """Process-wide engine for `config`; kept (with its bookings) while it is unchanged."""
+
+    global _engine, _engine_config
+    with _engine_lock:
+        if _engine is None or _engine_config != config:
+            _engine = SchedulingEngine.from_config(config)
+            _engine_config = config
+        return _engine
+
+
+def get_scheduling_engine() -> SchedulingEngine:
+    """The engine shared by every workflow run in this process."""
+
+    with _engine_lock:
+        engine = _engine
+    return engine if engine is not None else configure_scheduling(SchedulingConfig())
@@ -0,0 +1,162 @@
+"""Fleet-wide batch assignment of scheduled vehicles to workshops.
+
+Vehicles are booked one at a time inside their own graph run, each taking the
+earliest free bay. This stage re-assigns every scheduled vehicle of a fleet run
+in one pass, minimising per vehicle
+
+    priority weight * wait (hours)
+    + inventory_weight_hours * (1 - inventory_score)
+    + distance_weight_hours_per_km * distance, for vehicles with a location
+    + deadline_penalty_hours if the slot starts after the time to failure
+
+over the workshops' next free slots. Vehicles are placed most urgent first.
+For the waiting term alone this order is optimal, because the cost
+`weight * wait` is Monge when vehicles are sorted by weight and slots by start
+time. The inventory and deadline terms are weighed per vehicle against each
+workshop's current queue, so each placement costs O(workshops) with NumPy.
+
+Without `batch_optimize`, `dispatch_schedules` still re-books a fleet run's
+vehicles together, through the engine's request heap: most urgent first, each
+at the nearest workshop free in time or else the earliest bay.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import SchedulingConfig
+from app.scheduling.engine import Booking, SchedulingEngine, ServiceRequest
+from app.state import SystemState
+
+PRIORITY_WEIGHT = {"high": 4.0, "medium": 2.0, "low": 1.0}
+
+
+def optimize_assignments(
+    engine: SchedulingEngine,
+    requests: Sequence[ServiceRequest],
+    inventory_weight_hours: float = 24.0,
+    deadline_penalty_hours: float = 720.0,
+    now: Optional[datetime] = None,
+    distance_weight_hours_per_km: float = 0.0,
+) -> List[Booking]:
+    """Book `requests` together on `engine`, replacing their current bookings."""
+
+    now = now or datetime.utcnow()
+    slot_hours = engine.slot.total_seconds() / 3600.0
+    inventory = np.array([w.inventory_score for w in engine.workshops], dtype=np.float64)
+    inventory_cost = inventory_weight_hours * (1.0 - np.clip(inventory, 0.0, 1.0))
+
+    def choose(request: ServiceRequest, slots: np.ndarray) -> int:
+        weight = PRIORITY_WEIGHT.get(request.priority_tag, 1.0)
+        cost = weight * slot_hours * (slots - slots.min()) + inventory_cost
+        if np.isfinite(request.time_to_failure_days):
+            requested_at = request.requested_at or now
+            hours_left = request.time_to_failure_days * 24.0 - (
+                (engine.epoch - requested_at).total_seconds() / 3600.0
+            )
+            cost = cost + deadline_penalty_hours * (slots * slot_hours > hours_left)
+        located = request.location is not None and engine.index is not None
+        if located and distance_weight_hours_per_km:
+            distances = engine.index.distances_km(*request.location)
+            # workshops without coordinates count as the farthest located one
+            distances = np.where(np.isnan(distances), np.nanmax(distances), distances)
+            cost = cost + distance_weight_hours_per_km * distances
+        return int(np.argmin(cost))
+
+    return engine.book_batch(requests, choose, now)
+
+
+def scheduled_requests(states: Sequence[SystemState]) -> List[ServiceRequest]:
+    """One request per state the scheduling node booked, with its priority."""
+
+    requests = []
+    for state in states:
+        schedule = state.get("schedule")
+        if not schedule:
+            continue
+        diagnosis = state.get("diagnosis") or {}
+        requests.append(
+            ServiceRequest(
+                vehicle_id=state.get("vehicle_id", "V-NA"),
+                priority_tag=schedule.get("priority_tag", "low"),
+                time_to_failure_days=diagnosis.get("estimated_time_to_failure_days", np.inf),
+                location=state.get("location"),
+            )
+        )
+    return requests
+
+
+def with_booking(state: SystemState, booking: Booking) -> SystemState:
+    """Copy of `state` with its schedule (and manufacturing payload) set to `booking`."""
+
+    updated = dict(state)
+    updated["schedule"] = booking.to_schedule_info()
+    payload = state.get("manufacturing_payload")
+    if payload:
+        updated["manufacturing_payload"] = {**payload, "workshop_id": booking.workshop_id}
+    return updated  # type: ignore[return-value]
+
+
+def dispatch_schedules(
+    states: Sequence[SystemState],
+    engine: SchedulingEngine,
+    now: Optional[datetime] = None,
+) -> List[SystemState]:
+    """Book every scheduled vehicle in `states` through `engine.submit`/`dispatch`.
+
+    Graph runs book vehicles in whatever order they finish, and process-pool
+    workers book into their own engines; this places the whole batch on `engine`
+    by priority. Returns the states in input order, scheduled ones as copies.
+    """
+
+    requests = scheduled_requests(states)
+    if not requests:
+        return list(states)
+    for request in requests:
+        engine.submit(request)
+    bookings: Dict[str, Booking] = {b.vehicle_id: b for b in engine.dispatch(now=now)}
+    updated = []
+    for state in states:
+        vehicle_id = state.get("vehicle_id", "V-NA")
+        # a concurrent dispatch may have served this vehicle's request
+        booking = bookings.get(vehicle_id) or engine.get(vehicle_id)
+        if state.get("schedule") and booking is not None:
+            state = with_booking(state, booking)
+        updated.append(state)
+    return updated
+
+
+def rebalance_schedules(
+    states: Sequence[SystemState],
+    engine: SchedulingEngine,
+    config: SchedulingConfig,
+) -> List[SystemState]:
+    """Re-assign every scheduled vehicle in `states` in one batch.
+
+    Returns the states in input order; scheduled ones are copies carrying their
+    new `ScheduleInfo`, the rest are passed through untouched.
+    """
+
+    requests = scheduled_requests(states)
+    if not requests:
+        return list(states)
+    bookings: Dict[str, Booking] = {
+        b.vehicle_id: b
+        for b in optimize_assignments(
+            engine,
+            requests,
+            config.inventory_weight_hours,
+            config.deadline_penalty_hours,
+            distance_weight_hours_per_km=config.distance_weight_hours_per_km,
+        )
+    }
+    return [
+        with_booking(state, bookings[state["vehicle_id"]])
+        if state.get("schedule") and state.get("vehicle_id") in bookings
+        else state
+        for state in states
+    ]
+
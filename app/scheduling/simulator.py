@@ -0,0 +1,355 @@
+"""Discrete-event simulation of the workshop network for capacity planning.
+
+Diagnosed vehicles arrive (synthesized from an anomaly rate with optional
+spikes, or replayed from workflow states) and are routed as the scheduling
+engine books a vehicle without a location: to the workshop whose next free
+slot comes first, lowest index on ties (`earliest_slot`). Another routing
+policy, e.g. `least_load`, can be passed to `simulate`. Arrivals carry no
+coordinates, so the engine's nearest-workshop choice is not modelled. Each
+workshop serves its queue in the engine's priority order: severity, then
+failure deadline. Repair times are resampled from
+`FeedbackInfo.repair_time_hours` history. Time is continuous, in hours.
+
+Arrivals are pre-sorted arrays merged with one heap of repair completions, so
+each event costs a heap operation or two. The report gives wait times and SLA
+misses by priority, plus queue lengths and utilization per workshop. A miss is
+a vehicle whose repair starts after its estimated time to failure.
+
+Run ``python -m app.scheduling.simulator --help`` for a synthetic scenario.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.scheduling.engine import DEFAULT_WORKSHOPS, PRIORITY_RANK, Workshop, load_workshops
+from app.state import SystemState
+from app.telemetry import frame_from_state
+
+PRIORITIES = tuple(sorted(PRIORITY_RANK, key=PRIORITY_RANK.__getitem__))
+# (low, high) diagnosis severity per level; ttf = max(1, (1 - severity) * 60) days
+SEVERITY_RANGES = {"high": (0.7, 1.0), "medium": (0.4, 0.7), "low": (0.0, 0.4)}
+DEFAULT_REPAIR_HOURS = (2.0, 5.0)  # uniform range the feedback agent reports
+
+# (vehicles waiting or in service, bays) per workshop -> chosen workshop index
+RoutingPolicy = Callable[[Sequence[int], Sequence[int]], int]
+
+
+def earliest_slot(load: Sequence[int], capacity: Sequence[int]) -> int:
+    """The engine's choice: the workshop whose earliest free slot comes first.
+
+    Each full round of bays ahead of the vehicle pushes its start back by a slot,
+    and ties go to the lowest index, as in the engine's (slot, workshop) heap.
+    """
+
+    return min(range(len(load)), key=lambda k: load[k] // capacity[k])
+
+
+def least_load(load: Sequence[int], capacity: Sequence[int]) -> int:
+    """The workshop with the least work per bay."""
+
+    return min(range(len(load)), key=lambda k: load[k] / capacity[k])
+
+
+ROUTING_POLICIES: Dict[str, RoutingPolicy] = {
+    "earliest-slot": earliest_slot,
+    "least-load": least_load,
+}
+
+
+@dataclass
+class Arrivals:
+    """Diagnosed vehicles as parallel arrays, sorted by `time_h`."""
+
+    time_h: np.ndarray  # float64 hours from the start of the run
+    priority: np.ndarray  # int8 rank, see PRIORITY_RANK
+    ttf_days: np.ndarray  # float64
+    repair_h: np.ndarray  # float64
+
+    def __len__(self) -> int:
+        return len(self.time_h)
+
+    def sorted(self) -> "Arrivals":
+        order = np.argsort(self.time_h, kind="stable")
+        return Arrivals(
+            self.time_h[order], self.priority[order], self.ttf_days[order], self.repair_h[order]
+        )
+
+
+def _repair_sample(
+    rng: np.random.Generator, n: int, history: Optional[Sequence[float]]
+) -> np.ndarray:
+    if history is not None and len(history):
+        return rng.choice(np.asarray(history, dtype=np.float64), n)
+    return rng.uniform(*DEFAULT_REPAIR_HOURS, n)
+
+
+def synthesize_arrivals(
+    fleet_size: int,
+    days: float,
+    anomaly_rate: float,
+    severity_mix: Optional[Mapping[str, float]] = None,
+    spikes: Sequence[Tuple[float, float, float]] = (),
+    repair_history: Optional[Sequence[float]] = None,
+    seed: int = 0,
+) -> Arrivals:
+    """Poisson arrivals of diagnosed vehicles.
+
+    Each vehicle needs a workshop with probability `anomaly_rate` per day, and
+    `spikes` multiply that rate by `factor` between `(start_day, end_day, factor)`.
+    Severity levels follow `severity_mix` (default: the 30/70 high/medium split
+    of scheduled vehicles). TTF uses the diagnosis agent's formula.
+    """
+
+    rng = np.random.default_rng(seed)
+    mix = dict(severity_mix or {"high": 0.3, "medium": 0.7})
+    hours = int(np.ceil(days * 24))
+    rate = np.full(hours, fleet_size * anomaly_rate / 24.0)
+    for start_day, end_day, factor in spikes:
+        rate[int(start_day * 24) : int(end_day * 24)] *= factor
+    counts = rng.poisson(rate)
+    n = int(counts.sum())
+    time_h = np.repeat(np.arange(hours, dtype=np.float64), counts) + rng.random(n)
+
+    levels = list(mix)
+    p = np.array([mix[level] for level in levels], dtype=np.float64)
+    choice = rng.choice(len(levels), n, p=p / p.sum())
+    lows = np.array([SEVERITY_RANGES[level][0] for level in levels])[choice]
+    highs = np.array([SEVERITY_RANGES[level][1] for level in levels])[choice]
+    severity = rng.uniform(lows, highs)
+    ranks = np.array([PRIORITY_RANK[level] for level in levels], dtype=np.int8)[choice]
+    return Arrivals(
+        time_h=time_h,
+        priority=ranks,
+        ttf_days=np.maximum(1.0, (1.0 - severity) * 60.0),
+        repair_h=_repair_sample(rng, n, repair_history),
+    ).sorted()
+
+
+def repair_history(states: Sequence[SystemState]) -> np.ndarray:
+    """Repair times recorded by the feedback node."""
+
+    return np.array(
+        [
+            state["feedback"]["repair_time_hours"]
+            for state in states
+            if (state.get("feedback") or {}).get("repair_time_hours") is not None
+        ],
+        dtype=np.float64,
+    )
+
+
+def arrivals_from_states(
+    states: Sequence[SystemState],
+    history: Optional[Sequence[float]] = None,
+    seed: int = 0,
+) -> Arrivals:
+    """Replay scheduled vehicles, arriving at their latest telemetry timestamp.
+
+    Each vehicle's own recorded repair time is used when it has one; the others
+    are drawn from `history` (default: every recorded repair time).
+    """
+
+    rng = np.random.default_rng(seed)
+    scheduled = [s for s in states if s.get("schedule") and s.get("diagnosis")]
+    if history is None:
+        history = repair_history(states)
+    sampled = _repair_sample(rng, len(scheduled), history)
+    last_seen, repair = [], []
+    for state, fallback in zip(scheduled, sampled.tolist()):
+        timestamps = frame_from_state(state).timestamps
+        last_seen.append(float(timestamps[-1]) if len(timestamps) else 0.0)
+        recorded = (state.get("feedback") or {}).get("repair_time_hours")
+        repair.append(fallback if recorded is None else recorded)
+    last_seen = np.asarray(last_seen, dtype=np.float64)
+    return Arrivals(
+        time_h=(last_seen - (last_seen.min() if len(last_seen) else 0.0)) / 3600.0,
+        priority=np.array(
+            [PRIORITY_RANK.get(s["schedule"].get("priority_tag", "low"), 2) for s in scheduled],
+            dtype=np.int8,
+        ),
+        ttf_days=np.array(
+            [s["diagnosis"].get("estimated_time_to_failure_days", np.inf) for s in scheduled],
+            dtype=np.float64,
+        ),
+        repair_h=np.asarray(repair, dtype=np.float64),
+    ).sorted()
+
+
+@dataclass
+class SimulationReport:
+    """Outcome of one simulated run; times in hours."""
+
+    events: int
+    simulated_hours: float
+    wall_seconds: float
+    by_priority: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    by_workshop: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "events": self.events,
+            "simulatedHours": round(self.simulated_hours, 3),
+            "wallSeconds": round(self.wall_seconds, 4),
+            "eventsPerSecond": round(self.events_per_second),
+            "byPriority": self.by_priority,
+            "byWorkshop": self.by_workshop,
+        }
+
+
+def simulate(
+    arrivals: Arrivals,
+    workshops: Sequence[Workshop] = DEFAULT_WORKSHOPS,
+    lead_hours: float = 0.0,
+    routing: RoutingPolicy = earliest_slot,
+) -> SimulationReport:
+    """Run `arrivals` through `workshops` until every vehicle is repaired.
+
+    A vehicle joins a queue `lead_hours` after it arrives (the booking lead time),
+    but its failure deadline counts from the arrival itself. `routing` picks its
+    workshop from the current load; the default follows the scheduling engine.
+    """
+
+    started = time.perf_counter()
+    n, n_workshops = len(arrivals), len(workshops)
+    ready = (arrivals.time_h + lead_hours).tolist()
+    deadline = (arrivals.time_h + arrivals.ttf_days * 24.0).tolist()
+    priority = arrivals.priority.tolist()
+    repair = arrivals.repair_h.tolist()
+    start = [0.0] * n
+
+    capacity = [w.capacity for w in workshops]
+    free = list(capacity)
+    queues: List[List[Tuple[int, float, int]]] = [[] for _ in range(n_workshops)]
+    load = [0] * n_workshops  # vehicles waiting or in service
+    queue_area = [0.0] * n_workshops
+    busy_area = [0.0] * n_workshops
+    last_change = [0.0] * n_workshops
+    max_queue = [0] * n_workshops
+    served = [0] * n_workshops
+    completions: List[Tuple[float, int, int]] = []  # (time, workshop, vehicle)
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    i, events, now = 0, 0, 0.0
+    while i < n or completions:
+        if completions and (i >= n or completions[0][0] <= ready[i]):
+            now, w, _ = heappop(completions)
+            dt = now - last_change[w]
+            queue_area[w] += len(queues[w]) * dt
+            busy_area[w] += (capacity[w] - free[w]) * dt
+            last_change[w] = now
+            load[w] -= 1
+            if queues[w]:
+                v = heappop(queues[w])[2]
+                start[v] = now
+                heappush(completions, (now + repair[v], w, v))
+            else:
+                free[w] += 1
+        else:
+            v = i
+            i += 1
+            now = ready[v]
+            w = routing(load, capacity)
+            dt = now - last_change[w]
+            queue_area[w] += len(queues[w]) * dt
+            busy_area[w] += (capacity[w] - free[w]) * dt
+            last_change[w] = now
+            load[w] += 1
+            served[w] += 1
+            if free[w]:
+                free[w] -= 1
+                start[v] = now
+                heappush(completions, (now + repair[v], w, v))
+            else:
+                heappush(queues[w], (priority[v], deadline[v], v))
+                if len(queues[w]) > max_queue[w]:
+                    max_queue[w] = len(queues[w])
+        events += 1
+
+    horizon = now
+    start_arr = np.asarray(start)
+    wait = start_arr - np.asarray(ready)
+    missed = start_arr > np.asarray(deadline)
+    by_priority = {}
+    for name in PRIORITIES:
+        mask = arrivals.priority == PRIORITY_RANK[name]
+        count = int(mask.sum())
+        if not count:
+            continue
+        waits = wait[mask]
+        by_priority[name] = {
+            "vehicles": count,
+            "meanWaitHours": round(float(waits.mean()), 3),
+            "p50WaitHours": round(float(np.percentile(waits, 50)), 3),
+            "p95WaitHours": round(float(np.percentile(waits, 95)), 3),
+            "maxWaitHours": round(float(waits.max()), 3),
+            "slaMisses": int(missed[mask].sum()),
+            "slaMissRate": round(float(missed[mask].mean()), 4),
+        }
+    by_workshop = {
+        w.workshop_id: {
+            "capacity": w.capacity,
+            "served": served[k],
+            "utilization": round(busy_area[k] / (w.capacity * horizon), 4) if horizon else 0.0,
+            "meanQueueLength": round(queue_area[k] / horizon, 3) if horizon else 0.0,
+            "maxQueueLength": max_queue[k],
+        }
+        for k, w in enumerate(workshops)
+    }
+    return SimulationReport(
+        events=events,
+        simulated_hours=horizon,
+        wall_seconds=time.perf_counter() - started,
+        by_priority=by_priority,
+        by_workshop=by_workshop,
+    )
+
+
+def _parse_spike(text: str) -> Tuple[float, float, float]:
+    start_day, end_day, factor = (float(part) for part in text.split(":"))
+    return start_day, end_day, factor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fleet-size", type=int, default=10_000)
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--anomaly-rate", type=float, default=0.002, help="per vehicle per day")
+    parser.add_argument(
+        "--spike",
+        type=_parse_spike,
+        action="append",
+        default=[],
+        help="START_DAY:END_DAY:FACTOR rate multiplier; repeatable",
+    )
+    parser.add_argument("--workshops", default="", help="workshops.csv (default: built-in)")
+    parser.add_argument("--lead-hours", type=float, default=24.0)
+    parser.add_argument(
+        "--routing", choices=sorted(ROUTING_POLICIES), default="earliest-slot"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workshops = load_workshops(args.workshops) if args.workshops else DEFAULT_WORKSHOPS
+    arrivals = synthesize_arrivals(
+        args.fleet_size, args.days, args.anomaly_rate, spikes=args.spike, seed=args.seed
+    )
+    report = simulate(
+        arrivals, workshops, lead_hours=args.lead_hours, routing=ROUTING_POLICIES[args.routing]
+    )
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
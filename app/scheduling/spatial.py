@@ -0,0 +1,136 @@
+"""Uniform-grid spatial index over workshop coordinates.
+
+Coordinates are projected to kilometres with an equirectangular projection
+around the workshops' mean latitude. That is accurate to well under 1% across
+a region a few hundred kilometres wide, which is what a service network covers.
+A query walks square rings of grid cells outward from the query point. A
+candidate is final once it is closer than the nearest unvisited ring. With
+cells sized to hold a few workshops, a k-nearest query touches O(k) cells
+however many workshops are indexed.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.320
+
+
+class WorkshopIndex:
+    """Nearest-neighbour lookups over `(lat, lon)` points, by position index."""
+
+    def __init__(
+        self,
+        lats: Sequence[float],
+        lons: Sequence[float],
+        cell_km: Optional[float] = None,
+    ) -> None:
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self._n = len(lats)
+        self.ids = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        if not len(self.ids):
+            raise ValueError("no workshop has coordinates")
+        self._km_per_deg_lon = KM_PER_DEG_LON_EQUATOR * math.cos(
+            math.radians(float(lats[self.ids].mean()))
+        )
+        x, y = self._project(lats[self.ids], lons[self.ids])
+        self._x, self._y = x, y
+        if cell_km is None:
+            # about two workshops per cell on average
+            area = max((x.max() - x.min()) * (y.max() - y.min()), 1.0)
+            cell_km = max(math.sqrt(2.0 * area / len(self.ids)), 1e-3)
+        self.cell_km = cell_km
+        cx = np.floor(x / cell_km).astype(np.int64)
+        cy = np.floor(y / cell_km).astype(np.int64)
+        self._points = list(zip(x.tolist(), y.tolist(), self.ids.tolist()))
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, key in enumerate(zip(cx.tolist(), cy.tolist())):
+            self._cells.setdefault(key, []).append(i)
+        self._bounds = (int(cx.min()), int(cx.max()), int(cy.min()), int(cy.max()))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _project(self, lats, lons):
+        return np.asarray(lons) * self._km_per_deg_lon, np.asarray(lats) * KM_PER_DEG_LAT
+
+    def distances_km(self, lat: float, lon: float) -> np.ndarray:
+        """Distance to every position, in position order; NaN where unindexed."""
+
+        x, y = self._project(lat, lon)
+        out = np.full(self._n, np.nan)
+        out[self.ids] = np.hypot(self._x - x, self._y - y)
+        return out
+
+    def _ring(self, cx: int, cy: int, r: int) -> Iterator[Tuple[int, int]]:
+        """Cells at Chebyshev distance `r` from `(cx, cy)`, clipped to the grid."""
+
+        x0, x1, y0, y1 = self._bounds
+        if r == 0:
+            yield cx, cy
+            return
+        left, right = max(cx - r, x0), min(cx + r, x1)
+        for y in (cy - r, cy + r):
+            if y0 <= y <= y1:
+                for x in range(left, right + 1):
+                    yield x, y
+        bottom, top = max(cy - r + 1, y0), min(cy + r - 1, y1)
+        for x in (cx - r, cx + r):
+            if x0 <= x <= x1:
+                for y in range(bottom, top + 1):
+                    yield x, y
+
+    def iter_nearest(self, lat: float, lon: float) -> Iterator[Tuple[float, int]]:
+        """`(distance_km, position)` pairs in increasing distance, lazily."""
+
+        x, y = float(lon) * self._km_per_deg_lon, float(lat) * KM_PER_DEG_LAT
+        cx, cy = int(math.floor(x / self.cell_km)), int(math.floor(y / self.cell_km))
+        x0, x1, y0, y1 = self._bounds
+        max_ring = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        # distance from the query to the edge of its own cell bounds ring r's inner side
+        edge = min(
+            x - cx * self.cell_km,
+            (cx + 1) * self.cell_km - x,
+            y - cy * self.cell_km,
+            (cy + 1) * self.cell_km - y,
+        )
+        # rings closer than the grid's bounding box hold no cells
+        first_ring = max(0, x0 - cx, cx - x1, y0 - cy, cy - y1)
+        heap: List[Tuple[float, int]] = []
+        for r in range(first_ring, max_ring + 1):
+            for key in self._ring(cx, cy, r):
+                for i in self._cells.get(key, ()):
+                    px, py, position = self._points[i]
+                    heapq.heappush(heap, (math.hypot(px - x, py - y), position))
+            # every point in rings > r is at least this far away
+            reach = edge + r * self.cell_km
+            while heap and heap[0][0] <= reach:
+                yield heapq.heappop(heap)
+        while heap:
+            yield heapq.heappop(heap)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+        accept: Optional[Callable[[int], bool]] = None,
+        max_km: float = math.inf,
+    ) -> List[Tuple[float, int]]:
+        """Up to `k` closest positions within `max_km` for which `accept` holds."""
+
+        found = []
+        for distance, i in self.iter_nearest(lat, lon):
+            if distance > max_km:
+                break
+            if accept is None or accept(i):
+                found.append((distance, i))
+                if len(found) == k:
+                    break
+        return found
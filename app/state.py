@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Literal, Optional, TypedDict
+from typing import Dict, List, Literal, Optional, Sequence, Tuple, TypedDict
+
+from app.telemetry import TelemetryFrame
+from app.utils.logging_utils import LogEvent
 
 
 class VehicleMetricPoint(TypedDict):
@@ -41,6 +44,7 @@ class ScheduleInfo(TypedDict, total=False):
     slot_time: str
     mechanic_id: str
     priority_tag: Literal["low", "medium", "high"]
+    meets_deadline: bool  # slot starts before the estimated time to failure
 
 
 class FeedbackInfo(TypedDict, total=False):
@@ -76,14 +80,18 @@ class SystemState(TypedDict, total=False):
     model: str
     variant: str
     user_segment: str
-    raw_metrics: List[VehicleMetricPoint]
+    location: Tuple[float, float]  # (lat, lon), when known; used for workshop choice
+    raw_metrics: Sequence[VehicleMetricPoint]  # list, or MetricPointsView over `telemetry`
+    telemetry: TelemetryFrame
     anomalies: List[AnomalyInfo]
+    anomalies_precomputed: bool  # set by fleet scoring; anomaly node reuses `anomalies`
     diagnosis: Optional[DiagnosisInfo]
     customer_notified: bool
     notification_message: str
     schedule: Optional[ScheduleInfo]
     feedback: Optional[FeedbackInfo]
     manufacturing_payload: Optional[ManufacturingPayload]
-    logs: List[str]
+    logs: List[LogEvent]  # formatted lazily; see app.utils.logging_utils
+    logs_dropped: int  # events beyond LoggingConfig.max_events
 
 
@@ -0,0 +1,186 @@
+"""Streaming telemetry ingest into fixed-capacity per-vehicle ring buffers."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.telemetry import TelemetryFrame
+from app.utils.data_loader import value_to_float
+
+
+class TelemetryRingBuffer:
+    """The most recent `capacity` telemetry points of one vehicle.
+
+    Storage is preallocated, so memory per vehicle is constant no matter how long
+    the vehicle keeps reporting; appending overwrites the oldest row in O(1).
+    Metrics missing from a point carry the previous value forward.
+    """
+
+    __slots__ = (
+        "capacity",
+        "metric_names",
+        "_index",
+        "_values",
+        "_timestamps",
+        "_head",
+        "_size",
+    )
+
+    def __init__(self, capacity: int, metric_names: Sequence[str]) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.metric_names = tuple(sorted(metric_names))
+        self._index = {name: i for i, name in enumerate(self.metric_names)}
+        self._values = np.zeros((capacity, len(self.metric_names)), dtype=np.float32)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._head = 0  # next slot to write
+        self._size = 0
+
+    @classmethod
+    def from_frame(cls, frame: TelemetryFrame, capacity: int) -> "TelemetryRingBuffer":
+        """Seed a buffer with the tail of existing telemetry."""
+
+        buffer = cls(capacity, frame.metric_names)
+        tail = min(len(frame), capacity)
+        if tail:
+            buffer._values[:tail] = frame.values[-tail:]
+            buffer._timestamps[:tail] = frame.timestamps[-tail:]
+        buffer._size = tail
+        buffer._head = tail % capacity
+        return buffer
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, metrics: Mapping[str, object]) -> np.ndarray:
+        """Write one point; returns a copy of its row after carrying values forward."""
+
+        slot = self._head
+        if self._size:
+            self._values[slot] = self._values[(slot - 1) % self.capacity]
+        for name, value in metrics.items():
+            col = self._index.get(name)
+            if col is not None:
+                self._values[slot, col] = value_to_float(name, value)
+        self._timestamps[slot] = timestamp
+        self._head = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return self._values[slot].copy()
+
+    def frame(self) -> TelemetryFrame:
+        """Chronological snapshot of the buffer (a copy, safe to hand to the graph)."""
+
+        if self._size < self.capacity:
+            values = self._values[: self._size].copy()
+            timestamps = self._timestamps[: self._size].copy()
+        else:
+            order = np.r_[self._head : self.capacity, 0 : self._head]
+            values = self._values[order]
+            timestamps = self._timestamps[order]
+        return TelemetryFrame(values, timestamps, self.metric_names).sorted_by_time()
+
+
+class StreamingIngestor:
+    """Per-vehicle ring buffers plus the set of vehicles awaiting re-scoring.
+
+    `ingest` is cheap and thread-safe; a micro-batch worker calls `drain` to pick up
+    the changed vehicles, oldest first, together with when their first pending
+    point arrived so ingest-to-alert latency can be reported, and the rows that
+    arrived since the last drain so a stateful scorer can advance by just those.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        seed: Optional[Callable[[str], Optional[TelemetryFrame]]] = None,
+        metric_names: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.capacity = capacity
+        self._seed = seed
+        # schema for vehicles without stored telemetry, so they match the model input
+        self.metric_names = tuple(metric_names) if metric_names is not None else None
+        self._buffers: Dict[str, TelemetryRingBuffer] = {}
+        # vehicle_id -> monotonic time of its first not-yet-scored point
+        self._pending: Dict[str, float] = {}
+        # vehicle_id -> rows appended since it was last drained, in arrival order
+        self._new_rows: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.points_ingested = 0
+
+    def _buffer_for(
+        self, vehicle_id: str, metrics: Mapping[str, object]
+    ) -> TelemetryRingBuffer:
+        buffer = self._buffers.get(vehicle_id)
+        if buffer is None:
+            frame = self._seed(vehicle_id) if self._seed is not None else None
+            if frame is not None and frame.n_metrics:
+                buffer = TelemetryRingBuffer.from_frame(frame, self.capacity)
+            else:
+                buffer = TelemetryRingBuffer(self.capacity, self.metric_names or list(metrics))
+            self._buffers[vehicle_id] = buffer
+        return buffer
+
+    def ingest(self, points: Iterable[Tuple[str, float, Mapping[str, object]]]) -> int:
+        """Append (vehicle_id, timestamp, metrics) points; returns how many were taken."""
+
+        now = time.monotonic()
+        accepted = 0
+        with self._lock:
+            for vehicle_id, timestamp, metrics in points:
+                row = self._buffer_for(vehicle_id, metrics).append(timestamp, metrics)
+                self._pending.setdefault(vehicle_id, now)
+                rows = self._new_rows.get(vehicle_id)
+                if rows is None:
+                    rows = self._new_rows[vehicle_id] = deque(maxlen=self.capacity)
+                rows.append(row)
+                accepted += 1
+            self.points_ingested += accepted
+        return accepted
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def oldest_pending_age(self) -> float:
+        """Seconds the longest-waiting vehicle has been pending (0 when idle)."""
+
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            # dicts keep insertion order, so the first entry waited longest
+            return time.monotonic() - next(iter(self._pending.values()))
+
+    def drain(
+        self, max_vehicles: int
+    ) -> List[Tuple[str, TelemetryFrame, float, np.ndarray]]:
+        """Take up to `max_vehicles` changed vehicles as (vehicle_id, frame, since, new_rows).
+
+        `new_rows` holds the points appended since the previous drain, shaped
+        (n, metrics) in arrival order (at most the buffer capacity). `frame` is
+        sorted by timestamp, so late points need not be its last rows.
+        """
+
+        with self._lock:
+            batch = list(itertools.islice(self._pending, max_vehicles))
+            drained = []
+            for vehicle_id in batch:
+                since = self._pending.pop(vehicle_id)
+                buffer = self._buffers[vehicle_id]
+                rows = self._new_rows.pop(vehicle_id, None)
+                new_rows = (
+                    np.stack(rows)
+                    if rows
+                    else np.empty((0, len(buffer.metric_names)), dtype=np.float32)
+                )
+                drained.append((vehicle_id, buffer.frame(), since, new_rows))
+        return drained
+
+    def __contains__(self, vehicle_id: object) -> bool:
+        return vehicle_id in self._buffers
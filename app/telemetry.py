@@ -0,0 +1,176 @@
+"""Columnar, array-backed telemetry shared by the workflow nodes."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, List, Sequence, Tuple, overload
+
+import numpy as np
+import torch
+
+if TYPE_CHECKING:  # app.state imports this module for the SystemState schema
+    from app.state import VehicleMetricPoint
+
+
+@dataclass(frozen=True, eq=False)
+class TelemetryFrame:
+    """One vehicle's telemetry as a float32 `(seq_len, n_metrics)` matrix.
+
+    Metric names are kept sorted so the column order is the model's feature order,
+    and `as_tensor` can hand the buffer to torch without a copy. Frames are treated
+    as immutable: nodes derive new frames instead of writing into `values`.
+    """
+
+    values: np.ndarray
+    timestamps: np.ndarray
+    metric_names: Tuple[str, ...]
+    _index: Dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.values.ndim != 2 or self.values.shape[1] != len(self.metric_names):
+            raise ValueError(
+                f"values shaped {self.values.shape} do not match "
+                f"{len(self.metric_names)} metric names"
+            )
+        if self.timestamps.shape != (self.values.shape[0],):
+            raise ValueError("timestamps must hold one entry per row of values")
+        object.__setattr__(
+            self, "_index", {name: i for i, name in enumerate(self.metric_names)}
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        values: np.ndarray,
+        timestamps: np.ndarray,
+        metric_names: Sequence[str],
+    ) -> "TelemetryFrame":
+        """Build a frame, reordering columns into sorted metric-name order if needed."""
+
+        names = tuple(metric_names)
+        order = sorted(range(len(names)), key=names.__getitem__)
+        values = np.asarray(values, dtype=np.float32)
+        if order != list(range(len(names))):
+            values = values[:, order]
+            names = tuple(names[i] for i in order)
+        return cls(
+            values=np.ascontiguousarray(values),
+            timestamps=np.asarray(timestamps, dtype=np.float64),
+            metric_names=names,
+        )
+
+    @classmethod
+    def from_points(cls, points: Sequence[VehicleMetricPoint]) -> "TelemetryFrame":
+        """Convert dict-of-points telemetry, keeping only numeric metrics."""
+
+        if not points:
+            return cls.empty()
+        # keep only numeric metrics (dataset has categorical DTCs)
+        names = tuple(
+            sorted(
+                name
+                for name, value in points[0]["metrics"].items()
+                if isinstance(value, (int, float))
+            )
+        )
+        values = np.array(
+            [[float(p["metrics"].get(name, 0.0)) for name in names] for p in points],
+            dtype=np.float32,
+        ).reshape(len(points), len(names))
+        timestamps = np.array(
+            [float(p.get("timestamp", i)) for i, p in enumerate(points)], dtype=np.float64
+        )
+        return cls(values=values, timestamps=timestamps, metric_names=names)
+
+    @classmethod
+    def empty(cls) -> "TelemetryFrame":
+        return cls(
+            values=np.empty((0, 0), dtype=np.float32),
+            timestamps=np.empty(0, dtype=np.float64),
+            metric_names=(),
+        )
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    @property
+    def n_metrics(self) -> int:
+        return len(self.metric_names)
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one metric over time."""
+
+        return self.values[:, self._index[name]]
+
+    def sorted_by_time(self) -> "TelemetryFrame":
+        """Return the frame in timestamp order; returns `self` when already ordered."""
+
+        if len(self) < 2 or bool(np.all(np.diff(self.timestamps) >= 0)):
+            return self
+        order = np.argsort(self.timestamps, kind="stable")
+        return TelemetryFrame(
+            values=np.ascontiguousarray(self.values[order]),
+            timestamps=self.timestamps[order],
+            metric_names=self.metric_names,
+        )
+
+    def as_tensor(self) -> torch.Tensor:
+        """Zero-copy `(seq_len, n_metrics)` float32 tensor over `values`."""
+
+        return torch.from_numpy(self.values)
+
+    def point(self, i: int) -> VehicleMetricPoint:
+        row = self.values[i].tolist()
+        return {
+            "timestamp": float(self.timestamps[i]),
+            "metrics": dict(zip(self.metric_names, row)),
+        }
+
+    def to_points(self) -> List[VehicleMetricPoint]:
+        return [self.point(i) for i in range(len(self))]
+
+
+class MetricPointsView(Sequence["VehicleMetricPoint"]):
+    """Read-only `raw_metrics` adapter that builds point dicts from a frame on access."""
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: TelemetryFrame) -> None:
+        self.frame = frame
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @overload
+    def __getitem__(self, i: int) -> VehicleMetricPoint: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[VehicleMetricPoint]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.frame.point(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.frame.point(i)
+
+    def __iter__(self) -> Iterator[VehicleMetricPoint]:
+        for i in range(len(self)):
+            yield self.frame.point(i)
+
+    def __repr__(self) -> str:
+        return f"MetricPointsView(points={len(self)}, metrics={self.frame.n_metrics})"
+
+
+def frame_from_state(state) -> TelemetryFrame:
+    """Return the state's frame, deriving one from `raw_metrics` for dict-only states."""
+
+    frame = state.get("telemetry")
+    if frame is not None:
+        return frame
+    raw_points = state.get("raw_metrics", []) or []
+    if isinstance(raw_points, MetricPointsView):
+        return raw_points.frame
+    return TelemetryFrame.from_points(raw_points)
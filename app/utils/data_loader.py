@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from app.state import SystemState, VehicleMetricPoint
+from app.state import SystemState
+from app.telemetry import MetricPointsView, TelemetryFrame
 
 
 @dataclass
@@ -26,7 +31,7 @@ def _parse_details(details: str) -> VehicleMetadata:
     return VehicleMetadata(vehicle_id=parts[0], vehicle_model=parts[1], supplier_id=parts[2])
 
 
-def _value_to_float(parameter: str, value) -> float:
+def value_to_float(parameter: str, value) -> float:
     """Convert raw values to float for model ingestion."""
 
     if parameter == "DTC_Code":
@@ -38,59 +43,275 @@ def _value_to_float(parameter: str, value) -> float:
         return 0.0
 
 
-def load_vehicle_timeseries(
-    path: str, customer_filter: Optional[str] = None
-) -> Dict[str, SystemState]:
-    """Load Excel and emit per-vehicle SystemState fragments with raw_metrics populated.
+# Bump when the layout of the parsed-fleet cache changes.
+_CACHE_FORMAT_VERSION = 2
 
-    Args:
-        path: Path to AgenticAI_Final_Format_Dataset.xlsx.
-        customer_filter: Optional specific customer id to filter to.
+# Optional per-vehicle columns of the wide table, between the metadata and timestamps
+_COORDINATE_COLUMNS = ("Latitude", "Longitude")
 
-    Returns:
-        Dict keyed by vehicle_id containing SystemState slices ready for graph invocation.
+
+@dataclass
+class ParsedFleet:
+    """Whole-fleet telemetry as dense arrays, the unit stored in the parsed cache.
+
+    `values[v]` is vehicle v's `(seq_len, n_metrics)` matrix over the shared
+    `timestamps`; `present[v]` marks which of the sorted `metric_names` it reports.
+    `lats`/`lons` locate each vehicle, NaN when the source has no coordinates.
     """
 
-    df = pd.read_excel(path)
-    timestamp_cols = list(df.columns[4:])
+    customers: np.ndarray
+    vehicle_ids: np.ndarray
+    models: np.ndarray
+    supplier_ids: np.ndarray
+    lats: np.ndarray
+    lons: np.ndarray
+    timestamps: np.ndarray
+    metric_names: np.ndarray
+    values: np.ndarray
+    present: np.ndarray
 
-    if customer_filter:
-        df = df[df["Customer"] == customer_filter]
 
-    vehicles: Dict[str, SystemState] = {}
+def _read_table(path: str) -> pd.DataFrame:
+    if str(path).lower().endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+def _convert_values(parameters: np.ndarray, raw: pd.DataFrame) -> np.ndarray:
+    """Vectorized `value_to_float` over a (rows, timestamps) block."""
+
+    out = np.empty(raw.shape, dtype=np.float32)
+
+    is_dtc = parameters == "DTC_Code"
+    if is_dtc.any():
+        dtc = raw[is_dtc]
+        text = dtc.astype(str).apply(lambda col: col.str.strip().str.lower())
+        no_code = text.isin(["none", "", "nan"]) | dtc.isna()
+        out[is_dtc] = (~no_code).to_numpy(dtype=np.float32)
+
+    if (~is_dtc).any():
+        block = raw[~is_dtc]
+        numeric = block.apply(pd.to_numeric, errors="coerce")
+        # unparseable cells become 0.0; genuinely missing cells stay NaN
+        numeric = numeric.mask(numeric.isna() & block.notna(), 0.0)
+        out[~is_dtc] = numeric.to_numpy(dtype=np.float32)
+
+    return out
 
-    for (customer, details), block in df.groupby(["Customer", "Details"]):
+
+def parse_fleet_table(df: pd.DataFrame) -> ParsedFleet:
+    """Convert the wide dataset table (one row per vehicle and parameter) to arrays.
+
+    Optional `Latitude`/`Longitude` columns give each vehicle's location; the
+    first row of a vehicle supplies it.
+    """
+
+    timestamp_cols = [c for c in df.columns[4:] if c not in _COORDINATE_COLUMNS]
+    # Parse each timestamp header once instead of once per vehicle
+    timestamps = np.array(
+        [pd.to_datetime(ts).timestamp() for ts in timestamp_cols], dtype=np.float64
+    )
+
+    parameters = df["Parameters"].astype(str).to_numpy()
+    converted = _convert_values(parameters, df[timestamp_cols])
+    metric_names = sorted(set(parameters))
+    metric_index = {name: i for i, name in enumerate(metric_names)}
+    param_idx = np.array([metric_index[p] for p in parameters], dtype=np.int64)
+    if all(c in df.columns for c in _COORDINATE_COLUMNS):
+        coordinates = df[list(_COORDINATE_COLUMNS)].apply(pd.to_numeric, errors="coerce")
+        coordinates = coordinates.to_numpy(dtype=np.float64)
+    else:
+        coordinates = np.full((len(df), 2), np.nan)
+
+    groups = df.groupby(["Customer", "Details"], sort=True).indices
+    # Later groups win on duplicate vehicle ids, as with dict assignment
+    by_vehicle: Dict[str, Tuple[str, VehicleMetadata, np.ndarray]] = {}
+    for (customer, details), rows in groups.items():
         meta = _parse_details(details)
-        metrics_per_ts: Dict[str, Dict[str, float]] = {str(ts): {} for ts in timestamp_cols}
-
-        for _, row in block.iterrows():
-            parameter = row["Parameters"]
-            for ts in timestamp_cols:
-                metrics_per_ts[str(ts)][parameter] = _value_to_float(parameter, row[ts])
-
-        raw_points: List[VehicleMetricPoint] = []
-        for ts in timestamp_cols:
-            ts_str = str(ts)
-            point = VehicleMetricPoint(
-                timestamp=pd.to_datetime(ts).timestamp(),
-                metrics=metrics_per_ts[ts_str],
+        by_vehicle.pop(meta.vehicle_id, None)
+        by_vehicle[meta.vehicle_id] = (str(customer), meta, rows)
+
+    n_vehicles, seq_len, n_metrics = len(by_vehicle), len(timestamps), len(metric_names)
+    values = np.zeros((n_vehicles, seq_len, n_metrics), dtype=np.float32)
+    present = np.zeros((n_vehicles, n_metrics), dtype=bool)
+    customers, vehicle_ids, models, supplier_ids = [], [], [], []
+    locations = np.empty((n_vehicles, 2), dtype=np.float64)
+
+    for v, (customer, meta, rows) in enumerate(by_vehicle.values()):
+        # rows are in file order, so a repeated parameter keeps its last row
+        values[v][:, param_idx[rows]] = converted[rows].T
+        present[v, param_idx[rows]] = True
+        customers.append(customer)
+        vehicle_ids.append(meta.vehicle_id)
+        models.append(meta.vehicle_model)
+        supplier_ids.append(meta.supplier_id)
+        locations[v] = coordinates[rows[0]]
+
+    return ParsedFleet(
+        customers=np.array(customers, dtype=str),
+        vehicle_ids=np.array(vehicle_ids, dtype=str),
+        models=np.array(models, dtype=str),
+        supplier_ids=np.array(supplier_ids, dtype=str),
+        lats=locations[:, 0],
+        lons=locations[:, 1],
+        timestamps=timestamps,
+        metric_names=np.array(metric_names, dtype=str),
+        values=values,
+        present=present,
+    )
+
+
+def parsed_cache_path(path: str) -> str:
+    """Location of the parsed-fleet cache kept next to the source file."""
+
+    return f"{path}.parsed.npz"
+
+
+def _source_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_parsed_cache(path: str) -> Optional[ParsedFleet]:
+    """Return the cached fleet if it was built from the current source file."""
+
+    cache_path = parsed_cache_path(path)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            if int(data["format_version"]) != _CACHE_FORMAT_VERSION:
+                return None
+            size, mtime_ns = _source_signature(path)
+            if (int(data["source_size"]), int(data["source_mtime_ns"])) != (size, mtime_ns):
+                # Touched or copied but possibly unchanged: fall back to the content hash
+                if int(data["source_size"]) != size:
+                    return None
+                if str(data["source_digest"]) != _file_digest(path):
+                    return None
+            return ParsedFleet(**{f.name: data[f.name] for f in fields(ParsedFleet)})
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_parsed_cache(path: str, fleet: ParsedFleet) -> None:
+    size, mtime_ns = _source_signature(path)
+    cache_path = parsed_cache_path(path)
+    tmp_path = None
+    try:
+        # a private temp file per writer, so concurrent writers never share one
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(os.path.abspath(cache_path)),
+            prefix=f"{os.path.basename(cache_path)}.",
+            suffix=".npz",
+            delete=False,
+        ) as handle:
+            tmp_path = handle.name
+            np.savez(
+                handle,
+                format_version=np.int64(_CACHE_FORMAT_VERSION),
+                source_size=np.int64(size),
+                source_mtime_ns=np.int64(mtime_ns),
+                source_digest=np.array(_file_digest(path)),
+                **{f.name: getattr(fleet, f.name) for f in fields(ParsedFleet)},
             )
-            raw_points.append(point)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only data directory just means no cache; parsing still succeeded.
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_parsed_fleet(path: str, use_cache: bool = True) -> ParsedFleet:
+    """Parse the dataset, reusing the binary cache when the source is unchanged."""
 
-        vehicles[meta.vehicle_id] = {
-            "vehicle_id": meta.vehicle_id,
-            "model": meta.vehicle_model,
+    if use_cache:
+        cached = _load_parsed_cache(path)
+        if cached is not None:
+            return cached
+    fleet = parse_fleet_table(_read_table(path))
+    if use_cache:
+        _write_parsed_cache(path, fleet)
+    return fleet
+
+
+def vehicle_location(lat: float, lon: float) -> Optional[Tuple[float, float]]:
+    """`(lat, lon)` for `SystemState.location`, or None when either is missing."""
+
+    lat, lon = float(lat), float(lon)
+    if np.isfinite(lat) and np.isfinite(lon):
+        return lat, lon
+    return None
+
+
+def fleet_to_states(
+    fleet: ParsedFleet, customer_filter: Optional[str] = None
+) -> Dict[str, SystemState]:
+    """Build per-vehicle SystemState fragments whose frames view the fleet arrays."""
+
+    all_present = fleet.present.all(axis=1)
+    metric_names = tuple(str(name) for name in fleet.metric_names)
+    vehicles: Dict[str, SystemState] = {}
+
+    for v, vehicle_id in enumerate(fleet.vehicle_ids.tolist()):
+        customer = str(fleet.customers[v])
+        if customer_filter and customer != customer_filter:
+            continue
+        if all_present[v]:
+            frame = TelemetryFrame(fleet.values[v], fleet.timestamps, metric_names)
+        else:
+            cols = np.flatnonzero(fleet.present[v])
+            frame = TelemetryFrame(
+                np.ascontiguousarray(fleet.values[v][:, cols]),
+                fleet.timestamps,
+                tuple(metric_names[c] for c in cols),
+            )
+
+        state: SystemState = {
+            "vehicle_id": vehicle_id,
+            "model": str(fleet.models[v]),
             "variant": "unknown",
             "user_segment": "retail",
-            "customer_id": str(customer),  # Include customer ID from Excel
-            "supplier_id": meta.supplier_id,
-            "raw_metrics": raw_points,
+            "customer_id": customer,  # Include customer ID from Excel
+            "supplier_id": str(fleet.supplier_ids[v]),
+            "raw_metrics": MetricPointsView(frame),
+            "telemetry": frame,
             "logs": [],
         }
+        location = vehicle_location(fleet.lats[v], fleet.lons[v])
+        if location is not None:
+            state["location"] = location
+        vehicles[vehicle_id] = state
 
     return vehicles
 
 
+def load_vehicle_timeseries(
+    path: str, customer_filter: Optional[str] = None, use_cache: bool = True
+) -> Dict[str, SystemState]:
+    """Load Excel and emit per-vehicle SystemState fragments with raw_metrics populated.
+
+    Args:
+        path: Path to AgenticAI_Final_Format_Dataset.xlsx (or the same layout as CSV).
+        customer_filter: Optional specific customer id to filter to.
+        use_cache: Read/write the parsed-fleet `.npz` cache next to `path`.
+
+    Returns:
+        Dict keyed by vehicle_id containing SystemState slices ready for graph invocation.
+        Telemetry is held in a columnar `TelemetryFrame`; `raw_metrics` is a view over it.
+    """
+
+    return fleet_to_states(load_parsed_fleet(path, use_cache=use_cache), customer_filter)
+
+
 def feature_names_from_dataset(path: str) -> List[str]:
     """Extract ordered feature names based on the first telemetry row."""
 
@@ -0,0 +1,275 @@
+"""Persisted reconstruction errors and vectorized threshold what-ifs.
+
+Scoring runs record each vehicle's per-metric reconstruction errors here (and,
+optionally, per-timestep errors). Anomalies, diagnosis severity levels and fleet
+stats can then be re-derived for any thresholds in one vectorized pass over the
+`(vehicles, metrics)` error matrix, with no model inference.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.fleet_stats import VehicleContribution
+
+_STORE_FORMAT_VERSION = 1
+
+
+class ReconstructionErrorStore:
+    """Dense float32 `(vehicles, metrics)` matrix of the latest errors per vehicle.
+
+    Metrics a vehicle does not report, and vehicles the pre-filter cleared without
+    scoring, hold NaN and never count as anomalous. Errors are only valid for the
+    model version they were computed with, so the owner clears the store when the
+    model changes. Per-timestep errors (`keep_timesteps`) stay in memory only;
+    `save` persists the per-metric matrix.
+    """
+
+    def __init__(self, keep_timesteps: bool = False, model_version: str = "") -> None:
+        self.keep_timesteps = keep_timesteps
+        self.model_version = model_version
+        self._lock = threading.Lock()
+        self._metric_index: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []  # row -> vehicle_id
+        self._errors = np.full((0, 0), np.nan, dtype=np.float32)
+        # vehicle_id -> (seq_len, n_metrics) float16 squared errors, in its own metric order
+        self._timesteps: Dict[str, Tuple[Tuple[str, ...], np.ndarray]] = {}
+
+    @property
+    def metric_names(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._metric_index, key=self._metric_index.__getitem__))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, vehicle_id: object) -> bool:
+        return vehicle_id in self._rows
+
+    def _ensure_capacity(self, rows: int, cols: int) -> None:
+        have_rows, have_cols = self._errors.shape
+        if rows <= have_rows and cols <= have_cols:
+            return
+        grown = np.full(
+            (max(rows, 2 * have_rows, 64), max(cols, have_cols)), np.nan, dtype=np.float32
+        )
+        grown[:have_rows, :have_cols] = self._errors
+        self._errors = grown
+
+    def _row(self, vehicle_id: str) -> int:
+        row = self._rows.get(vehicle_id)
+        if row is None:
+            row = len(self._rows)
+            self._rows[vehicle_id] = row
+            self._ids.append(vehicle_id)
+            self._ensure_capacity(row + 1, self._errors.shape[1])
+        return row
+
+    def record(
+        self,
+        vehicle_id: str,
+        metric_names: Sequence[str],
+        errors: Sequence[float],
+        timestep_errors: Optional[np.ndarray] = None,
+    ) -> None:
+        """Store one vehicle's per-metric errors, replacing earlier ones."""
+
+        with self._lock:
+            for name in metric_names:
+                if name not in self._metric_index:
+                    self._metric_index[name] = len(self._metric_index)
+            self._ensure_capacity(len(self._rows) + 1, len(self._metric_index))
+            row = self._row(vehicle_id)
+            self._errors[row] = np.nan
+            cols = [self._metric_index[name] for name in metric_names]
+            self._errors[row, cols] = np.asarray(errors, dtype=np.float32)
+            if self.keep_timesteps and timestep_errors is not None:
+                self._timesteps[vehicle_id] = (
+                    tuple(metric_names),
+                    np.asarray(timestep_errors, dtype=np.float16),
+                )
+
+    def record_unscored(self, vehicle_id: str) -> None:
+        """Mark a vehicle as seen but not scored (e.g. cleared by the pre-filter)."""
+
+        with self._lock:
+            row = self._row(vehicle_id)
+            self._errors[row] = np.nan
+            self._timesteps.pop(vehicle_id, None)
+
+    def discard(self, vehicle_id: str) -> None:
+        """Forget a vehicle, e.g. when its telemetry changed."""
+
+        with self._lock:
+            row = self._rows.pop(vehicle_id, None)
+            self._timesteps.pop(vehicle_id, None)
+            if row is None:
+                return
+            # move the last row into the hole to keep the matrix dense
+            moved = self._ids.pop()
+            last = len(self._ids)
+            if row != last:
+                self._errors[row] = self._errors[last]
+                self._rows[moved] = row
+                self._ids[row] = moved
+            self._errors[last] = np.nan
+
+    def clear(self, model_version: Optional[str] = None) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._ids.clear()
+            self._metric_index.clear()
+            self._timesteps.clear()
+            self._errors = np.full((0, 0), np.nan, dtype=np.float32)
+            if model_version is not None:
+                self.model_version = model_version
+
+    def matrix(self) -> Tuple[List[str], Tuple[str, ...], np.ndarray]:
+        """(vehicle_ids, metric_names, errors) with errors shaped (vehicles, metrics)."""
+
+        with self._lock:
+            vehicle_ids = list(self._ids)
+            errors = self._errors[: len(vehicle_ids), : len(self._metric_index)].copy()
+            return vehicle_ids, self.metric_names, errors
+
+    def timestep_errors(self, vehicle_id: str) -> Optional[Tuple[Tuple[str, ...], np.ndarray]]:
+        return self._timesteps.get(vehicle_id)
+
+    def save(self, path: str) -> None:
+        """Write the store as a compressed `.npz`, atomically."""
+
+        vehicle_ids, metric_names, errors = self.matrix()
+        arrays = {
+            "format_version": np.int64(_STORE_FORMAT_VERSION),
+            "model_version": np.array(self.model_version),
+            "vehicle_ids": np.array(vehicle_ids, dtype=str),
+            "metric_names": np.array(metric_names, dtype=str),
+            "errors": errors,
+        }
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, model_version: Optional[str] = None) -> "ReconstructionErrorStore":
+        """Load a saved store; returns an empty one if it is missing or stale."""
+
+        store = cls(model_version=model_version or "")
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["format_version"]) != _STORE_FORMAT_VERSION:
+                    return store
+                saved_version = str(data["model_version"])
+                if model_version is not None and saved_version != model_version:
+                    return store
+                store.model_version = saved_version
+                metric_names = [str(n) for n in data["metric_names"]]
+                for vehicle_id, row in zip(data["vehicle_ids"].tolist(), data["errors"]):
+                    present = ~np.isnan(row)
+                    if present.any():
+                        store.record(
+                            vehicle_id,
+                            [n for n, p in zip(metric_names, present) if p],
+                            row[present],
+                        )
+                    else:
+                        store.record_unscored(vehicle_id)
+        except (OSError, KeyError, ValueError):
+            return cls(model_version=model_version or "")
+        return store
+
+
+def what_if(
+    vehicle_ids: Sequence[str],
+    metric_names: Sequence[str],
+    errors: np.ndarray,
+    anomaly_threshold: float,
+    medium_severity_threshold: float,
+    high_severity_threshold: float,
+    metric_parts: Mapping[str, str],
+    feedback: Optional[Mapping[str, VehicleContribution]] = None,
+    default_part: str = "General Inspection Required",
+    include_vehicles: bool = True,
+) -> Dict[str, object]:
+    """Re-derive anomalies, diagnoses and fleet stats for new thresholds.
+
+    Mirrors `infer_anomalies` (severity = error / (2 * threshold), capped at 1),
+    the diagnosis agent (most severe anomaly picks the part and severity level) and
+    the engagement branch (medium/high severity gets scheduled), vectorized over
+    the whole `(vehicles, metrics)` error matrix. Feedback does not depend on
+    thresholds, so servicing, accuracy and ratings come from the vehicles' current
+    `feedback` contributions.
+
+    Returns:
+        {"stats": `/api/stats`-shaped dict, "vehicles": per-vehicle derivations}.
+    """
+
+    anomalous = errors > anomaly_threshold  # NaN compares False
+    severity = np.where(
+        anomalous, np.minimum(errors / (anomaly_threshold * 2.0), 1.0), -np.inf
+    )
+    has_anomaly = anomalous.any(axis=1)
+    primary = np.argmax(severity, axis=1)  # ties -> first metric, like max()
+    primary_severity = severity[np.arange(len(vehicle_ids)), primary]
+    levels = np.where(
+        primary_severity >= high_severity_threshold,
+        "high",
+        np.where(primary_severity >= medium_severity_threshold, "medium", "low"),
+    )
+    parts = np.array([metric_parts.get(name, default_part) for name in metric_names] or [""])
+    primary_parts = parts[primary]
+    scheduled = has_anomaly & (levels != "low")
+
+    part_failures: Dict[str, int] = {}
+    names, counts = np.unique(primary_parts[has_anomaly], return_counts=True)
+    for name, count in zip(names.tolist(), counts.tolist()):
+        part_failures[name] = count
+    severity_distribution = {
+        level: int(np.count_nonzero(has_anomaly & (levels == level)))
+        for level in ("high", "medium", "low")
+    }
+
+    serviced = correct = 0
+    rating_sum = 0.0
+    for vehicle_id in vehicle_ids:
+        outcome = (feedback or {}).get(vehicle_id)
+        if outcome is not None and outcome.serviced:
+            serviced += 1
+            correct += outcome.diagnosis_correct
+            rating_sum += outcome.rating
+
+    vehicles = []
+    for i, vehicle_id in enumerate(vehicle_ids if include_vehicles else ()):
+        cols = np.flatnonzero(anomalous[i])
+        vehicles.append(
+            {
+                "vehicleId": vehicle_id,
+                "anomalies": [
+                    {
+                        "metric": metric_names[j],
+                        "severity": float(severity[i, j]),
+                        "error": float(errors[i, j]),
+                    }
+                    for j in cols
+                ],
+                "severityLevel": str(levels[i]) if has_anomaly[i] else None,
+                "partName": str(primary_parts[i]) if has_anomaly[i] else None,
+                "scheduled": bool(scheduled[i]),
+            }
+        )
+
+    stats = {
+        "totalVehicles": len(vehicle_ids),
+        "anomaliesDetected": int(has_anomaly.sum()),
+        "scheduled": int(scheduled.sum()),
+        "serviced": serviced,
+        "diagnosisAccuracy": round(correct / serviced * 100, 2) if serviced else 0,
+        "avgRating": round(rating_sum / serviced, 2) if serviced else 0,
+        "partFailures": part_failures,
+        "severityDistribution": severity_distribution,
+    }
+    return {"stats": stats, "vehicles": vehicles}
@@ -0,0 +1,134 @@
+"""Incrementally maintained fleet-wide statistics over final workflow states."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.state import SystemState
+
+
+@dataclass(frozen=True)
+class VehicleContribution:
+    """What one vehicle's final state adds to the fleet aggregate."""
+
+    has_anomalies: bool
+    scheduled: bool
+    serviced: bool
+    diagnosis_correct: bool
+    rating: float
+    part_name: Optional[str]
+    severity_level: Optional[str]
+
+    @classmethod
+    def from_state(cls, state: SystemState) -> "VehicleContribution":
+        diagnosis = state.get("diagnosis")
+        feedback = state.get("feedback")
+        return cls(
+            has_anomalies=bool(state.get("anomalies")),
+            scheduled=bool(state.get("schedule")),
+            serviced=bool(feedback),
+            diagnosis_correct=bool(feedback and feedback.get("diagnosis_correct", False)),
+            rating=float(feedback.get("customer_rating", 0.0)) if feedback else 0.0,
+            part_name=diagnosis.get("part_name", "Unknown") if diagnosis else None,
+            severity_level=diagnosis.get("severity_level", "low") if diagnosis else None,
+        )
+
+
+class FleetAggregate:
+    """Running totals behind `/api/stats`, updated in O(1) per vehicle result.
+
+    `update` retracts the vehicle's previous contribution (if any) before
+    applying the new one, so re-running a vehicle never double counts.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._contributions: Dict[str, VehicleContribution] = {}
+        self._reset_totals()
+
+    def _reset_totals(self) -> None:
+        self.total_vehicles = 0
+        self.anomalies_detected = 0
+        self.scheduled = 0
+        self.serviced = 0
+        self.correct_diagnoses = 0
+        self.rating_sum = 0.0
+        self.part_failures: Dict[str, int] = {}
+        self.severity_counts: Dict[str, int] = {"high": 0, "medium": 0, "low": 0}
+
+    def _apply(self, c: VehicleContribution, sign: int) -> None:
+        self.total_vehicles += sign
+        self.anomalies_detected += sign * c.has_anomalies
+        self.scheduled += sign * c.scheduled
+        self.serviced += sign * c.serviced
+        self.correct_diagnoses += sign * c.diagnosis_correct
+        self.rating_sum += sign * c.rating
+        if c.part_name is not None:
+            count = self.part_failures.get(c.part_name, 0) + sign
+            if count:
+                self.part_failures[c.part_name] = count
+            else:
+                self.part_failures.pop(c.part_name, None)
+        if c.severity_level is not None:
+            self.severity_counts[c.severity_level] = (
+                self.severity_counts.get(c.severity_level, 0) + sign
+            )
+
+    def update(self, vehicle_id: str, state: SystemState) -> None:
+        """Replace a vehicle's contribution with the one derived from `state`."""
+
+        contribution = VehicleContribution.from_state(state)
+        with self._lock:
+            previous = self._contributions.get(vehicle_id)
+            if previous == contribution:
+                return
+            if previous is not None:
+                self._apply(previous, -1)
+            self._apply(contribution, 1)
+            self._contributions[vehicle_id] = contribution
+
+    def remove(self, vehicle_id: str) -> None:
+        """Retract a vehicle that left the fleet."""
+
+        with self._lock:
+            previous = self._contributions.pop(vehicle_id, None)
+            if previous is not None:
+                self._apply(previous, -1)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._contributions.clear()
+            self._reset_totals()
+
+    def contributions(self) -> Dict[str, VehicleContribution]:
+        """Copy of every vehicle's current contribution."""
+
+        with self._lock:
+            return dict(self._contributions)
+
+    def __contains__(self, vehicle_id: str) -> bool:
+        return vehicle_id in self._contributions
+
+    def __len__(self) -> int:
+        return len(self._contributions)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the `/api/stats` payload for the current totals."""
+
+        with self._lock:
+            diagnosis_accuracy = (
+                self.correct_diagnoses / self.serviced * 100 if self.serviced > 0 else 0
+            )
+            avg_rating = self.rating_sum / self.serviced if self.serviced else 0
+            return {
+                "totalVehicles": self.total_vehicles,
+                "anomaliesDetected": self.anomalies_detected,
+                "scheduled": self.scheduled,
+                "serviced": self.serviced,
+                "diagnosisAccuracy": round(diagnosis_accuracy, 2),
+                "avgRating": round(avg_rating, 2),
+                "partFailures": dict(self.part_failures),
+                "severityDistribution": dict(self.severity_counts),
+            }
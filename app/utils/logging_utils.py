@@ -1,21 +1,162 @@
-"""Helper utilities for structured logging within the workflow state."""
+"""Structured, lazily formatted log events within the workflow state.
+
+Agents call `append_log(state, "template %s", arg, code=...)`. The template and its
+arguments are stored as a `LogEvent` with a monotonic-ns timestamp; nothing is
+formatted until someone reads the event (`str(event)` or `format_logs`). Events
+below the configured level are dropped before any work is done, each run keeps
+at most `LoggingConfig.max_events` events, and with `sink="buffer"` events go to
+a bounded process-wide side buffer instead of the graph state.
+"""
 
 from __future__ import annotations
 
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import List
+from typing import TYPE_CHECKING, Any, Deque, Iterable, List, Optional, Tuple
+
+from app.config import LoggingConfig
+
+if TYPE_CHECKING:
+    from app.state import SystemState
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LOG_LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING}
+LOG_SINKS = ("state", "buffer", "off")
+
+# wall clock at monotonic zero, so events can be rendered as UTC on demand
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+class LogEvent:
+    """One workflow log event; the message is formatted only when read."""
+
+    __slots__ = ("ts_ns", "level", "code", "template", "args", "vehicle_id")
+
+    def __init__(
+        self,
+        ts_ns: int,
+        level: int,
+        code: str,
+        template: str,
+        args: Tuple[Any, ...] = (),
+        vehicle_id: Optional[str] = None,
+    ) -> None:
+        self.ts_ns = ts_ns  # time.monotonic_ns()
+        self.level = level
+        self.code = code
+        self.template = template
+        self.args = args
+        self.vehicle_id = vehicle_id
+
+    @property
+    def message(self) -> str:
+        return self.template % self.args if self.args else self.template
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp((self.ts_ns + _WALL_OFFSET_NS) / 1e9, tz=timezone.utc)
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "level": self.level,
+            "code": self.code,
+            "vehicleId": self.vehicle_id,
+            "message": self.message,
+        }
+
+    def __str__(self) -> str:
+        return f"[{self.timestamp.isoformat()}] {self.message}"
+
+    def __repr__(self) -> str:
+        return f"LogEvent({self.code!r}, {self.message!r})"
+
 
-from app.state import SystemState
+class _LogSettings:
+    """Process-wide logging settings; `configure_logging` swaps them in."""
 
+    def __init__(self, config: LoggingConfig) -> None:
+        if config.sink not in LOG_SINKS:
+            raise ValueError(f"Unknown log sink {config.sink!r}; expected one of {LOG_SINKS}")
+        if config.level.upper() not in LOG_LEVELS:
+            raise ValueError(
+                f"Unknown log level {config.level!r}; expected one of {tuple(LOG_LEVELS)}"
+            )
+        self.level = LOG_LEVELS[config.level.upper()]
+        self.max_events = config.max_events
+        self.sink = config.sink
+        self.buffer: Deque[LogEvent] = deque(maxlen=max(1, config.buffer_size))
 
-def append_log(state: SystemState, message: str) -> None:
-    """Append a timestamped log entry to the shared state."""
 
-    timestamp = datetime.now(timezone.utc).isoformat()
-    log_entry = f"[{timestamp}] {message}"
-    if "logs" not in state or state["logs"] is None:
-        state["logs"] = []
-    state["logs"].append(log_entry)
+_settings = _LogSettings(LoggingConfig())
+_settings_lock = threading.Lock()
+
+
+def configure_logging(config: LoggingConfig) -> None:
+    """Apply `config` to every subsequent `append_log` in this process.
+
+    The side buffer survives reconfiguration unless its size changes.
+    """
+
+    global _settings
+    settings = _LogSettings(config)
+    with _settings_lock:
+        if settings.buffer.maxlen == _settings.buffer.maxlen:
+            settings.buffer = _settings.buffer
+        _settings = settings
+
+
+def get_log_buffer() -> Deque[LogEvent]:
+    """Side buffer receiving events when `LoggingConfig.sink == "buffer"`."""
+
+    return _settings.buffer
+
+
+def is_enabled(level: int) -> bool:
+    """Whether an event at `level` would be kept; guard expensive arguments with it."""
+
+    settings = _settings
+    return settings.sink != "off" and level >= settings.level
+
+
+def append_log(
+    state: SystemState,
+    message: str,
+    *args: Any,
+    code: str = "",
+    level: int = INFO,
+) -> None:
+    """Record a log event for this vehicle's run.
+
+    Args:
+        state: Workflow state of the run.
+        message: %-style template, formatted with `args` only when read, so pass
+            values that are not mutated later in the run.
+        code: Stable event code, e.g. ``"anomaly.detected"``.
+        level: DEBUG, INFO or WARNING; events below the configured level are dropped.
+    """
+
+    settings = _settings
+    if level < settings.level or settings.sink == "off":
+        return
+    if settings.sink == "buffer":
+        settings.buffer.append(
+            LogEvent(time.monotonic_ns(), level, code, message, args, state.get("vehicle_id"))
+        )
+        return
+
+    logs = state.get("logs")
+    if logs is None:
+        logs = state["logs"] = []
+    if len(logs) >= settings.max_events:
+        state["logs_dropped"] = state.get("logs_dropped", 0) + 1
+        return
+    logs.append(LogEvent(time.monotonic_ns(), level, code, message, args, state.get("vehicle_id")))
 
 
 def extend_logs(state: SystemState, messages: List[str]) -> None:
@@ -25,3 +166,7 @@ def extend_logs(state: SystemState, messages: List[str]) -> None:
         append_log(state, msg)
 
 
+def format_logs(events: Iterable[object]) -> List[str]:
+    """Render events (or legacy pre-formatted strings) as timestamped lines."""
+
+    return [str(event) for event in events]
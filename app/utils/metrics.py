@@ -0,0 +1,290 @@
+"""In-process latency/count metrics with Prometheus text exposition.
+
+Deliberately dependency-free: a histogram observation is one `bisect` and a few
+integer increments under a lock, cheap enough to leave on for every graph node
+and HTTP request. `build_graph` wraps each node with `timed_node`; servers mount
+`HTTPMetricsMiddleware` and serve `get_metrics_registry().render()` at `/metrics`.
+
+Metrics live in the process that records them, so nodes run by the `process`
+fleet executor are recorded in its workers, not in the server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# seconds; spans sub-millisecond rule nodes up to multi-second fleet requests
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally labelled; `_count` doubles as a call counter."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> per-bucket (non-cumulative) counts, the last one for +Inf
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def label_sets(self) -> List[LabelValues]:
+        with self._lock:
+            return list(self._counts)
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def total(self, *labels: str) -> float:
+        return self._sums.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(
+                (labels, list(counts), self._sums[labels])
+                for labels, counts in self._counts.items()
+            )
+        lines: List[str] = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics of one process; `counter`/`histogram` return existing metrics by name."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name!r} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines: List[str] = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Process-wide registry shared by graph nodes and HTTP handlers."""
+
+    return _registry
+
+
+def _node_metrics(registry: MetricsRegistry) -> Tuple[Histogram, Counter]:
+    return (
+        registry.histogram(
+            "workflow_node_duration_seconds",
+            "Latency of LangGraph workflow nodes.",
+            ("node",),
+        ),
+        registry.counter(
+            "workflow_node_errors_total",
+            "Workflow node invocations that raised.",
+            ("node",),
+        ),
+    )
+
+
+def node_latency_summary(
+    registry: Optional[MetricsRegistry] = None,
+) -> Dict[str, Dict[str, float]]:
+    """node -> {"calls", "seconds", "errors"} recorded so far by `timed_node`."""
+
+    duration, errors = _node_metrics(registry or _registry)
+    return {
+        node: {
+            "calls": duration.count(node),
+            "seconds": duration.total(node),
+            "errors": errors.value(node),
+        }
+        for (node,) in duration.label_sets()
+    }
+
+
+def timed_node(
+    name: str,
+    node: Callable,
+    registry: Optional[MetricsRegistry] = None,
+) -> Callable:
+    """Wrap a graph node so each call records its latency and, on failure, an error."""
+
+    duration, errors = _node_metrics(registry or _registry)
+
+    if asyncio.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def atimed(state):
+            started = time.perf_counter()
+            try:
+                return await node(state)
+            except BaseException:
+                errors.inc(name)
+                raise
+            finally:
+                duration.observe(time.perf_counter() - started, name)
+
+        return atimed
+
+    @functools.wraps(node)
+    def timed(state):
+        started = time.perf_counter()
+        try:
+            return node(state)
+        except BaseException:
+            errors.inc(name)
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started, name)
+
+    return timed
+
+
+class HTTPMetricsMiddleware:
+    """ASGI middleware recording request latency by method, route template and status."""
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None) -> None:
+        self.app = app
+        self.duration = (registry or _registry).histogram(
+            "http_request_duration_seconds",
+            "Latency of HTTP requests by route template.",
+            ("method", "route", "status"),
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # the template keeps cardinality bounded; unmatched paths share one series
+            path = getattr(route, "path", None) or "<unmatched>"
+            self.duration.observe(
+                time.perf_counter() - started, scope["method"], path, str(status[0])
+            )
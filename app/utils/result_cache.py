@@ -0,0 +1,153 @@
+"""Content-addressed cache of final workflow states."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import torch
+
+from app.config import WorkflowConfig
+from app.models.backends import unwrap_model
+from app.state import SystemState
+from app.telemetry import TelemetryFrame
+
+
+CacheKey = Tuple[str, str, str, str, str]
+
+# How a cached state's anomalies were scored: over the telemetry window, or by the
+# incremental streaming scorer, whose result also depends on earlier points.
+WINDOW_SCORER = "window"
+STREAM_SCORER = "stream"
+
+
+def telemetry_digest(frame: TelemetryFrame) -> str:
+    """Hash a vehicle's telemetry so unchanged data maps to the same key."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(frame.metric_names).encode())
+    digest.update(np.ascontiguousarray(frame.timestamps).tobytes())
+    digest.update(np.ascontiguousarray(frame.values).tobytes())
+    return digest.hexdigest()
+
+
+# Config sections that only affect how a run executes, not what it returns.
+_EXECUTION_ONLY_FIELDS = frozenset({"fleet", "streaming"})
+
+
+def config_fingerprint(cfg: WorkflowConfig) -> str:
+    """Hash every workflow knob that can change a result."""
+
+    fields = {
+        name: value
+        for name, value in dataclasses.asdict(cfg).items()
+        if name not in _EXECUTION_ONLY_FIELDS
+    }
+    payload = repr(sorted(fields.items())).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def model_fingerprint(model: torch.nn.Module) -> str:
+    """Hash the model weights; any retrain or reload yields a new version."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    for name, tensor in unwrap_model(model).state_dict().items():
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()
+
+
+class WorkflowResultCache:
+    """Bounded LRU cache of final `SystemState`s keyed by content.
+
+    Keys combine the vehicle id, its telemetry digest, the workflow config
+    fingerprint, the model version and the scorer, so a changed input simply
+    misses and streamed and full-window results are never served for each other. Each
+    vehicle holds at most one entry; `invalidate` drops it eagerly when the
+    caller knows the telemetry changed. State the key cannot cover, such as a
+    workshop booking that may since have expired, is checked by `get`'s `valid`
+    callback. Cached states are shared, so callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, SystemState]" = OrderedDict()
+        self._by_vehicle: Dict[str, CacheKey] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        vehicle_id: str,
+        telemetry: str,
+        config: str,
+        model_version: str,
+        scorer: str = WINDOW_SCORER,
+    ) -> CacheKey:
+        return (vehicle_id, telemetry, config, model_version, scorer)
+
+    def get(
+        self, key: CacheKey, valid: Optional[Callable[[SystemState], bool]] = None
+    ) -> Optional[SystemState]:
+        """The cached state for `key`; entries rejected by `valid` are dropped as misses."""
+
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None and valid is not None and not valid(state):
+                del self._entries[key]
+                self._by_vehicle.pop(key[0], None)
+                state = None
+            if state is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return state
+
+    def put(self, key: CacheKey, state: SystemState) -> None:
+        with self._lock:
+            previous = self._by_vehicle.get(key[0])
+            if previous is not None and previous != key:
+                self._entries.pop(previous, None)
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            self._by_vehicle[key[0]] = key
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._by_vehicle.pop(evicted[0], None)
+
+    def invalidate(self, vehicle_id: str) -> bool:
+        """Drop the cached result of one vehicle. Returns True if one existed."""
+
+        with self._lock:
+            key = self._by_vehicle.pop(vehicle_id, None)
+            if key is None:
+                return False
+            self._entries.pop(key, None)
+            return True
+
+    def clear(self) -> None:
+        """Drop everything, e.g. after a model or config change."""
+
+        with self._lock:
+            self._entries.clear()
+            self._by_vehicle.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
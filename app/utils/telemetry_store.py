@@ -0,0 +1,472 @@
+"""On-disk, memory-mapped fleet telemetry store.
+
+Layout of a store directory:
+
+- ``values.f32``: every vehicle's rows back to back, float32 ``(total_rows, n_metrics)``
+- ``timestamps.f64``: float64 ``(total_rows,)`` aligned with ``values.f32``
+- ``index.npz``: per-vehicle offsets, lengths, metadata (with coordinates), metric
+  mask and digest
+
+Readers map both data files copy-on-write, so vehicle slices are zero-copy views
+backed by the shared page cache. Only the pages of vehicles actually served become
+resident, and every worker process mapping the same store shares them.
+
+Writers stage each file under a unique temporary name and publish it with
+`os.replace`. Rebuilds in `open_fleet_store` and `write_long_telemetry_csv` hold an
+exclusive lock on ``<store>.lock``, so concurrent processes never interleave files
+from different builds.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.state import SystemState
+from app.telemetry import MetricPointsView, TelemetryFrame
+from app.utils.data_loader import ParsedFleet, load_parsed_fleet, vehicle_location
+from app.utils.result_cache import telemetry_digest
+
+
+_STORE_FORMAT_VERSION = 1
+_VALUES_FILE = "values.f32"
+_TIMESTAMPS_FILE = "timestamps.f64"
+_INDEX_FILE = "index.npz"
+_METADATA_TEXT = ("vehicle_id", "model", "supplier_id")
+
+
+@contextlib.contextmanager
+def _store_lock(root: str) -> Iterator[None]:
+    """Exclusive, cross-process lock for (re)building the store at `root`."""
+
+    lock_path = os.path.abspath(root) + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a+b") as handle:
+        if os.name == "nt":
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _temp_file(root: str, name: str, suffix: str = ".tmp") -> str:
+    """A fresh, uniquely named file in `root` to stage `name` in."""
+
+    fd, path = tempfile.mkstemp(prefix=f"{name}.", suffix=suffix, dir=root)
+    os.close(fd)
+    return path
+
+
+@dataclass
+class VehicleRecord:
+    """Metadata stored alongside one vehicle's telemetry."""
+
+    vehicle_id: str
+    customer_id: str
+    model: str
+    supplier_id: str
+    lat: float = np.nan
+    lon: float = np.nan
+
+
+class TelemetryStoreWriter:
+    """Stream vehicles into a new store without holding the fleet in memory.
+
+    Data is staged in uniquely named temporary files until `close` publishes
+    them. Callers rebuilding a store other processes may open should hold
+    `_store_lock`.
+    """
+
+    def __init__(self, root: str, metric_names: Sequence[str]) -> None:
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.metric_names = tuple(sorted(metric_names))
+        self._metric_index = {name: i for i, name in enumerate(self.metric_names)}
+        self._staged = {
+            name: _temp_file(root, name) for name in (_VALUES_FILE, _TIMESTAMPS_FILE)
+        }
+        self._values = open(self._staged[_VALUES_FILE], "wb")
+        self._timestamps = open(self._staged[_TIMESTAMPS_FILE], "wb")
+        self._records: List[VehicleRecord] = []
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._present: List[np.ndarray] = []
+        self._digests: List[str] = []
+        self._rows = 0
+
+    def add(self, record: VehicleRecord, frame: TelemetryFrame) -> None:
+        cols = [self._metric_index[name] for name in frame.metric_names]
+        block = np.zeros((len(frame), len(self.metric_names)), dtype=np.float32)
+        block[:, cols] = frame.values
+        present = np.zeros(len(self.metric_names), dtype=bool)
+        present[cols] = True
+
+        self._values.write(block.tobytes())
+        timestamps = np.ascontiguousarray(frame.timestamps, dtype=np.float64)
+        self._timestamps.write(timestamps.tobytes())
+        self._records.append(record)
+        self._offsets.append(self._rows)
+        self._lengths.append(len(frame))
+        self._present.append(present)
+        self._digests.append(telemetry_digest(frame))
+        self._rows += len(frame)
+
+    def close(self, source_signature: Tuple[int, int] = (-1, -1)) -> None:
+        """Flush data files and publish the index; the store is readable afterwards."""
+
+        self._values.close()
+        self._timestamps.close()
+        for name, staged in self._staged.items():
+            os.replace(staged, os.path.join(self.root, name))
+
+        n_metrics = len(self.metric_names)
+        tmp_index = _temp_file(self.root, _INDEX_FILE, suffix=".npz")
+        np.savez(
+            tmp_index,
+            format_version=np.int64(_STORE_FORMAT_VERSION),
+            source_size=np.int64(source_signature[0]),
+            source_mtime_ns=np.int64(source_signature[1]),
+            metric_names=np.array(self.metric_names, dtype=str),
+            vehicle_ids=np.array([r.vehicle_id for r in self._records], dtype=str),
+            customers=np.array([r.customer_id for r in self._records], dtype=str),
+            models=np.array([r.model for r in self._records], dtype=str),
+            supplier_ids=np.array([r.supplier_id for r in self._records], dtype=str),
+            lats=np.array([r.lat for r in self._records], dtype=np.float64),
+            lons=np.array([r.lon for r in self._records], dtype=np.float64),
+            offsets=np.array(self._offsets, dtype=np.int64),
+            lengths=np.array(self._lengths, dtype=np.int64),
+            present=np.array(self._present, dtype=bool).reshape(-1, n_metrics),
+            digests=np.array(self._digests, dtype=str),
+        )
+        os.replace(tmp_index, os.path.join(self.root, _INDEX_FILE))
+
+    def discard(self) -> None:
+        """Abandon the build and delete its staged files; the store is left as it was."""
+
+        self._values.close()
+        self._timestamps.close()
+        for staged in self._staged.values():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(staged)
+
+
+def write_parsed_fleet(
+    root: str, fleet: ParsedFleet, source_signature: Tuple[int, int] = (-1, -1)
+) -> None:
+    """Write a `ParsedFleet` into a store directory."""
+
+    metric_names = tuple(str(name) for name in fleet.metric_names)
+    writer = TelemetryStoreWriter(root, metric_names)
+    try:
+        for v, vehicle_id in enumerate(fleet.vehicle_ids.tolist()):
+            cols = np.flatnonzero(fleet.present[v])
+            frame = TelemetryFrame(
+                np.ascontiguousarray(fleet.values[v][:, cols]),
+                fleet.timestamps,
+                tuple(metric_names[c] for c in cols),
+            )
+            record = VehicleRecord(
+                vehicle_id=vehicle_id,
+                customer_id=str(fleet.customers[v]),
+                model=str(fleet.models[v]),
+                supplier_id=str(fleet.supplier_ids[v]),
+                lat=float(fleet.lats[v]),
+                lon=float(fleet.lons[v]),
+            )
+            writer.add(record, frame)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close(source_signature)
+
+
+def _long_block_to_values(block: pd.DataFrame, metric_names: Sequence[str]) -> np.ndarray:
+    """Numeric columns as float32; text columns (DTCs) as 1.0 when a code is set."""
+
+    out = np.empty((len(block), len(metric_names)), dtype=np.float32)
+    for j, name in enumerate(metric_names):
+        column = block[name]
+        if pd.api.types.is_numeric_dtype(column):
+            out[:, j] = column.to_numpy(dtype=np.float32, na_value=np.nan)
+        else:
+            text = column.astype(str).str.strip().str.lower()
+            no_code = text.isin(["none", "", "nan"]) | column.isna()
+            out[:, j] = (~no_code).to_numpy(dtype=np.float32)
+    return out
+
+
+def write_long_telemetry_csv(
+    csv_path: str,
+    root: str,
+    metadata_path: Optional[str] = None,
+    chunksize: int = 250_000,
+) -> None:
+    """Stream a long-format telemetry CSV into a store directory.
+
+    Expects one row per (vehicle_id, timestamp) with one column per metric, grouped
+    by vehicle, as written by ``backend/generate_vehicle_dataset.py``. Only one
+    chunk plus one vehicle's rows are held in memory at a time. `metadata_path`
+    optionally points at a CSV with vehicle_id, model and supplier_id columns, and
+    optionally lat/lon. The rebuild holds the store's lock.
+    """
+
+    with _store_lock(root):
+        _write_long_telemetry(csv_path, root, metadata_path, chunksize)
+
+
+def _write_long_telemetry(
+    csv_path: str, root: str, metadata_path: Optional[str], chunksize: int
+) -> None:
+    metadata: Dict[str, Tuple[str, str, float, float]] = {}
+    if metadata_path:
+        meta = pd.read_csv(metadata_path, dtype={c: str for c in _METADATA_TEXT})
+        for column in ("lat", "lon"):
+            meta[column] = pd.to_numeric(meta.get(column, np.nan), errors="coerce")
+        metadata = {
+            row.vehicle_id: (row.model, row.supplier_id, row.lat, row.lon)
+            for row in meta.itertuples()
+        }
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    metric_names = sorted(c for c in header if c not in ("vehicle_id", "timestamp"))
+    writer = TelemetryStoreWriter(root, metric_names)
+    seen: set = set()
+
+    def flush(rows: pd.DataFrame) -> None:
+        vehicle_id = str(rows["vehicle_id"].iat[0])
+        if vehicle_id in seen:
+            raise ValueError(f"{csv_path} must be grouped by vehicle_id ({vehicle_id} repeats)")
+        seen.add(vehicle_id)
+        timestamps = (
+            pd.to_datetime(rows["timestamp"]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+            / 1e9
+        )
+        frame = TelemetryFrame(
+            _long_block_to_values(rows, writer.metric_names), timestamps, writer.metric_names
+        ).sorted_by_time()
+        model, supplier_id, lat, lon = metadata.get(
+            vehicle_id, ("unknown", "unknown", np.nan, np.nan)
+        )
+        writer.add(VehicleRecord(vehicle_id, "", model, supplier_id, lat, lon), frame)
+
+    carry: Optional[pd.DataFrame] = None
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            ids = chunk["vehicle_id"].to_numpy()
+            # rows where a new vehicle starts; the last vehicle may continue in the next chunk
+            starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+            for begin, end in zip(starts[:-1], starts[1:]):
+                flush(chunk.iloc[begin:end])
+            carry = chunk.iloc[starts[-1] :]
+        if carry is not None and len(carry):
+            flush(carry)
+    except BaseException:
+        writer.discard()
+        raise
+
+    stat = os.stat(csv_path)
+    writer.close((stat.st_size, stat.st_mtime_ns))
+
+
+class FleetTelemetryStore:
+    """Read side of a store: lazy, zero-copy per-vehicle frames over `np.memmap`."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        with np.load(os.path.join(root, _INDEX_FILE), allow_pickle=False) as index:
+            if int(index["format_version"]) != _STORE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported telemetry store format in {root}")
+            self.source_signature = (
+                int(index["source_size"]),
+                int(index["source_mtime_ns"]),
+            )
+            self.metric_names = tuple(str(n) for n in index["metric_names"])
+            self.vehicle_ids: List[str] = index["vehicle_ids"].tolist()
+            self._customers = index["customers"]
+            self._models = index["models"]
+            self._supplier_ids = index["supplier_ids"]
+            # stores written before coordinates were recorded have none
+            missing = np.full(len(self.vehicle_ids), np.nan)
+            self._lats = index["lats"] if "lats" in index.files else missing
+            self._lons = index["lons"] if "lons" in index.files else missing
+            self._offsets = index["offsets"]
+            self._lengths = index["lengths"]
+            self._present = index["present"]
+            self._digests = index["digests"]
+        self._position: Dict[str, int] = {v: i for i, v in enumerate(self.vehicle_ids)}
+
+        total_rows = int(self._lengths.sum()) if len(self._lengths) else 0
+        n_metrics = len(self.metric_names)
+        # Copy-on-write maps: pages are shared with other readers until written,
+        # and the arrays stay writable so torch.from_numpy accepts them.
+        if total_rows:
+            self._values = np.memmap(
+                os.path.join(root, _VALUES_FILE),
+                dtype=np.float32,
+                mode="c",
+                shape=(total_rows, n_metrics),
+            )
+            self._timestamps = np.memmap(
+                os.path.join(root, _TIMESTAMPS_FILE),
+                dtype=np.float64,
+                mode="c",
+                shape=(total_rows,),
+            )
+        else:  # np.memmap cannot map an empty file
+            self._values = np.empty((0, n_metrics), dtype=np.float32)
+            self._timestamps = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.vehicle_ids)
+
+    def __contains__(self, vehicle_id: object) -> bool:
+        return vehicle_id in self._position
+
+    def frame(self, vehicle_id: str) -> TelemetryFrame:
+        """Telemetry of one vehicle as views into the mapped files."""
+
+        i = self._position[vehicle_id]
+        start = int(self._offsets[i])
+        stop = start + int(self._lengths[i])
+        values = self._values[start:stop]
+        present = self._present[i]
+        if present.all():
+            names = self.metric_names
+        else:
+            cols = np.flatnonzero(present)
+            values = np.ascontiguousarray(values[:, cols])
+            names = tuple(self.metric_names[c] for c in cols)
+        return TelemetryFrame(values, self._timestamps[start:stop], names)
+
+    def digest(self, vehicle_id: str) -> str:
+        """Telemetry digest recorded at write time; reading it touches no data pages."""
+
+        return str(self._digests[self._position[vehicle_id]])
+
+    def state(self, vehicle_id: str) -> SystemState:
+        """SystemState fragment for graph invocation, built on demand."""
+
+        i = self._position[vehicle_id]
+        frame = self.frame(vehicle_id)
+        state: SystemState = {
+            "vehicle_id": vehicle_id,
+            "model": str(self._models[i]),
+            "variant": "unknown",
+            "user_segment": "retail",
+            "customer_id": str(self._customers[i]),
+            "supplier_id": str(self._supplier_ids[i]),
+            "raw_metrics": MetricPointsView(frame),
+            "telemetry": frame,
+            "logs": [],
+        }
+        location = vehicle_location(self._lats[i], self._lons[i])
+        if location is not None:
+            state["location"] = location
+        return state
+
+
+class LazyFleet(MutableMapping[str, SystemState]):
+    """Vehicle-id → SystemState mapping that reads vehicles from a store on access.
+
+    Assigned states (e.g. fresh telemetry) override the stored ones in memory.
+    """
+
+    def __init__(self, store: FleetTelemetryStore) -> None:
+        self.store = store
+        self._overrides: Dict[str, SystemState] = {}
+        self._removed: set = set()
+
+    def __getitem__(self, vehicle_id: str) -> SystemState:
+        if vehicle_id in self._overrides:
+            return self._overrides[vehicle_id]
+        if vehicle_id in self._removed or vehicle_id not in self.store:
+            raise KeyError(vehicle_id)
+        return self.store.state(vehicle_id)
+
+    def __setitem__(self, vehicle_id: str, state: SystemState) -> None:
+        self._overrides[vehicle_id] = state
+        self._removed.discard(vehicle_id)
+
+    def __delitem__(self, vehicle_id: str) -> None:
+        if vehicle_id not in self:
+            raise KeyError(vehicle_id)
+        self._overrides.pop(vehicle_id, None)
+        if vehicle_id in self.store:
+            self._removed.add(vehicle_id)  # runtime-only vehicles have nothing to mask
+
+    def __contains__(self, vehicle_id: object) -> bool:
+        if vehicle_id in self._overrides:
+            return True
+        return vehicle_id in self.store and vehicle_id not in self._removed
+
+    def __iter__(self) -> Iterator[str]:
+        for vehicle_id in self.store.vehicle_ids:
+            if vehicle_id not in self._removed:
+                yield vehicle_id
+        for vehicle_id in self._overrides:
+            if vehicle_id not in self.store:
+                yield vehicle_id
+
+    def __len__(self) -> int:
+        extra = sum(1 for v in self._overrides if v not in self.store)
+        return len(self.store) - len(self._removed) + extra
+
+    def stored_digest(self, vehicle_id: str) -> Optional[str]:
+        """Write-time digest for untouched stored vehicles, else None."""
+
+        if vehicle_id in self._overrides or vehicle_id not in self.store:
+            return None
+        return self.store.digest(vehicle_id)
+
+
+def default_store_dir(dataset_path: str) -> str:
+    return f"{dataset_path}.store"
+
+
+def open_fleet_store(
+    dataset_path: str, store_dir: Optional[str] = None
+) -> FleetTelemetryStore:
+    """Open the store for `dataset_path`, (re)building it when the source changed.
+
+    Checking and rebuilding happen under the store's lock, so of several processes
+    opening a stale store one rebuilds it and the others open the result.
+    """
+
+    store_dir = store_dir or default_store_dir(dataset_path)
+    stat = os.stat(dataset_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _store_lock(store_dir):
+        if os.path.exists(os.path.join(store_dir, _INDEX_FILE)):
+            try:
+                store = FleetTelemetryStore(store_dir)
+            except (OSError, KeyError, ValueError):
+                store = None
+            if store is not None and store.source_signature == signature:
+                return store
+        write_parsed_fleet(store_dir, load_parsed_fleet(dataset_path), signature)
+        return FleetTelemetryStore(store_dir)
@@ -0,0 +1,153 @@
+"""Vectorized helpers shared by the synthetic data generators.
+
+Text is built with NumPy instead of per-cell Python formatting: every column is
+rendered into a fixed-width uint8 matrix (NUL bytes pad the unused width), the
+columns are joined with separators, and the NUL bytes are dropped in one pass.
+That keeps CSV output several times faster than `DataFrame.to_csv` with memory
+bounded by the chunk size. Parquet output needs pyarrow.
+"""
+
+import os
+
+import numpy as np
+
+COMMA = ord(",")
+NEWLINE = ord("\n")
+
+
+def number_bytes(values, decimals=0):
+    """Numbers as right-aligned text with `decimals` places, shape (n, width)."""
+
+    scaled = np.rint(np.asarray(values, dtype=np.float64) * 10 ** decimals).astype(np.int64)
+    magnitude = np.abs(scaled)
+    n = len(magnitude)
+    n_digits = max(len(str(int(magnitude.max()))) if n else 1, decimals + 1)
+    point = 1 if decimals else 0
+    width = 1 + n_digits + point  # sign, digits, decimal point
+
+    digits = np.empty((n, n_digits), dtype=np.uint8)
+    remaining = magnitude.copy()
+    for k in range(n_digits - 1, -1, -1):
+        digits[:, k] = remaining % 10
+        remaining //= 10
+    digits += ord("0")
+
+    # leading zeros are padding, but keep at least one digit before the point
+    significant = np.maximum(
+        np.floor(np.log10(np.maximum(magnitude, 1))).astype(np.int64) + 1, decimals + 1
+    )
+    keep = np.arange(n_digits)[None, :] >= (n_digits - significant)[:, None]
+    digits[~keep] = 0
+
+    out = np.zeros((n, width), dtype=np.uint8)
+    whole = n_digits - decimals
+    out[:, 1 : 1 + whole] = digits[:, :whole]
+    if decimals:
+        out[:, 1 + whole] = ord(".")
+        out[:, 2 + whole :] = digits[:, whole:]
+    negative = np.flatnonzero(scaled < 0)
+    out[negative, width - significant[negative] - point - 1] = ord("-")
+    return out
+
+
+def string_bytes(values):
+    """Strings as left-aligned ASCII text, shape (n, width)."""
+
+    encoded = np.asarray(values).astype("S")
+    if encoded.itemsize == 0:
+        return np.zeros((len(encoded), 1), dtype=np.uint8)
+    return encoded.view(np.uint8).reshape(len(encoded), encoded.itemsize)
+
+
+def join_columns(columns):
+    """Join per-column byte matrices into CSV lines, shape (n, width)."""
+
+    n = columns[0].shape[0]
+    parts = []
+    for i, column in enumerate(columns):
+        parts.append(column)
+        parts.append(np.full((n, 1), NEWLINE if i == len(columns) - 1 else COMMA, np.uint8))
+    return np.concatenate(parts, axis=1)
+
+
+def interleave_rows(blocks):
+    """Row i of every block, then row i+1 of every block, ... as one line matrix."""
+
+    width = max(block.shape[1] for block in blocks)
+    stacked = np.zeros((blocks[0].shape[0], len(blocks), width), dtype=np.uint8)
+    for j, block in enumerate(blocks):
+        stacked[:, j, : block.shape[1]] = block
+    return stacked.reshape(-1, width)
+
+
+def lines_to_bytes(lines):
+    flat = lines.ravel()
+    return flat[flat != 0].tobytes()
+
+
+def csv_header(names):
+    return (",".join(str(name) for name in names) + "\n").encode()
+
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from exc
+    return pa, pq
+
+
+class ChunkedWriter:
+    """Append chunks to a CSV or Parquet file, written under a temporary name.
+
+    CSV chunks are pre-rendered bytes (`write_csv`); Parquet chunks are DataFrames
+    (`write_frame`). Use as a context manager; the file appears when it closes.
+    """
+
+    def __init__(self, path, fmt, header):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown output format {fmt!r}")
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._tmp = f"{path}.tmp"
+        self._header = header
+        self._fh = None
+        self._parquet = None
+        if fmt == "csv":
+            self._fh = open(self._tmp, "wb")
+            self._fh.write(csv_header(header))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._fh is not None:
+            self._fh.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        if exc_type is None:
+            os.replace(self._tmp, self.path)
+        elif os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def write_csv(self, lines):
+        self._fh.write(lines_to_bytes(lines))
+        self.rows += lines.shape[0]
+
+    def write_frame(self, frame):
+        pa, pq = require_pyarrow()
+        table = pa.Table.from_pandas(frame[list(self._header)], preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self._tmp, table.schema)
+        self._parquet.write_table(table)
+        self.rows += len(frame)
+
+
+def output_path(path, fmt):
+    """Swap the extension of `path` to match the output format."""
+
+    root, ext = os.path.splitext(path)
+    wanted = ".parquet" if fmt == "parquet" else ".csv"
+    return path if ext == wanted else root + wanted
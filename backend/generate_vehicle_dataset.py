@@ -1,227 +1,303 @@
+"""Generate the long-format training datasets (telemetry, service history, ...).
+
+Telemetry is drawn with NumPy for a block of vehicles at a time and streamed to
+disk, so the row count is bounded by disk rather than memory:
+
+    python generate_vehicle_dataset.py                       # 1,000 vehicles x 90 days, hourly
+    python generate_vehicle_dataset.py --vehicles 50000 --days 30 --output-dir data/
+    python generate_vehicle_dataset.py --format parquet      # needs pyarrow
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
 import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
+
+from datagen import (
+    ChunkedWriter,
+    join_columns,
+    number_bytes,
+    require_pyarrow,
+    string_bytes,
+)
+
+# RCA mapping support
+PARTS = np.array(["Engine Pump", "Battery", "Fuel Injector", "Brake Pad", "Alternator"])
+SUPPLIERS = np.array(["S1-Motherson", "S2-Bosch", "S3-Delphi", "S4-Denso"])
+FAILURE_MODES = np.array(["Leakage", "Wear", "Overheating", "Electrical Fault"])
+MODELS = np.array(["A1", "A2", "B1", "B2"])
+PLANTS = np.array(["Plant-1", "Plant-2"])
+AGENTS = np.array(["anomaly", "diagnosis", "scheduling", "engagement", "feedback", "manufacturing"])
+ACTIONS = np.array(["read", "update", "predict", "write", "alert"])
+
+DTC_CODES = np.array(["P0300", "P0420", "P0171", "P0455", "NONE"])
+DTC_WEIGHTS = [0.1, 0.15, 0.2, 0.1, 0.45]
+
+START = datetime(2023, 1, 1)
+
+# Vehicles drawn from one RNG stream; output depends on the seed, not the chunk size
+BLOCK_VEHICLES = 64
+CHUNK_ROWS = 500_000
+
+# name, decimals (None for text), sampler(rng, n)
+TELEMETRY_COLUMNS = [
+    ("engine_temp", 2, lambda rng, n: rng.normal(70, 5, n)),
+    ("coolant_temp", 2, lambda rng, n: rng.normal(40, 3, n)),
+    ("oil_pressure", 2, lambda rng, n: rng.normal(35, 2, n)),
+    ("battery_voltage", 3, lambda rng, n: rng.normal(12.5, 0.3, n)),
+    ("fuel_level", 2, lambda rng, n: rng.uniform(10, 100, n)),
+    ("tire_fl_psi", 2, lambda rng, n: rng.uniform(28, 35, n)),
+    ("tire_fr_psi", 2, lambda rng, n: rng.uniform(28, 35, n)),
+    ("tire_rl_psi", 2, lambda rng, n: rng.uniform(28, 35, n)),
+    ("tire_rr_psi", 2, lambda rng, n: rng.uniform(28, 35, n)),
+    ("rpm", 0, lambda rng, n: rng.integers(700, 3000, n)),
+    ("speed", 0, lambda rng, n: rng.integers(0, 120, n)),
+    ("brake_pressure", 2, lambda rng, n: rng.normal(40, 5, n)),
+    ("gear_position", 0, lambda rng, n: rng.integers(1, 6, n)),
+    ("abs_sensor", 4, lambda rng, n: rng.uniform(0, 1, n)),
+    ("steering_angle", 2, lambda rng, n: rng.uniform(-30, 30, n)),
+    ("dtc_code", None, lambda rng, n: DTC_CODES[rng.choice(len(DTC_CODES), n, p=DTC_WEIGHTS)]),
+    ("maf", 4, lambda rng, n: rng.uniform(0.8, 1.2, n)),
+    ("o2_sensor", 4, lambda rng, n: rng.uniform(0.85, 1.15, n)),
+    ("throttle", 2, lambda rng, n: rng.uniform(5, 95, n)),
+    ("misfire", 0, lambda rng, n: rng.integers(0, 5, n)),
+    ("emissions", 2, lambda rng, n: rng.uniform(200, 400, n)),
+    ("vehicle_load", 2, lambda rng, n: rng.uniform(50, 100, n)),
+    ("intake_air_temp", 2, lambda rng, n: rng.uniform(20, 40, n)),
+]
+TELEMETRY_HEADER = ["vehicle_id", "timestamp"] + [name for name, _, _ in TELEMETRY_COLUMNS]
+
+
+def vehicle_ids(first, stop):
+    return np.char.add("V", np.char.zfill(np.arange(first, stop).astype(str), 4))
+
+
+def save_table(frame, output_dir, name, fmt):
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    if fmt == "parquet":
+        require_pyarrow()
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
 
 # ------------------------------
-# CONFIGURATION
+# 1️⃣ VEHICLE METADATA
 # ------------------------------
-NUM_VEHICLES = 1000
-DAYS = 90
-READINGS_PER_DAY = 24  # hourly
-TOTAL_HOURS = DAYS * READINGS_PER_DAY
+def make_metadata(rng, num_vehicles):
+    return pd.DataFrame({
+        "vehicle_id": vehicle_ids(0, num_vehicles),
+        "model": rng.choice(MODELS, num_vehicles),
+        "variant": rng.choice(["Base", "Mid", "Top"], num_vehicles),
+        "year": rng.choice([2020, 2021, 2022, 2023], num_vehicles),
+        "engine_type": rng.choice(["Petrol", "Diesel", "EV"], num_vehicles),
+        "supplier_id": rng.choice(SUPPLIERS, num_vehicles),
+        "manufacturing_plant": rng.choice(PLANTS, num_vehicles),
+        # home location, in the same region as the workshops
+        "lat": rng.uniform(18.9, 19.3, num_vehicles),
+        "lon": rng.uniform(72.8, 73.1, num_vehicles),
+    })
 
-np.random.seed(42)
-random.seed(42)
 
 # ------------------------------
-# HELPER FUNCTIONS
+# 2️⃣ TELEMETRY DATA (vehicles x readings rows)
 # ------------------------------
-def random_choice_weighted(options):
-    values, weights = zip(*options)
-    return random.choices(values, weights=weights, k=1)[0]
+def telemetry_block(seed, block, first, count, timestamps):
+    """Rows for vehicles `first .. first+count-1`, vehicle-major, as column arrays."""
 
-def generate_failure_code():
-    return random_choice_weighted([
-        ("P0300", 0.1), ("P0420", 0.15), ("P0171", 0.2),
-        ("P0455", 0.1), ("NONE", 0.45)
-    ])
+    rng = np.random.default_rng([seed, block])
+    n = count * len(timestamps)
+    columns = {
+        "vehicle_id": np.repeat(vehicle_ids(first, first + count), len(timestamps)),
+        "timestamp": np.tile(np.arange(len(timestamps)), count),  # index into `timestamps`
+    }
+    for name, decimals, sample in TELEMETRY_COLUMNS:
+        values = sample(rng, n)
+        columns[name] = values if decimals is None else np.round(values, decimals)
+    return columns
 
-# RCA mapping support
-PARTS = ["Engine Pump", "Battery", "Fuel Injector", "Brake Pad", "Alternator"]
-SUPPLIERS = ["S1-Motherson", "S2-Bosch", "S3-Delphi", "S4-Denso"]
-FAILURE_MODES = ["Leakage", "Wear", "Overheating", "Electrical Fault"]
-MODELS = ["A1", "A2", "B1", "B2"]
-PLANTS = ["Plant-1", "Plant-2"]
-
-# ------------------------------
-# 1️⃣ VEHICLE METADATA (1,000 rows)
-# ------------------------------
-metadata = pd.DataFrame({
-    "vehicle_id": [f"V{i:04d}" for i in range(NUM_VEHICLES)],
-    "model": np.random.choice(MODELS, NUM_VEHICLES),
-    "variant": np.random.choice(["Base", "Mid", "Top"], NUM_VEHICLES),
-    "year": np.random.choice([2020, 2021, 2022, 2023], NUM_VEHICLES),
-    "engine_type": np.random.choice(["Petrol", "Diesel", "EV"], NUM_VEHICLES),
-    "supplier_id": np.random.choice(SUPPLIERS, NUM_VEHICLES),
-    "manufacturing_plant": np.random.choice(PLANTS, NUM_VEHICLES),
-})
-metadata.to_csv("vehicle_metadata.csv", index=False)
-
-# ------------------------------
-# 2️⃣ HOURLY TELEMETRY DATA (2.16 million rows)
-# ------------------------------
-rows = []
-start = datetime(2023, 1, 1)
-
-for vid in metadata["vehicle_id"]:
-    ts = start
-    for _ in range(TOTAL_HOURS):
-        rows.append([
-            vid, ts,
-            np.random.normal(70, 5),  # engine temp
-            np.random.normal(40, 3),  # coolant temp
-            np.random.normal(35, 2),  # oil pressure
-            np.random.normal(12.5, 0.3),  # battery voltage
-            np.random.uniform(10, 100),  # fuel level
-            np.random.uniform(28, 35), np.random.uniform(28, 35),
-            np.random.uniform(28, 35), np.random.uniform(28, 35),  # tire pressures
-            np.random.randint(700, 3000),  # rpm
-            np.random.randint(0, 120),  # speed
-            np.random.normal(40, 5),  # brake pressure
-            np.random.randint(1, 6),  # gear
-            np.random.uniform(0, 1),  # ABS sensor
-            np.random.uniform(-30, 30),  # steering angle
-            generate_failure_code(),  # DTC code
-            np.random.uniform(0.8, 1.2),  # MAF
-            np.random.uniform(0.85, 1.15),  # O2 sensor
-            np.random.uniform(5, 95),  # throttle
-            np.random.randint(0, 5),  # misfire
-            np.random.uniform(200, 400),  # emissions
-            np.random.uniform(50, 100),  # vehicle load
-            np.random.uniform(20, 40),  # intake air temp
-        ])
-        ts += timedelta(hours=1)
-
-telemetry_cols = [
-    "vehicle_id", "timestamp", "engine_temp", "coolant_temp", "oil_pressure",
-    "battery_voltage", "fuel_level", "tire_fl_psi", "tire_fr_psi",
-    "tire_rl_psi", "tire_rr_psi", "rpm", "speed", "brake_pressure",
-    "gear_position", "abs_sensor", "steering_angle", "dtc_code",
-    "maf", "o2_sensor", "throttle", "misfire", "emissions",
-    "vehicle_load", "intake_air_temp"
-]
 
-telemetry_df = pd.DataFrame(rows, columns=telemetry_cols)
-telemetry_df.to_csv("telemetry.csv", index=False)
+def _telemetry_lines(columns, timestamp_bytes):
+    parts = [string_bytes(columns["vehicle_id"]), timestamp_bytes[columns["timestamp"]]]
+    for name, decimals, _ in TELEMETRY_COLUMNS:
+        if decimals is None:
+            parts.append(string_bytes(columns[name]))
+        else:
+            parts.append(number_bytes(columns[name], decimals))
+    return join_columns(parts)
+
+
+def _telemetry_frame(columns, timestamps):
+    frame = pd.DataFrame(columns)
+    frame["timestamp"] = timestamps[columns["timestamp"]]
+    return frame
+
+
+def write_telemetry(path, fmt, num_vehicles, timestamps, seed):
+    timestamp_bytes = string_bytes(timestamps.astype("datetime64[s]").astype(str))
+    # ISO output uses a "T" separator; match the "YYYY-MM-DD HH:MM:SS" of pandas' CSV writer
+    timestamp_bytes[:, 10] = ord(" ")
+    blocks_per_chunk = max(1, CHUNK_ROWS // (BLOCK_VEHICLES * max(len(timestamps), 1)))
+    n_blocks = -(-num_vehicles // BLOCK_VEHICLES)
+
+    with ChunkedWriter(path, fmt, TELEMETRY_HEADER) as writer:
+        for chunk_start in range(0, n_blocks, blocks_per_chunk):
+            parts = []
+            for block in range(chunk_start, min(chunk_start + blocks_per_chunk, n_blocks)):
+                first = block * BLOCK_VEHICLES
+                count = min(BLOCK_VEHICLES, num_vehicles - first)
+                parts.append(telemetry_block(seed, block, first, count, timestamps))
+            columns = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+            if fmt == "csv":
+                writer.write_csv(_telemetry_lines(columns, timestamp_bytes))
+            else:
+                writer.write_frame(_telemetry_frame(columns, timestamps))
+    return writer.rows
+
 
 # ------------------------------
 # 3️⃣ SERVICE HISTORY
 # ------------------------------
-service_rows = []
-for vid in metadata["vehicle_id"]:
-    num_repairs = np.random.randint(1, 6)
-    for _ in range(num_repairs):
-        service_rows.append([
-            vid,
-            random_choice_weighted([("Routine", 0.6), ("Breakdown", 0.4)]),
-            random.choice(PARTS),
-            random.choice(FAILURE_MODES),
-            random.randint(1, 5),  # severity
-            np.random.randint(1, 365),  # days since last service
-            np.random.randint(0, 4),  # breakdowns
-            np.random.randint(1, 6),  # customer satisfaction
-        ])
-
-service_df = pd.DataFrame(service_rows, columns=[
-    "vehicle_id","service_type","failed_part","failure_mode",
-    "severity","days_since_last_service","prev_breakdowns",
-    "customer_satisfaction"
-])
-service_df.to_csv("service_history.csv", index=False)
+def make_service_history(rng, ids):
+    vid = np.repeat(ids, rng.integers(1, 6, len(ids)))
+    n = len(vid)
+    return pd.DataFrame({
+        "vehicle_id": vid,
+        "service_type": rng.choice(["Routine", "Breakdown"], n, p=[0.6, 0.4]),
+        "failed_part": rng.choice(PARTS, n),
+        "failure_mode": rng.choice(FAILURE_MODES, n),
+        "severity": rng.integers(1, 6, n),
+        "days_since_last_service": rng.integers(1, 365, n),
+        "prev_breakdowns": rng.integers(0, 4, n),
+        "customer_satisfaction": rng.integers(1, 6, n),
+    })
+
 
 # ------------------------------
 # 4️⃣ CUSTOMER INTERACTIONS
 # ------------------------------
-interaction_rows = []
-for vid in metadata["vehicle_id"]:
-    for _ in range(np.random.randint(5, 15)):
-        interaction_rows.append([
-            vid,
-            random_choice_weighted([("App", 0.5), ("SMS", 0.3), ("Voice", 0.2)]),
-            random.choice(["Yes", "No"]),
-            random.uniform(1, 24),
-            np.random.randint(0, 3),
-        ])
-customer_df = pd.DataFrame(interaction_rows, columns=[
-    "vehicle_id", "channel", "alert_acknowledged", "response_time_hr", "reschedule_count"
-])
-customer_df.to_csv("customer_interactions.csv", index=False)
+def make_customer_interactions(rng, ids):
+    vid = np.repeat(ids, rng.integers(5, 15, len(ids)))
+    n = len(vid)
+    return pd.DataFrame({
+        "vehicle_id": vid,
+        "channel": rng.choice(["App", "SMS", "Voice"], n, p=[0.5, 0.3, 0.2]),
+        "alert_acknowledged": rng.choice(["Yes", "No"], n),
+        "response_time_hr": rng.uniform(1, 24, n),
+        "reschedule_count": rng.integers(0, 3, n),
+    })
+
 
 # ------------------------------
 # 5️⃣ WORKSHOP DATA
 # ------------------------------
-workshop_df = pd.DataFrame({
-    "workshop_id": [f"W{i:03d}" for i in range(20)],
-    "capacity_percent": np.random.uniform(40, 100, 20),
-    "tech_available": np.random.randint(5, 20, 20),
-    "inventory_score": np.random.uniform(0.5, 1.0, 20)
-})
-workshop_df.to_csv("workshops.csv", index=False)
+def make_workshops(rng, n=20):
+    return pd.DataFrame({
+        "workshop_id": [f"W{i:03d}" for i in range(n)],
+        "capacity_percent": rng.uniform(40, 100, n),
+        "tech_available": rng.integers(5, 20, n),
+        "inventory_score": rng.uniform(0.5, 1.0, n),
+        "lat": rng.uniform(18.9, 19.3, n),
+        "lon": rng.uniform(72.8, 73.1, n),
+    })
+
 
 # ------------------------------
 # 6️⃣ AGENT PERFORMANCE LOGS
 # ------------------------------
-agent_logs = []
-agents = ["anomaly", "diagnosis", "scheduling", "engagement", "feedback", "manufacturing"]
+def make_agent_logs(rng, reference, n=5000):
+    return pd.DataFrame({
+        "agent": rng.choice(AGENTS, n),
+        "timestamp": reference - pd.to_timedelta(rng.integers(1, 501, n), unit="h"),
+        "accuracy": rng.uniform(0.7, 0.99, n),
+        "latency": rng.uniform(0.1, 2.0, n),
+        "satisfaction": rng.uniform(0.5, 1.0, n),
+    })
 
-for _ in range(5000):
-    agent_logs.append([
-        random.choice(agents),
-        datetime.now() - timedelta(hours=random.randint(1, 500)),
-        np.random.uniform(0.7, 0.99),  # accuracy
-        np.random.uniform(0.1, 2.0),  # latency
-        np.random.uniform(0.5, 1.0)   # satisfaction
-    ])
-agent_df = pd.DataFrame(agent_logs, columns=[
-    "agent", "timestamp", "accuracy", "latency", "satisfaction"
-])
-agent_df.to_csv("agent_logs.csv", index=False)
 
 # ------------------------------
 # 7️⃣ RCA GRAPH DATA
 # ------------------------------
-rca_rows = []
-for _ in range(2000):
-    rca_rows.append([
-        random.choice(PARTS),
-        random.choice(SUPPLIERS),
-        random.choice(MODELS),
-        random.choice(FAILURE_MODES),
-        random.randint(1, 5),
-        np.random.randint(1, 1000),
-        random.choice(PLANTS)
-    ])
-rca_df = pd.DataFrame(rca_rows, columns=[
-    "part_id","supplier_id","vehicle_model",
-    "failure_mode","severity","occurrence_count","plant"
-])
-rca_df.to_csv("rca_graph.csv", index=False)
+def make_rca_graph(rng, n=2000):
+    return pd.DataFrame({
+        "part_id": rng.choice(PARTS, n),
+        "supplier_id": rng.choice(SUPPLIERS, n),
+        "vehicle_model": rng.choice(MODELS, n),
+        "failure_mode": rng.choice(FAILURE_MODES, n),
+        "severity": rng.integers(1, 6, n),
+        "occurrence_count": rng.integers(1, 1000, n),
+        "plant": rng.choice(PLANTS, n),
+    })
+
 
 # ------------------------------
 # 8️⃣ UEBA LOGS
 # ------------------------------
-ueba_rows = []
-actions = ["read", "update", "predict", "write", "alert"]
+def make_ueba_logs(rng, reference, n=3000):
+    return pd.DataFrame({
+        "agent_id": rng.choice(AGENTS, n),
+        "timestamp": reference - pd.to_timedelta(rng.integers(1, 301, n), unit="h"),
+        "action": rng.choice(ACTIONS, n),
+        "risk_score": rng.uniform(0, 1, n),
+        "status": rng.choice(["Normal", "Suspicious"], n),
+    })
 
-for _ in range(3000):
-    ueba_rows.append([
-        random.choice(agents),
-        datetime.now() - timedelta(hours=random.randint(1, 300)),
-        random.choice(actions),
-        np.random.uniform(0, 1),  # risk score
-        random.choice(["Normal", "Suspicious"]),
-    ])
-
-ueba_df = pd.DataFrame(ueba_rows, columns=[
-    "agent_id","timestamp","action","risk_score","status"
-])
-ueba_df.to_csv("ueba_logs.csv", index=False)
 
 # ------------------------------
 # 9️⃣ LABELS (For ML Training)
 # ------------------------------
-labels = []
-for vid in metadata["vehicle_id"]:
-    labels.append([
-        vid,
-        random.choice(["Normal", "Anomaly"]),
-        random.choice(FAILURE_MODES),
-        np.random.randint(10, 500)  # time to failure
-    ])
-label_df = pd.DataFrame(labels, columns=[
-    "vehicle_id","status","failure_type","time_to_failure_hr"
-])
-label_df.to_csv("labels.csv", index=False)
-
-print("All datasets generated successfully!")
+def make_labels(rng, ids):
+    n = len(ids)
+    return pd.DataFrame({
+        "vehicle_id": ids,
+        "status": rng.choice(["Normal", "Anomaly"], n),
+        "failure_type": rng.choice(FAILURE_MODES, n),
+        "time_to_failure_hr": rng.integers(10, 500, n),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the synthetic vehicle datasets.")
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=90)
+    parser.add_argument("--interval-minutes", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    steps = int(args.days * 24 * 60 / args.interval_minutes)
+    timestamps = np.datetime64(START, "s") + np.arange(steps) * np.timedelta64(
+        args.interval_minutes, "m"
+    )
+    # log timestamps count back from the end of the telemetry window, so reruns match
+    reference = pd.Timestamp(START + timedelta(days=args.days))
+
+    rng = np.random.default_rng(args.seed)
+    metadata = make_metadata(rng, args.vehicles)
+    ids = metadata["vehicle_id"].to_numpy()
+    save_table(metadata, args.output_dir, "vehicle_metadata", args.format)
+
+    path = os.path.join(args.output_dir, f"telemetry.{args.format}")
+    rows = write_telemetry(path, args.format, args.vehicles, timestamps, args.seed)
+    print(f"telemetry: {rows} rows -> {path}")
+
+    save_table(make_service_history(rng, ids), args.output_dir, "service_history", args.format)
+    save_table(
+        make_customer_interactions(rng, ids), args.output_dir, "customer_interactions", args.format
+    )
+    save_table(make_workshops(rng), args.output_dir, "workshops", args.format)
+    save_table(make_agent_logs(rng, reference), args.output_dir, "agent_logs", args.format)
+    save_table(make_rca_graph(rng), args.output_dir, "rca_graph", args.format)
+    save_table(make_ueba_logs(rng, reference), args.output_dir, "ueba_logs", args.format)
+    save_table(make_labels(rng, ids), args.output_dir, "labels", args.format)
+
+    print("All datasets generated successfully!")
+
+
+if __name__ == "__main__":
+    main()
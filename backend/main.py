@@ -1,6 +1,8 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+import metrics
+
 from ueba.api import router as ueba_router
 from agentic_ai_rca.api import router as rca_router
 
@@ -12,7 +14,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.HTTPMetricsMiddleware)
 
 app.include_router(ueba_router, prefix="/ueba", tags=["UEBA"])
 app.include_router(rca_router, prefix="/rca", tags=["RCA"])
 
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,72 @@
+"""HTTP request latency metrics in the Prometheus text format.
+
+The backend runs as its own service (from this directory), so it carries this
+small, dependency-free copy of the histogram used by the main API server.
+"""
+
+import bisect
+import threading
+import time
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC = "http_request_duration_seconds"
+
+_lock = threading.Lock()
+_counts = {}  # (method, route, status) -> per-bucket counts, last one for +Inf
+_sums = {}
+
+
+def observe(seconds, method, route, status):
+    index = bisect.bisect_left(BUCKETS, seconds)
+    key = (method, route, status)
+    with _lock:
+        if key not in _counts:
+            _counts[key] = [0] * (len(BUCKETS) + 1)
+            _sums[key] = 0.0
+        _counts[key][index] += 1
+        _sums[key] += seconds
+
+
+def render():
+    with _lock:
+        items = sorted((key, list(counts), _sums[key]) for key, counts in _counts.items())
+    lines = [
+        f"# HELP {METRIC} Latency of HTTP requests by route template.",
+        f"# TYPE {METRIC} histogram",
+    ]
+    for (method, route, status), counts, total in items:
+        labels = f'method="{method}",route="{route}",status="{status}"'
+        cumulative = 0
+        for bound, count in zip([str(b) for b in BUCKETS] + ["+Inf"], counts):
+            cumulative += count
+            lines.append(f'{METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{METRIC}_sum{{{labels}}} {total}")
+        lines.append(f"{METRIC}_count{{{labels}}} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class HTTPMetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            observe(time.perf_counter() - started, scope["method"], route, str(status[0]))
@@ -1,81 +1,168 @@
-import pandas as pd
-import numpy as np
+"""Generate the wide AgenticAI_Final_Format_Dataset table.
+
+One row per vehicle and parameter, one column per timestamp. Values are drawn
+with NumPy for a block of vehicles at a time and streamed to disk, so memory
+stays flat however large the fleet:
+
+    python script.py --vehicles 100 --days 7 --interval-minutes 30
+    python script.py --vehicles 200000 --days 7 --output load_test.csv
+"""
+
+import argparse
 from datetime import datetime, timedelta
 
-# Configuration
-NUM_CUSTOMERS = 100
-START_DATE = datetime(2025, 1, 1)
-DAYS = 7
-INTERVAL_MINUTES = 30
+import numpy as np
+import pandas as pd
+
+from datagen import (
+    ChunkedWriter,
+    interleave_rows,
+    join_columns,
+    number_bytes,
+    output_path,
+    string_bytes,
+)
 
 # Choices
-vehicle_models = ["Model-X", "Model-Y", "Model-Z"]
-suppliers = ["Supplier-A", "Supplier-B", "Supplier-C"]
-dtc_codes = ["None", "P0135", "P0420", "P0300", "P0455", "U0121"]
+vehicle_models = np.array(["Model-X", "Model-Y", "Model-Z"])
+suppliers = np.array(["Supplier-A", "Supplier-B", "Supplier-C"])
+dtc_codes = np.array(["None", "P0135", "P0420", "P0300", "P0455", "U0121"])
 dtc_prob = [0.80, 0.05, 0.05, 0.04, 0.03, 0.03]
 
-# Timestamp generation
-timestamps = []
-current = START_DATE
-for _ in range(int((24 * 60 / INTERVAL_MINUTES) * DAYS)):
-    timestamps.append(current.strftime("%d-%m %H:%M"))
-    current += timedelta(minutes=INTERVAL_MINUTES)
-
-# Table structure
-columns = ["Sr_No", "Customer", "Details", "Parameters"] + timestamps
-final_df = pd.DataFrame(columns=columns)
-
-# Data generation
-sr_no = 1
-for i in range(NUM_CUSTOMERS):
-    cust = f"CUST{i+1:03d}"
-    vehicle_id = f"VH{i+1:03d}"
-    model = np.random.choice(vehicle_models)
-    supplier = np.random.choice(suppliers)
-
-    details = f"{vehicle_id}, {model}, {supplier}"
-
-    parameters = [
-        "Engine_Temperature",
-        "Odometer",
-        "Battery_SoC",
-        "Speed",
-        "Brake_Pressure",
-        "Fuel_Status",
-        "DTC_Code"
-    ]
-
-    odometer = np.random.randint(10000, 90000)
-
-    for param in parameters:
-        row = [sr_no, cust, details, param]
-
-        for ts in timestamps:
-
-            if param == "Engine_Temperature":
-                val = round(np.clip(np.random.normal(85, 7), 60, 130), 2)
-            elif param == "Battery_SoC":
-                val = np.random.randint(20, 100)
-            elif param == "Speed":
-                val = np.random.randint(0, 120)
-            elif param == "Brake_Pressure":
-                val = np.random.randint(10, 90)
-            elif param == "Odometer":
-                odometer += np.random.randint(0, 5)
-                val = odometer
-            elif param == "Fuel_Status":
-                val = np.random.randint(0, 100)
-            elif param == "DTC_Code":
-                val = np.random.choice(dtc_codes, p=dtc_prob)
+PARAMETERS = [
+    "Engine_Temperature",
+    "Odometer",
+    "Battery_SoC",
+    "Speed",
+    "Brake_Pressure",
+    "Fuel_Status",
+    "DTC_Code",
+]
+DECIMALS = {"Engine_Temperature": 2}
+
+# Vehicles drawn from one RNG stream; output depends on the seed, not the chunk size
+BLOCK_VEHICLES = 256
+CHUNK_CELLS = 4_000_000
+
+
+def make_timestamps(start, days, interval_minutes, fmt):
+    steps = int((24 * 60 / interval_minutes) * days)
+    step = timedelta(minutes=interval_minutes)
+    return [(start + i * step).strftime(fmt) for i in range(steps)]
+
+
+def generate_block(seed, block, first, count, steps):
+    """Vehicles `first .. first+count-1` (0-based) as per-parameter arrays."""
+
+    rng = np.random.default_rng([seed, block])
+    shape = (count, steps)
+    odometer = rng.integers(10000, 90000, (count, 1))
+    values = {
+        "Engine_Temperature": np.round(np.clip(rng.normal(85, 7, shape), 60, 130), 2),
+        # each reading adds 0-4 km before it is recorded
+        "Odometer": odometer + np.cumsum(rng.integers(0, 5, shape), axis=1),
+        "Battery_SoC": rng.integers(20, 100, shape),
+        "Speed": rng.integers(0, 120, shape),
+        "Brake_Pressure": rng.integers(10, 90, shape),
+        "Fuel_Status": rng.integers(0, 100, shape),
+        "DTC_Code": dtc_codes[rng.choice(len(dtc_codes), size=shape, p=dtc_prob)],
+    }
+    index = np.arange(first + 1, first + count + 1)
+    numbers = np.char.zfill(index.astype(str), 3)
+    vehicle_ids = np.char.add("VH", numbers)
+    details = np.char.add(
+        np.char.add(vehicle_ids, ", "),
+        np.char.add(
+            np.char.add(vehicle_models[rng.integers(0, len(vehicle_models), count)], ", "),
+            suppliers[rng.integers(0, len(suppliers), count)],
+        ),
+    )
+    meta = {"Sr_No": index, "Customer": np.char.add("CUST", numbers), "Details": details}
+    return meta, values
+
+
+def _csv_lines(meta, values):
+    sr_no = number_bytes(meta["Sr_No"])
+    customer = string_bytes(meta["Customer"])
+    details = string_bytes(np.char.add(np.char.add('"', meta["Details"]), '"'))
+    blocks = []
+    for param in PARAMETERS:
+        cells = values[param]
+        if cells.dtype.kind in "US":
+            columns = [string_bytes(cells[:, t]) for t in range(cells.shape[1])]
+        else:
+            decimals = DECIMALS.get(param, 0)
+            columns = [number_bytes(cells[:, t], decimals) for t in range(cells.shape[1])]
+        name = string_bytes(np.full(len(sr_no), param))
+        blocks.append(join_columns([sr_no, customer, details, name] + columns))
+    # vehicle-major order: every parameter row of a vehicle before the next vehicle
+    return interleave_rows(blocks)
+
+
+def _frame(meta, values, timestamps):
+    frames = []
+    for p, param in enumerate(PARAMETERS):
+        # timestamp columns mix numbers and DTC codes, so Parquet stores them as text
+        cells = pd.DataFrame(values[param].astype(str), columns=timestamps)
+        cells.insert(0, "Parameters", param)
+        cells.insert(0, "Details", meta["Details"])
+        cells.insert(0, "Customer", meta["Customer"])
+        cells.insert(0, "Sr_No", meta["Sr_No"])
+        cells["_order"] = np.arange(len(cells)) * len(PARAMETERS) + p
+        frames.append(cells)
+    table = pd.concat(frames, ignore_index=True).sort_values("_order", kind="stable")
+    return table.drop(columns="_order")
+
+
+def generate(path, vehicles, days, interval_minutes, start, seed, fmt, timestamp_format):
+    timestamps = make_timestamps(start, days, interval_minutes, timestamp_format)
+    steps = len(timestamps)
+    cells_per_block = BLOCK_VEHICLES * len(PARAMETERS) * max(steps, 1)
+    blocks_per_chunk = max(1, CHUNK_CELLS // cells_per_block)
+    header = ["Sr_No", "Customer", "Details", "Parameters"] + timestamps
+
+    with ChunkedWriter(path, fmt, header) as writer:
+        n_blocks = -(-vehicles // BLOCK_VEHICLES)
+        for chunk_start in range(0, n_blocks, blocks_per_chunk):
+            parts = []
+            for block in range(chunk_start, min(chunk_start + blocks_per_chunk, n_blocks)):
+                first = block * BLOCK_VEHICLES
+                count = min(BLOCK_VEHICLES, vehicles - first)
+                parts.append(generate_block(seed, block, first, count, steps))
+            meta = {k: np.concatenate([m[k] for m, _ in parts]) for k in parts[0][0]}
+            values = {k: np.concatenate([v[k] for _, v in parts]) for k in parts[0][1]}
+            if fmt == "csv":
+                writer.write_csv(_csv_lines(meta, values))
             else:
-                val = None
+                writer.write_frame(_frame(meta, values, timestamps))
+    return writer.rows
+
 
-            row.append(val)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the wide vehicle telemetry dataset.")
+    parser.add_argument("--vehicles", type=int, default=100, help="one customer per vehicle")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--interval-minutes", type=int, default=30)
+    parser.add_argument("--start", default="2025-01-01", help="first timestamp, YYYY-MM-DD")
+    parser.add_argument("--timestamp-format", default="%d-%m %H:%M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", default="AgenticAI_Final_Format_Dataset.csv")
+    args = parser.parse_args(argv)
 
-        final_df.loc[len(final_df)] = row
+    path = output_path(args.output, args.format)
+    rows = generate(
+        path,
+        args.vehicles,
+        args.days,
+        args.interval_minutes,
+        datetime.fromisoformat(args.start),
+        args.seed,
+        args.format,
+        args.timestamp_format,
+    )
+    print(f"🎯 Dataset saved as {path} ({rows} rows)")
 
-    sr_no += 1
 
-# Save CSV
-final_df.to_csv("AgenticAI_Final_Format_Dataset.csv", index=False)
-print("🎯 Dataset saved as AgenticAI_Final_Format_Dataset.csv")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""End-to-end benchmark harness for fleets of synthetic vehicles.
+
+For each fleet size it times the pipeline stages (table write and parse, store
+build, state load, ingest, anomaly scoring, diagnosis, the full graph) and every
+API endpoint in-process, then writes the results as JSON. `--compare` checks the
+run against a stored baseline and exits non-zero on regressions.
+
+    python -m benchmarks.run --sizes 100,1000 --output bench.json
+    python -m benchmarks.run --sizes 100,1000 --compare bench.json
+    python -m benchmarks.run --compare-only new.json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from app.agents import diagnosis_agent, ingest_agent, with_fleet_anomalies
+from app.config import WorkflowConfig
+from app.fleet import FleetRunner
+from app.models.lstm_anomaly import LSTMAnomalyDetector
+from app.utils.data_loader import load_parsed_fleet
+from app.utils.metrics import node_latency_summary
+from app.utils.telemetry_store import FleetTelemetryStore, LazyFleet, write_parsed_fleet
+from benchmarks.synthetic import synthetic_fleet, write_fleet_csv
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+RESULTS_FORMAT_VERSION = 1
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _timed(fn: Callable[[], object]) -> Tuple[float, object]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@dataclass
+class FleetFiles:
+    csv_path: str
+    store_dir: str
+
+
+def _prepare_fleet(n_vehicles: int, workdir: str, seed: int, stages: Dict[str, float]) -> FleetFiles:
+    """Generate the fleet, its dataset CSV and memory-mapped store (reused across runs)."""
+
+    base = os.path.join(workdir, f"fleet_{n_vehicles}_seed{seed}")
+    files = FleetFiles(csv_path=f"{base}.csv", store_dir=f"{base}.csv.store")
+
+    stages["generate"], fleet = _timed(lambda: synthetic_fleet(n_vehicles, seed=seed))
+    if not os.path.exists(files.csv_path):
+        stages["write_table"], _ = _timed(lambda: write_fleet_csv(fleet, files.csv_path))
+    stat = os.stat(files.csv_path)
+    shutil.rmtree(files.store_dir, ignore_errors=True)
+    # Built from the generated arrays but stamped with the CSV's signature, so the
+    # API server adopts it instead of re-parsing the table
+    stages["build_store"], _ = _timed(
+        lambda: write_parsed_fleet(files.store_dir, fleet, (stat.st_size, stat.st_mtime_ns))
+    )
+    return files
+
+
+def _bench_pipeline(
+    n_vehicles: int, files: FleetFiles, max_parse_vehicles: int, stages: Dict[str, float]
+) -> Dict[str, Dict[str, float]]:
+    cfg = WorkflowConfig()
+    torch.manual_seed(0)
+
+    if n_vehicles <= max_parse_vehicles:
+        stages["parse_table"], _ = _timed(lambda: load_parsed_fleet(files.csv_path, use_cache=False))
+        gc.collect()
+
+    def load_states():
+        store = FleetTelemetryStore(files.store_dir)
+        return store, dict(LazyFleet(store))
+
+    stages["load_states"], (store, states) = _timed(load_states)
+    model = LSTMAnomalyDetector(
+        input_dim=len(store.metric_names),
+        hidden_dim=cfg.anomaly.hidden_dim,
+        num_layers=cfg.anomaly.num_layers,
+    )
+
+    stages["ingest"], _ = _timed(
+        lambda: [ingest_agent({**state, "logs": []}) for state in states.values()]
+    )
+    stages["anomaly"], prepared = _timed(
+        lambda: with_fleet_anomalies(model, list(states.values()), cfg)
+    )
+    stages["diagnosis"], _ = _timed(
+        lambda: [diagnosis_agent({**state, "logs": []}, cfg) for state in prepared]
+    )
+    del prepared
+    gc.collect()
+
+    before = node_latency_summary()
+    runner = FleetRunner(model, cfg)
+    try:
+        stages["graph"], results = _timed(lambda: runner.run(states))
+    finally:
+        runner.close()
+    failures = sum(1 for r in results if not r.ok)
+    if failures:
+        print(f"  graph: {failures} vehicles failed")
+    del results
+    gc.collect()
+
+    nodes = {}
+    for node, summary in node_latency_summary().items():
+        prior = before.get(node, {"calls": 0, "seconds": 0.0})
+        nodes[node] = {
+            "calls": summary["calls"] - prior["calls"],
+            "seconds": summary["seconds"] - prior["seconds"],
+        }
+    return nodes
+
+
+def _bench_api(
+    files: FleetFiles, workdir: str, repeat: int, requests: int
+) -> Tuple[Dict[str, Dict[str, float]], float]:
+    """Time every endpoint through a TestClient; runs in a fresh process per fleet.
+
+    Returns:
+        ("METHOD route" -> {"cold", "warm"} seconds, peak RSS of the server process in MB).
+    """
+
+    os.environ["DATASET_PATH"] = files.csv_path
+    os.environ["FLEET_STORE_DIR"] = files.store_dir
+    os.environ["MODEL_REGISTRY_DIR"] = os.path.join(workdir, "model_registry")
+    os.environ["ERROR_STORE_PATH"] = f"{files.csv_path}.errors.npz"
+    if os.path.exists(os.environ["ERROR_STORE_PATH"]):
+        os.remove(os.environ["ERROR_STORE_PATH"])
+    torch.manual_seed(0)
+
+    from fastapi.testclient import TestClient
+
+    import api_server
+
+    store = FleetTelemetryStore(files.store_dir)
+    sample = store.vehicle_ids[: max(1, requests)]
+    calls: List[Tuple[str, str, Callable[[int], dict]]] = [
+        ("GET", "/", lambda i: {}),
+        # the first fleet-wide call loads the dataset and runs every vehicle
+        ("GET", "/api/stats", lambda i: {}),
+        ("GET", "/api/vehicles", lambda i: {}),
+        ("GET", "/api/vehicles/{vehicle_id}", lambda i: {"vehicle_id": sample[i % len(sample)]}),
+        (
+            "POST",
+            "/api/workflow/run/{vehicle_id}",
+            lambda i: {"vehicle_id": sample[i % len(sample)]},
+        ),
+        ("GET", "/api/manufacturing", lambda i: {}),
+        ("GET", "/api/whatif?anomaly_threshold=0.1", lambda i: {}),
+        ("GET", "/api/prefilter", lambda i: {}),
+        ("GET", "/api/cache", lambda i: {}),
+        ("POST", "/api/telemetry", lambda i: {}),
+        ("GET", "/api/telemetry/alerts", lambda i: {}),
+        ("GET", "/metrics", lambda i: {}),
+        ("GET", "/api/schedule", lambda i: {}),
+        ("GET", "/api/workshops/nearest?lat=19.076&lon=72.878", lambda i: {}),
+        # last, so the invalidated entries cannot slow down the calls above
+        (
+            "DELETE",
+            "/api/cache?vehicle_id={vehicle_id}",
+            lambda i: {"vehicle_id": sample[i % len(sample)]},
+        ),
+    ]
+    telemetry = {
+        "points": [
+            {
+                "vehicleId": vehicle_id,
+                "timestamp": time.time(),
+                "metrics": {"Engine_Temperature": 140.0, "Battery_SoC": 5.0},
+            }
+            for vehicle_id in sample
+        ]
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    with TestClient(api_server.app) as client:
+        for method, route, params in calls:
+            timings = []
+            for i in range(1 + repeat):
+                url = route.format(**params(i))
+                body = telemetry if route == "/api/telemetry" else None
+                started = time.perf_counter()
+                response = client.request(method, url, json=body)
+                timings.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text}")
+            results[f"{method} {route}"] = {
+                "cold": timings[0],
+                "warm": statistics.median(timings[1:]) if repeat else timings[0],
+            }
+    return results, _max_rss_mb()
+
+
+def run_benchmarks(
+    sizes: Sequence[int],
+    workdir: str,
+    seed: int = 0,
+    repeat: int = 3,
+    requests: int = 10,
+    max_parse_vehicles: int = 10_000,
+    skip_api: bool = False,
+) -> dict:
+    """Run every stage for every fleet size and return the results document."""
+
+    results = {}
+    for n_vehicles in sizes:
+        print(f"[{n_vehicles} vehicles]")
+        stages: Dict[str, float] = {}
+        files = _prepare_fleet(n_vehicles, workdir, seed, stages)
+        nodes = _bench_pipeline(n_vehicles, files, max_parse_vehicles, stages)
+        entry = {"stages": stages, "nodes": nodes, "max_rss_mb": _max_rss_mb()}
+        for stage, seconds in stages.items():
+            print(f"  {stage:<14} {seconds:10.3f} s")
+        if not skip_api:
+            # a fresh interpreter per fleet: api_server keeps module-level state
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                future = pool.submit(_bench_api, files, workdir, repeat, requests)
+                entry["api"], entry["api_max_rss_mb"] = future.result()
+            for endpoint, timing in entry["api"].items():
+                print(f"  {endpoint:<38} cold {timing['cold']:9.3f} s  warm {timing['warm']:9.4f} s")
+        results[str(n_vehicles)] = entry
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def flatten(document: dict) -> Dict[str, float]:
+    """`size/stage`-style keys to seconds, the unit compared against a baseline."""
+
+    flat: Dict[str, float] = {}
+    for size, entry in document["results"].items():
+        for stage, seconds in entry.get("stages", {}).items():
+            flat[f"{size}/{stage}"] = seconds
+        for node, summary in entry.get("nodes", {}).items():
+            flat[f"{size}/node/{node}"] = summary["seconds"]
+        for endpoint, timing in entry.get("api", {}).items():
+            flat[f"{size}/api/{endpoint}/cold"] = timing["cold"]
+            flat[f"{size}/api/{endpoint}/warm"] = timing["warm"]
+    return flat
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float("inf")
+
+
+def compare(
+    current: dict, baseline: dict, tolerance: float = 0.25, min_seconds: float = 0.005
+) -> Tuple[List[Comparison], List[Comparison]]:
+    """(regressions, improvements) beyond `tolerance`, ignoring changes under `min_seconds`.
+
+    Only timings present in both documents are compared.
+    """
+
+    now, before = flatten(current), flatten(baseline)
+    regressions, improvements = [], []
+    for key in sorted(now.keys() & before.keys()):
+        item = Comparison(key, before[key], now[key])
+        if abs(item.current - item.baseline) < min_seconds:
+            continue
+        if item.current > item.baseline * (1 + tolerance):
+            regressions.append(item)
+        elif item.current < item.baseline * (1 - tolerance):
+            improvements.append(item)
+    return regressions, improvements
+
+
+def _report(regressions: List[Comparison], improvements: List[Comparison], tolerance: float) -> None:
+    for title, items in (("Regressions", regressions), ("Improvements", improvements)):
+        if not items:
+            continue
+        print(f"{title} (beyond {tolerance:.0%}):")
+        for item in items:
+            print(
+                f"  {item.key:<60} {item.baseline:10.4f} s -> {item.current:10.4f} s"
+                f"  ({item.ratio:.2f}x)"
+            )
+    if not regressions:
+        print("No regressions.")
+
+
+def _load(path: str) -> dict:
+    with open(path) as fh:
+        document = json.load(fh)
+    if document.get("format_version") != RESULTS_FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported results format {document.get('format_version')}")
+    return document
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="comma-separated fleet sizes",
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--workdir", help="where synthetic fleets are kept (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="warm calls per endpoint")
+    parser.add_argument("--requests", type=int, default=10, help="vehicles sampled by per-vehicle endpoints")
+    parser.add_argument(
+        "--max-parse-vehicles",
+        type=int,
+        default=10_000,
+        help="largest fleet whose wide table is parsed; pandas holds it all in memory",
+    )
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored run")
+    parser.add_argument(
+        "--compare-only",
+        nargs=2,
+        metavar=("CURRENT", "BASELINE"),
+        help="compare two stored runs without benchmarking",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="ignore smaller changes")
+    args = parser.parse_args(argv)
+
+    if args.compare_only:
+        current, baseline = (_load(path) for path in args.compare_only)
+    else:
+        workdir = args.workdir or tempfile.mkdtemp(prefix="fleet-bench-")
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            current = run_benchmarks(
+                [int(s) for s in args.sizes.split(",") if s],
+                workdir,
+                seed=args.seed,
+                repeat=args.repeat,
+                requests=args.requests,
+                max_parse_vehicles=args.max_parse_vehicles,
+                skip_api=args.skip_api,
+            )
+        finally:
+            if not args.workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+        with open(args.output, "w") as fh:
+            json.dump(current, fh, indent=2)
+        print(f"Wrote {args.output}")
+        if not args.compare:
+            return 0
+        baseline = _load(args.compare)
+
+    regressions, improvements = compare(current, baseline, args.tolerance, args.min_seconds)
+    _report(regressions, improvements, args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Synthetic fleets in the shape of AgenticAI_Final_Format_Dataset.
+
+`synthetic_fleet` builds the parsed arrays directly (vectorized, no text), and
+`write_fleet_csv` renders them as the wide dataset table - one row per vehicle
+and parameter, with the vehicle's coordinates, one column per timestamp, DTC
+codes as strings - streaming a chunk of vehicles at a time so even 100k
+vehicles fit in memory.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_loader import ParsedFleet
+
+# Parameter rows in the order the dataset lists them for each vehicle
+PARAMETERS = (
+    "Engine_Temperature",
+    "Odometer",
+    "Battery_SoC",
+    "Speed",
+    "Brake_Pressure",
+    "Fuel_Status",
+    "DTC_Code",
+)
+DTC_CODES = np.array(["P0135", "P0300", "P0420", "U0121", "C1234"])
+MODELS = np.array(["Model-X", "Model-Y", "Model-Z"])
+SUPPLIERS = np.array(["Supplier-A", "Supplier-B", "Supplier-C"])
+START = pd.Timestamp("2025-01-01")
+STEP = pd.Timedelta(minutes=30)
+
+
+def synthetic_fleet(
+    n_vehicles: int,
+    n_steps: int = 336,
+    seed: int = 0,
+    anomaly_rate: float = 0.05,
+    dtc_rate: float = 0.03,
+) -> ParsedFleet:
+    """Random telemetry with the dataset's value ranges.
+
+    A share `anomaly_rate` of vehicles gets an engine-temperature excursion and a
+    battery drain over the last quarter of their window, so the pre-filter and the
+    LSTM have something to find.
+    """
+
+    rng = np.random.default_rng(seed)
+    metric_names = np.array(sorted(PARAMETERS))
+    col = {name: j for j, name in enumerate(metric_names)}
+    shape = (n_vehicles, n_steps)
+    values = np.empty((n_vehicles, n_steps, len(metric_names)), dtype=np.float32)
+
+    values[:, :, col["Engine_Temperature"]] = np.round(rng.uniform(60.0, 111.0, shape), 2)
+    odometer_start = rng.integers(10_000, 90_000, (n_vehicles, 1))
+    values[:, :, col["Odometer"]] = odometer_start + np.cumsum(rng.integers(0, 4, shape), axis=1)
+    values[:, :, col["Battery_SoC"]] = rng.integers(20, 100, shape)
+    values[:, :, col["Speed"]] = rng.integers(0, 120, shape)
+    values[:, :, col["Brake_Pressure"]] = rng.integers(10, 90, shape)
+    values[:, :, col["Fuel_Status"]] = rng.integers(0, 100, shape)
+    values[:, :, col["DTC_Code"]] = rng.random(shape) < dtc_rate
+
+    anomalous = np.flatnonzero(rng.random(n_vehicles) < anomaly_rate)
+    tail = slice(n_steps - n_steps // 4, n_steps)
+    values[anomalous, tail, col["Engine_Temperature"]] += 40.0
+    values[anomalous, tail, col["Battery_SoC"]] = 5.0
+
+    index = np.arange(1, n_vehicles + 1)
+    timestamps = np.array(
+        [(START + i * STEP).timestamp() for i in range(n_steps)], dtype=np.float64
+    )
+    return ParsedFleet(
+        customers=np.char.add("CUST", np.char.zfill(index.astype(str), 3)),
+        vehicle_ids=np.char.add("VH", np.char.zfill(index.astype(str), 3)),
+        models=MODELS[rng.integers(0, len(MODELS), n_vehicles)],
+        supplier_ids=SUPPLIERS[rng.integers(0, len(SUPPLIERS), n_vehicles)],
+        lats=rng.uniform(18.9, 19.3, n_vehicles).round(5),
+        lons=rng.uniform(72.8, 73.1, n_vehicles).round(5),
+        timestamps=timestamps,
+        metric_names=metric_names,
+        values=values,
+        present=np.ones((n_vehicles, len(metric_names)), dtype=bool),
+    )
+
+
+def fleet_table(fleet: ParsedFleet, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+    """Wide dataset rows for vehicles `[start, stop)` of `fleet`."""
+
+    stop = len(fleet.vehicle_ids) if stop is None else stop
+    metric_names = fleet.metric_names.tolist()
+    n = stop - start
+    headers = [pd.Timestamp(ts, unit="s") for ts in fleet.timestamps]
+
+    details = np.char.add(
+        np.char.add(np.char.add(fleet.vehicle_ids[start:stop], ", "), fleet.models[start:stop]),
+        np.char.add(", ", fleet.supplier_ids[start:stop]),
+    )
+    frames = []
+    for p, name in enumerate(PARAMETERS):
+        block = fleet.values[start:stop, :, metric_names.index(name)]
+        if name == "DTC_Code":
+            codes = DTC_CODES[(np.arange(block.size) % len(DTC_CODES)).reshape(block.shape)]
+            cells = pd.DataFrame(np.where(block > 0, codes, None), columns=headers)
+        elif name == "Engine_Temperature":
+            cells = pd.DataFrame(block.astype(np.float64).round(2), columns=headers)
+        else:
+            cells = pd.DataFrame(block.astype(np.int64), columns=headers)
+        meta = pd.DataFrame(
+            {
+                "Sr_No": np.arange(start + 1, stop + 1),
+                "Customer": fleet.customers[start:stop],
+                "Details": details,
+                "Parameters": name,
+                "Latitude": fleet.lats[start:stop],
+                "Longitude": fleet.lons[start:stop],
+            }
+        )
+        frame = pd.concat([meta, cells], axis=1)
+        frame["_order"] = np.arange(n) * len(PARAMETERS) + p
+        frames.append(frame)
+    table = pd.concat(frames, ignore_index=True).sort_values("_order", kind="stable")
+    return table.drop(columns="_order").reset_index(drop=True)
+
+
+def write_fleet_csv(fleet: ParsedFleet, path: str, chunk_vehicles: int = 2_000) -> None:
+    """Write `fleet` as a dataset-shaped CSV, `chunk_vehicles` vehicles at a time."""
+
+    tmp_path = f"{path}.tmp"
+    n_vehicles = len(fleet.vehicle_ids)
+    with open(tmp_path, "w", newline="") as fh:
+        for start in range(0, n_vehicles, chunk_vehicles):
+            table = fleet_table(fleet, start, min(start + chunk_vehicles, n_vehicles))
+            table.to_csv(fh, header=start == 0, index=False)
+    os.replace(tmp_path, path)
@@ -9,7 +9,8 @@ import torch
 
 from app.config import WorkflowConfig
 from app.graph import build_graph
-from app.models.lstm_anomaly import LSTMAnomalyDetector
+from app.models.registry import load_or_init_model
+from app.telemetry import frame_from_state
 from app.state import SystemState, VehicleMetricPoint
 from app.utils.data_loader import load_vehicle_timeseries
 
@@ -50,7 +51,6 @@ def main() -> None:
     if vehicles:
         # Take first vehicle for the demo run.
         initial_state = next(iter(vehicles.values()))
-        feature_dim = len(initial_state["raw_metrics"][0]["metrics"])
     else:
         initial_state = {
             "vehicle_id": "V-12345",
@@ -60,14 +60,14 @@ def main() -> None:
             "raw_metrics": _build_dummy_time_series(),
             "logs": [],
         }
-        feature_dim = len(initial_state["raw_metrics"][0]["metrics"])
 
-    # Initialize model with random weights (placeholder until trained weights are available).
-    model = LSTMAnomalyDetector(
-        input_dim=feature_dim,
+    # Latest registered weights when their schema matches, else random initialization.
+    model, model_entry = load_or_init_model(
+        frame_from_state(initial_state).metric_names,
         hidden_dim=cfg.anomaly.hidden_dim,
         num_layers=cfg.anomaly.num_layers,
     )
+    print(f"Model: {model_entry.tag if model_entry else 'untrained (random weights)'}")
 
     workflow = build_graph(model, cfg)
 
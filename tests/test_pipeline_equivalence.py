@@ -0,0 +1,120 @@
+"""`CompiledPipeline` must return the same final states as the LangGraph workflow."""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from typing import Dict, List
+
+import pytest
+import torch
+
+from app.config import WorkflowConfig
+from app.graph import build_graph
+from app.models.lstm_anomaly import LSTMAnomalyDetector
+from app.pipeline import _path, build_pipeline, state_differences
+from app.scheduling import SchedulingEngine, engine as engine_module
+from app.state import SystemState
+from app.utils.data_loader import fleet_to_states
+from benchmarks.synthetic import synthetic_fleet
+
+HEALTHY_THRESHOLD = math.inf  # no reconstruction error exceeds it
+NOW = datetime(2025, 1, 1, 8, 30)
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls) -> datetime:
+        return NOW
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    # both runtimes must see the same calendar floor and slot times
+    monkeypatch.setattr(engine_module, "datetime", _FrozenDatetime)
+
+
+@pytest.fixture(scope="module")
+def vehicles() -> Dict[str, SystemState]:
+    return fleet_to_states(synthetic_fleet(6, n_steps=48, seed=0))
+
+
+@pytest.fixture(scope="module")
+def model(vehicles) -> LSTMAnomalyDetector:
+    cfg = WorkflowConfig()
+    torch.manual_seed(0)
+    n_metrics = len(next(iter(vehicles.values()))["telemetry"].metric_names)
+    return LSTMAnomalyDetector(n_metrics, cfg.anomaly.hidden_dim, cfg.anomaly.num_layers).eval()
+
+
+def _config(anomaly_threshold: float | None = None, fast_path: bool = True) -> WorkflowConfig:
+    cfg = WorkflowConfig()
+    cfg.fast_path = fast_path
+    if anomaly_threshold is not None:
+        cfg.anomaly.anomaly_threshold = anomaly_threshold
+    return cfg
+
+
+class _Runtimes:
+    """The graph and the pipeline, each booking on its own engine."""
+
+    def __init__(self) -> None:
+        cfg = WorkflowConfig()
+        self.engines = {
+            "graph": SchedulingEngine.from_config(cfg.scheduling),
+            "pipeline": SchedulingEngine.from_config(cfg.scheduling),
+        }
+
+    def run(
+        self,
+        model: LSTMAnomalyDetector,
+        vehicles: Dict[str, SystemState],
+        cfg: WorkflowConfig,
+    ) -> Dict[str, List[SystemState]]:
+        workflows = {
+            "graph": build_graph(model, cfg, scheduler=self.engines["graph"]),
+            "pipeline": build_pipeline(model, cfg, scheduler=self.engines["pipeline"]),
+        }
+        return {
+            name: [
+                workflow.invoke({**state, "logs": list(state.get("logs") or [])})
+                for state in vehicles.values()
+            ]
+            for name, workflow in workflows.items()
+        }
+
+
+def _assert_equivalent(finals: Dict[str, List[SystemState]]) -> None:
+    for expected, actual in zip(finals["graph"], finals["pipeline"]):
+        assert state_differences(expected, actual) == [], expected["vehicle_id"]
+
+
+def test_scheduled_path(model, vehicles):
+    finals = _Runtimes().run(model, vehicles, _config())
+    assert {_path(state) for state in finals["graph"]} == {"scheduled"}
+    _assert_equivalent(finals)
+
+
+def test_healthy_fast_path(model, vehicles):
+    finals = _Runtimes().run(model, vehicles, _config(HEALTHY_THRESHOLD))
+    assert {_path(state) for state in finals["graph"]} == {"healthy"}
+    _assert_equivalent(finals)
+
+
+@pytest.mark.parametrize("anomaly_threshold", [None, HEALTHY_THRESHOLD])
+def test_without_fast_path(model, vehicles, anomaly_threshold):
+    finals = _Runtimes().run(model, vehicles, _config(anomaly_threshold, fast_path=False))
+    _assert_equivalent(finals)
+
+
+def test_booked_vehicle_that_recovers_releases_its_bay(model, vehicles):
+    runtimes = _Runtimes()
+    booked = runtimes.run(model, vehicles, _config())
+    _assert_equivalent(booked)
+    assert all(len(engine) == len(vehicles) for engine in runtimes.engines.values())
+
+    recovered = runtimes.run(model, vehicles, _config(HEALTHY_THRESHOLD))
+    _assert_equivalent(recovered)
+    for name, engine in runtimes.engines.items():
+        assert len(engine) == 0, name
+        assert all(state["schedule"] is None for state in recovered[name])